@@ -0,0 +1,206 @@
+"""
+IVF Approximate Nearest-Neighbour Index
+
+Inverted-file index for ``MmapVectorStore``: a spherical k-means coarse
+quantizer splits the normalized vectors into ``nlist`` cells and a query only
+scores the rows of its ``nprobe`` closest cells. The index stores row ids, not
+vectors, so it adds one int32 per chunk on top of the store's matrix.
+
+    store = MmapVectorStore(embeddings, ann=IVFIndex(nprobe=8))
+    store.add_documents(all_splits)        # trains once enough rows exist
+    print(evaluate_recall(store, queries, k=4, nprobes=[1, 4, 16]))
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from vector_store import normalize, top_k
+
+
+def cluster_sums(vectors: np.ndarray, assign: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per-cluster vector sums and counts (sort + reduceat, much faster than ``np.add.at``)."""
+    order = np.argsort(assign, kind="stable")
+    counts = np.bincount(assign, minlength=k)
+    sums = np.zeros((k, vectors.shape[1]), dtype=np.float32)
+    nonempty = np.flatnonzero(counts)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+    sums[nonempty] = np.add.reduceat(vectors[order], starts, axis=0)
+    return sums, counts
+
+
+def kmeans(
+    vectors: np.ndarray, nlist: int, niter: int = 20, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means on normalized ``vectors``; returns ``(nlist, dim)`` centroids."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(niter):
+        sums, counts = cluster_sums(vectors, assign_cells(vectors, centroids), nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_cells(vectors: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+    """Nearest centroid (by inner product) for every row."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        out[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return out
+
+
+class IVFIndex:
+    """Inverted lists over the rows of a normalized vector matrix.
+
+    Args:
+        nlist: number of k-means cells; defaults to ``4 * sqrt(n)`` at training time.
+        nprobe: cells scanned per query, the recall/latency knob.
+        min_train: rows needed before the quantizer is trained; until then the
+            store keeps using exact search.
+        sample_per_cell: training sample size per cell.
+    """
+
+    def __init__(
+        self,
+        nlist: int | None = None,
+        nprobe: int = 8,
+        min_train: int = 10_000,
+        sample_per_cell: int = 256,
+        niter: int = 20,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.sample_per_cell = sample_per_cell
+        self.niter = niter
+        self.seed = seed
+        self.centroids: np.ndarray | None = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists: tuple[np.ndarray, np.ndarray] | None = None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def fit(self, vectors: np.ndarray, alive: np.ndarray | None = None) -> None:
+        """Train the coarse quantizer on ``vectors`` and (re)assign every row."""
+        n = len(vectors)
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        live = np.flatnonzero(alive[:n]) if alive is not None else np.arange(n)
+        sample = rng.choice(live, min(len(live), nlist * self.sample_per_cell), replace=False)
+        self.centroids = kmeans(vectors[np.sort(sample)], nlist, self.niter, self.seed)
+        self.nlist = nlist
+        self.assignments = assign_cells(vectors, self.centroids)
+        if alive is not None:
+            self.assignments[~alive[:n]] = -1
+        self._lists = None
+
+    def add(self, vectors: np.ndarray, start: int) -> None:
+        """Assign rows ``start .. start + len(vectors)`` to their cells."""
+        end = start + len(vectors)
+        if len(self.assignments) < end:
+            # Grow geometrically; rows past the last add stay -1 (in no cell).
+            grown = np.full(max(end, 2 * len(self.assignments), 256), -1, dtype=np.int32)
+            grown[: len(self.assignments)] = self.assignments
+            self.assignments = grown
+        if self.trained:
+            self.assignments[start:end] = assign_cells(vectors, self.centroids)
+        self._lists = None
+
+    def remove(self, rows) -> None:
+        self.assignments[np.asarray(rows, dtype=np.int64)] = -1
+        self._lists = None
+
+    def compact(self, rows: np.ndarray) -> None:
+        """Keep only ``rows`` (in order), matching a compacted vector matrix."""
+        self.assignments = self.assignments[rows]
+        self._lists = None
+
+    def _inverted_lists(self) -> tuple[np.ndarray, np.ndarray]:
+        """CSR layout: rows sorted by cell plus per-cell offsets."""
+        if self._lists is None:
+            live = np.flatnonzero(self.assignments >= 0)
+            cells = self.assignments[live]
+            order = np.argsort(cells, kind="stable")
+            offsets = np.searchsorted(cells[order], np.arange(self.nlist + 1))
+            self._lists = (live[order], offsets)
+        return self._lists
+
+    def search(
+        self, vectors: np.ndarray, queries: np.ndarray, k: int, nprobe: int | None = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Approximate top-k ``(rows, scores)`` for each normalized query."""
+        rows_by_cell, offsets = self._inverted_lists()
+        probes = top_k(queries @ self.centroids.T, nprobe or self.nprobe)
+        results = []
+        for query, cells in zip(queries, probes):
+            candidates = np.sort(np.concatenate(
+                [rows_by_cell[offsets[c]:offsets[c + 1]] for c in cells]
+            ))
+            scores = vectors[candidates] @ query
+            best = top_k(scores, k)
+            results.append((candidates[best], scores[best]))
+        return results
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: str | os.PathLike) -> None:
+        params = {
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "min_train": self.min_train,
+            "sample_per_cell": self.sample_per_cell,
+            "niter": self.niter,
+            "seed": self.seed,
+        }
+        arrays = {"assignments": self.assignments, "params": np.array(json.dumps(params))}
+        if self.trained:
+            arrays["centroids"] = self.centroids
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "IVFIndex":
+        with np.load(Path(path)) as data:
+            index = cls(**json.loads(str(data["params"])))
+            index.assignments = data["assignments"]
+            if "centroids" in data:
+                index.centroids = data["centroids"]
+        return index
+
+
+def evaluate_recall(
+    store, queries: np.ndarray, k: int = 4, nprobes: list[int] = (1, 2, 4, 8, 16, 32)
+) -> list[dict]:
+    """Recall@k and latency of the store's IVF index against exact search per ``nprobe``."""
+    queries = normalize(np.atleast_2d(queries))
+    start = time.perf_counter()
+    exact = [store._search_rows(query, k, exact=True)[0] for query in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    report = []
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        approx = store.ann.search(store._vectors, queries, k, nprobe=nprobe)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        hits = sum(
+            len(np.intersect1d(found, truth))
+            for (found, _), (truth, _) in zip(approx, exact)
+        )
+        report.append({
+            "nprobe": nprobe,
+            "recall": hits / (len(queries) * min(k, len(store))),
+            "ms_per_query": elapsed_ms,
+            "exact_ms_per_query": exact_ms,
+        })
+    return report
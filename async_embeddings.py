@@ -0,0 +1,263 @@
+"""
+Concurrent Gemini Embedding Client
+
+Replacement for ``GoogleGenerativeAIEmbeddings`` that calls the
+``batchEmbedContents`` REST endpoint directly on an asyncio loop:
+
+- texts are de-duplicated (also across concurrent callers while a request is
+  in flight) and packed into batches up to the per-request limits,
+- a token bucket enforces requests/minute and tokens/minute quotas,
+- at most ``max_concurrency`` requests are in flight,
+- 429 and 5xx responses are retried with jittered exponential backoff,
+  honouring ``Retry-After``.
+
+The sync ``embed_documents``/``embed_query`` and the async variants all run on
+one background event loop, so the client can be shared by scripts and async
+servers alike.
+
+    embeddings = GeminiBatchEmbeddings(model="models/gemini-embedding-001")
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+from parallel_embeddings import approx_tokens
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` units per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until ``amount`` units are available; returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+@dataclass
+class ClientStats:
+    texts: int = 0
+    unique_texts: int = 0
+    inflight_dedup: int = 0
+    requests: int = 0
+    retries: int = 0
+    throttled_seconds: float = 0.0
+
+
+class GeminiBatchEmbeddings(Embeddings):
+    """Rate-limited, batching, de-duplicating Gemini embeddings client.
+
+    Args:
+        max_batch: texts per ``batchEmbedContents`` request (API limit 100).
+        max_batch_tokens: approximate tokens per request.
+        requests_per_minute / tokens_per_minute: quota enforced client-side;
+            ``None`` disables that bucket.
+        max_concurrency: requests in flight at once.
+        transport: custom ``httpx`` transport (tests, proxies).
+    """
+
+    def __init__(
+        self,
+        model: str = "models/gemini-embedding-001",
+        api_key: str | None = None,
+        base_url: str = DEFAULT_BASE_URL,
+        max_batch: int = 100,
+        max_batch_tokens: int = 20_000,
+        requests_per_minute: float | None = 1500,
+        tokens_per_minute: float | None = 1_000_000,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        task_type: str = "RETRIEVAL_DOCUMENT",
+        query_task_type: str = "RETRIEVAL_QUERY",
+        timeout: float = 60.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.model = model if model.startswith("models/") else f"models/{model}"
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.base_url = base_url.rstrip("/")
+        self.max_batch = max_batch
+        self.max_batch_tokens = max_batch_tokens
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.task_type = task_type
+        self.query_task_type = query_task_type
+        self.timeout = timeout
+        self.transport = transport
+        self.stats = ClientStats()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+
+    # -- event loop ----------------------------------------------------------
+
+    def _run(self, coro: Coroutine) -> Future:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _setup(self) -> None:
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_bucket = (
+            TokenBucket(self.requests_per_minute / 60, max(1.0, self.requests_per_minute / 60))
+            if self.requests_per_minute else None
+        )
+        self._token_bucket = (
+            TokenBucket(self.tokens_per_minute / 60, max(self.max_batch_tokens, self.tokens_per_minute / 60))
+            if self.tokens_per_minute else None
+        )
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        self._run(self._client.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    # -- batching ------------------------------------------------------------
+
+    def _pack(self, texts: list[str]) -> list[list[str]]:
+        batches, batch, tokens = [], [], 0
+        for text in texts:
+            size = approx_tokens(text)
+            if batch and (len(batch) == self.max_batch or tokens + size > self.max_batch_tokens):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(text)
+            tokens += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _post(self, texts: list[str], task_type: str) -> list[list[float]]:
+        body = {
+            "requests": [
+                {"model": self.model, "content": {"parts": [{"text": text}]}, "taskType": task_type}
+                for text in texts
+            ]
+        }
+        url = f"{self.base_url}/{self.model}:batchEmbedContents"
+        headers = {"x-goog-api-key": self.api_key} if self.api_key else {}
+        tokens = sum(approx_tokens(text) for text in texts)
+
+        for attempt in range(self.max_retries + 1):
+            if self._request_bucket:
+                self.stats.throttled_seconds += await self._request_bucket.acquire()
+            if self._token_bucket:
+                self.stats.throttled_seconds += await self._token_bucket.acquire(tokens)
+            retry_after = None
+            async with self._semaphore:
+                self.stats.requests += 1
+                try:
+                    response = await self._client.post(url, json=body, headers=headers)
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUS:
+                        response.raise_for_status()
+                        return [item["values"] for item in response.json()["embeddings"]]
+                    if attempt == self.max_retries:
+                        response.raise_for_status()
+                    retry_after = response.headers.get("Retry-After")
+            self.stats.retries += 1
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def _embed(self, texts: list[str], task_type: str) -> list[list[float]]:
+        self.stats.texts += len(texts)
+        keys = [(task_type, hashlib.sha256(text.encode("utf-8")).hexdigest()) for text in texts]
+        owned: dict[tuple[str, str], str] = {}
+        for key, text in zip(keys, texts):
+            if key in self._inflight or key in owned:
+                if key in self._inflight and key not in owned:
+                    self.stats.inflight_dedup += 1
+                continue
+            owned[key] = text
+            self._inflight[key] = asyncio.get_running_loop().create_future()
+        self.stats.unique_texts += len(owned)
+
+        async def run(batch_keys: list[tuple[str, str]]) -> None:
+            try:
+                vectors = await self._post([owned[key] for key in batch_keys], task_type)
+            except BaseException as e:
+                for key in batch_keys:
+                    self._inflight.pop(key).set_exception(e)
+                raise
+            for key, vector in zip(batch_keys, vectors):
+                self._inflight.pop(key).set_result(vector)
+
+        by_text = {text: key for key, text in owned.items()}
+        batches = [[by_text[text] for text in batch] for batch in self._pack(list(owned.values()))]
+        futures = {key: self._inflight[key] for key in owned}
+        futures.update({key: self._inflight[key] for key in keys if key not in futures})
+        tasks = [asyncio.create_task(run(batch)) for batch in batches]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return [await futures[key] for key in keys]
+
+    # -- Embeddings interface -------------------------------------------------
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._run(self._embed(list(texts), self.task_type)).result()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._run(self._embed([text], self.query_task_type)).result()[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.wrap_future(self._run(self._embed(list(texts), self.task_type)))
+
+    async def aembed_query(self, text: str) -> list[float]:
+        vectors = await asyncio.wrap_future(self._run(self._embed([text], self.query_task_type)))
+        return vectors[0]
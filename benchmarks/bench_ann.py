@@ -0,0 +1,66 @@
+"""
+IVF Recall/Latency Benchmark
+
+Builds an ``MmapVectorStore`` with an ``IVFIndex`` incrementally (the way
+``add_documents`` batches arrive) on clustered synthetic 384-d vectors and
+prints recall@k and per-query latency for several ``nprobe`` settings against
+exact search.
+
+    python benchmarks/bench_ann.py --size 1000000 --nprobes 1 4 16 64
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ann_index import IVFIndex, evaluate_recall  # noqa: E402
+from vector_store import MmapVectorStore  # noqa: E402
+
+
+def clustered(rng: np.random.Generator, centers: np.ndarray, n: int, spread: float) -> np.ndarray:
+    picks = rng.integers(0, len(centers), n)
+    noise = rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    return centers[picks] + spread * noise
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((1000, args.dim), dtype=np.float32)
+    store = MmapVectorStore(
+        DeterministicFakeEmbedding(size=args.dim),
+        ann=IVFIndex(min_train=min(args.size, 50_000)),
+    )
+
+    start = time.perf_counter()
+    for offset in range(0, args.size, args.batch):
+        n = min(args.batch, args.size - offset)
+        docs = [Document(page_content=f"chunk {offset + i}") for i in range(n)]
+        store.add_vectors(clustered(rng, centers, n, 0.8), docs)
+    print(f"Built {len(store)} chunks, nlist={store.ann.nlist} in {time.perf_counter() - start:.1f}s")
+
+    queries = clustered(rng, centers, args.queries, 0.8)
+    print(f"{'nprobe':>7} {'recall@' + str(args.k):>10} {'ms/query':>10} {'exact ms':>10}")
+    for row in evaluate_recall(store, queries, args.k, args.nprobes):
+        print(
+            f"{row['nprobe']:>7} {row['recall']:>10.3f} "
+            f"{row['ms_per_query']:>10.3f} {row['exact_ms_per_query']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Checkpointer Memory / Write Latency Benchmark
+
+Runs a long conversation (``--turns`` user turns, answers of ``--answer-words``
+words) through ``create_agent`` with a fake chat model, once with
+``InMemorySaver`` and once with ``SQLiteCheckpointer``. Reports Python heap
+held after the run (tracemalloc), time and bytes serialized per
+``put``/``put_writes`` call, and how long a fresh process needs to
+resume the thread.
+
+    python benchmarks/bench_checkpointer.py --turns 200 --answer-words 200
+"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sqlite_checkpointer import SQLiteCheckpointer  # noqa: E402
+
+
+def timed(saver, seconds: list[float]):
+    """Record the time of every checkpoint write on ``saver``."""
+    for name in ("put", "put_writes"):
+        method = getattr(saver, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                seconds.append(time.perf_counter() - start)
+
+        setattr(saver, name, wrapper)
+    return saver
+
+
+def run(saver, turns: int, words: int) -> dict:
+    answers = iter([AIMessage(content=("word " * words).strip()) for _ in range(turns)])
+    agent = create_agent(GenericFakeChatModel(messages=answers), tools=[], checkpointer=saver)
+    config = {"configurable": {"thread_id": "long"}}
+    seconds: list[float] = []
+    timed(saver, seconds)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i in range(turns):
+        agent.invoke({"messages": [{"role": "user", "content": f"question {i} " * 20}]}, config)
+    elapsed = time.perf_counter() - start
+    if isinstance(saver, SQLiteCheckpointer):
+        saver.flush()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return {"held": held, "writes": seconds, "turn_ms": elapsed / turns * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--answer-words", type=int, default=200)
+    parser.add_argument("--keep-last", type=int, default=20)
+    args = parser.parse_args()
+
+    memory = InMemorySaver()
+    in_memory = run(memory, args.turns, args.answer_words)
+    in_memory_bytes = sum(len(blob[1]) for blob in memory.blobs.values())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "checkpoints.sqlite"
+        saver = SQLiteCheckpointer(path, keep_last=args.keep_last)
+        on_disk = run(saver, args.turns, args.answer_words)
+        stats = saver.stats()
+        saver.close()
+
+        start = time.perf_counter()
+        resumed = SQLiteCheckpointer(path, keep_last=args.keep_last)
+        state = resumed.get_tuple({"configurable": {"thread_id": "long"}})
+        resume_ms = (time.perf_counter() - start) * 1000
+        messages = len(state.checkpoint["channel_values"]["messages"])
+        resumed.close()
+
+    print(f"{args.turns} turns, {messages} messages in the final state")
+    print(f"{'saver':>20} {'heap MB':>8} {'ms/write':>9} {'p99 ms':>7} {'KB/write':>9} {'turn ms':>8}")
+    for name, result, written in (
+        ("InMemorySaver", in_memory, in_memory_bytes),
+        ("SQLiteCheckpointer", on_disk, stats["bytes_written"]),
+    ):
+        writes = sorted(result["writes"])
+        print(
+            f"{name:>20} {result['held'] / 2**20:8.1f} {sum(writes) / len(writes) * 1000:9.3f} "
+            f"{writes[int(0.99 * (len(writes) - 1))] * 1000:7.3f} {written / len(writes) / 1024:9.1f} "
+            f"{result['turn_ms']:8.1f}"
+        )
+    print(f"SQLite rows kept: {stats['checkpoints']} checkpoints, {stats['blobs']} blobs "
+          f"({stats['delta_blobs']} of {stats['delta_blobs'] + stats['full_blobs']} values written as deltas)")
+    print(f"resume in a fresh process: {resume_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
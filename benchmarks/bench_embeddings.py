@@ -0,0 +1,64 @@
+"""
+Local Embedding Throughput Benchmark
+
+Embeds a synthetic corpus of chunk-sized texts with ``HuggingFaceEmbeddings``
+(single process) and with ``ParallelHuggingFaceEmbeddings`` at several worker
+counts, and prints chunks/sec for each.
+
+    python benchmarks/bench_embeddings.py --chunks 5000 --workers 1 2 4 8
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from parallel_embeddings import ParallelHuggingFaceEmbeddings  # noqa: E402
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+WORDS = (
+    "agent planning memory tool reward hacking hallucination diffusion video "
+    "model policy retrieval context chunk embedding vector search regulation"
+).split()
+
+
+def corpus(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(10, 200))) for _ in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    texts = corpus(args.chunks)
+    print(f"{'backend':>28} {'chunks/s':>10}")
+
+    if not args.skip_baseline:
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        baseline = HuggingFaceEmbeddings(model_name=MODEL)
+        baseline.embed_documents(texts[:32])
+        start = time.perf_counter()
+        baseline.embed_documents(texts)
+        print(f"{'HuggingFaceEmbeddings':>28} {len(texts) / (time.perf_counter() - start):>10.1f}")
+
+    for workers in args.workers:
+        embeddings = ParallelHuggingFaceEmbeddings(model_name=MODEL, workers=workers)
+        try:
+            embeddings.embed_documents(texts[: 32 * workers])  # load the model in every worker
+            start = time.perf_counter()
+            embeddings.embed_documents(texts)
+            elapsed = time.perf_counter() - start
+        finally:
+            embeddings.close()
+        print(f"{f'Parallel (workers={workers})':>28} {len(texts) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Filtered Search Benchmark
+
+Compares a metadata-filtered ``similarity_search`` on ``MmapVectorStore`` with
+a predicate (scores every vector, then checks documents) against the same
+filter as a dict (resolved through the metadata index, scores only the
+matching rows). The filter selects one source out of ``--sources`` and a
+page range.
+
+    python benchmarks/bench_filter.py --sizes 10000 100000 --sources 50
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench_search import queries_per_sec  # noqa: E402
+from vector_store import MmapVectorStore  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--sources", type=int, default=50)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>10} {'matching':>9} {'predicate q/s':>14} {'index q/s':>11}")
+    for n in args.sizes:
+        store = MmapVectorStore(DeterministicFakeEmbedding(size=args.dim))
+        documents = [
+            Document(page_content=f"chunk {i}", metadata={"source": f"doc{i % args.sources}.pdf", "page": i // args.sources})
+            for i in range(n)
+        ]
+        store.add_vectors(rng.standard_normal((n, args.dim), dtype=np.float32), documents)
+        queries = rng.standard_normal((16, args.dim), dtype=np.float32)
+
+        pages = n // args.sources
+        lo, hi = pages // 4, pages // 2
+        as_dict = {"source": "doc3.pdf", "page": {"$gte": lo, "$lte": hi}}
+
+        def as_callable(doc):
+            return doc.metadata["source"] == "doc3.pdf" and lo <= doc.metadata["page"] <= hi
+
+        matching = len(store._filtered_rows(as_dict))
+        predicate_qps = queries_per_sec(
+            lambda q: store.similarity_search_by_vector(q, k=args.k, filter=as_callable), queries[:4]
+        )
+        index_qps = queries_per_sec(
+            lambda q: store.similarity_search_by_vector(q, k=args.k, filter=as_dict), queries
+        )
+        print(f"{n:>10} {matching:>9} {predicate_qps:14.1f} {index_qps:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
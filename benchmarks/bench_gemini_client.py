@@ -0,0 +1,159 @@
+"""
+Gemini Embedding Client Benchmark
+
+Starts a local fake ``batchEmbedContents`` server with per-request latency and
+a requests-per-second quota (answering ``429`` above it), then embeds a
+corpus with:
+
+- one request per text (``embed_query`` in a loop),
+- sequential batches of 100 (what ``GoogleGenerativeAIEmbeddings`` does),
+- ``GeminiBatchEmbeddings`` at several concurrency levels.
+
+Prints wall time, requests sent, 429s seen and texts/sec for each.
+
+    python benchmarks/bench_gemini_client.py --texts 5000 --latency 0.2 --server-rps 20
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from async_embeddings import GeminiBatchEmbeddings  # noqa: E402
+
+MODEL = "models/gemini-embedding-001"
+WORDS = "agent planning memory tool retrieval context chunk embedding vector regulation".split()
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, rps: float, dim: int):
+        super().__init__(("127.0.0.1", 0), FakeGeminiHandler)
+        self.latency = latency
+        self.rps = rps
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.window: list[float] = []
+        self.requests = 0
+        self.rejected = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1beta"
+
+    def admit(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 1.0]
+            if len(self.window) >= self.rps:
+                self.rejected += 1
+                return False
+            self.window.append(now)
+            return True
+
+    def reset(self) -> None:
+        with self.lock:
+            self.window, self.requests, self.rejected = [], 0, 0
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not self.server.admit():
+            self._reply(429, b"{}", {"Retry-After": "1"})
+            return
+        time.sleep(self.server.latency)
+        dim = self.server.dim
+        items = [
+            {"values": [float(len(r["content"]["parts"][0]["text"]))] * dim}
+            for r in body["requests"]
+        ]
+        self._reply(200, json.dumps({"embeddings": items}).encode())
+
+    def _reply(self, status: int, payload: bytes, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def post_with_retry(session: requests.Session, url: str, texts: list[str]) -> None:
+    body = {"requests": [{"model": MODEL, "content": {"parts": [{"text": t}]}} for t in texts]}
+    while (response := session.post(url, json=body)).status_code == 429:
+        time.sleep(float(response.headers.get("Retry-After", 1)))
+    response.raise_for_status()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--server-rps", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--single-limit", type=int, default=200, help="texts for the one-per-request baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choices(WORDS, k=rng.randint(20, 200))) for _ in range(args.texts)]
+    texts += texts[: args.texts // 10]  # some repeated chunks
+
+    server = FakeGeminiServer(args.latency, args.server_rps, dim=768)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"{server.url}/{MODEL}:batchEmbedContents"
+    print(f"{'client':>34} {'seconds':>8} {'requests':>9} {'429s':>6} {'texts/s':>9}")
+
+    def report(name: str, n: int, seconds: float) -> None:
+        print(f"{name:>34} {seconds:>8.2f} {server.requests:>9} {server.rejected:>6} {n / seconds:>9.1f}")
+        server.reset()
+        time.sleep(1.0)  # let the server's quota window drain
+
+    session = requests.Session()
+    single = texts[: args.single_limit]
+    start = time.perf_counter()
+    for text in single:
+        post_with_retry(session, url, [text])
+    report(f"one text/request ({len(single)} texts)", len(single), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), 100):
+        post_with_retry(session, url, texts[i : i + 100])
+    report("sequential batches of 100", len(texts), time.perf_counter() - start)
+
+    for concurrency in args.concurrency:
+        embeddings = GeminiBatchEmbeddings(
+            model=MODEL,
+            api_key="bench",
+            base_url=server.url,
+            max_concurrency=concurrency,
+            requests_per_minute=args.server_rps * 60,
+            tokens_per_minute=None,
+        )
+        try:
+            start = time.perf_counter()
+            embeddings.embed_documents(texts)
+            elapsed = time.perf_counter() - start
+        finally:
+            embeddings.close()
+        report(f"GeminiBatchEmbeddings (c={concurrency})", len(texts), elapsed)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Quantized Storage Benchmark
+
+Reports the memory footprint and recall@k loss of int8 and product-quantized
+``QuantizedVectorStore`` against exact float32 search, with and without exact
+re-ranking, on clustered synthetic vectors.
+
+    python benchmarks/bench_quantization.py --size 200000 --dim 384
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from quantization import (  # noqa: E402
+    ProductQuantizer,
+    QuantizedVectorStore,
+    ScalarQuantizer,
+    evaluate_quantization,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rerank", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((1000, args.dim), dtype=np.float32)
+
+    def sample(n: int) -> np.ndarray:
+        noise = rng.standard_normal((n, args.dim), dtype=np.float32)
+        return centers[rng.integers(0, len(centers), n)] + 0.8 * noise
+
+    vectors = sample(args.size)
+    queries = sample(args.queries)
+    documents = [Document(page_content=f"chunk {i}") for i in range(args.size)]
+
+    print(
+        f"{'quantizer':>10} {'float32 MB':>11} {'codes MB':>9} {'ratio':>6} "
+        f"{'recall adc':>11} {'recall rerank':>14} {'train s':>8}"
+    )
+    for quantizer in (ScalarQuantizer(), ProductQuantizer()):
+        store = QuantizedVectorStore(
+            DeterministicFakeEmbedding(size=args.dim),
+            quantizer=quantizer,
+            rerank=args.rerank,
+            min_train=args.size,
+        )
+        start = time.perf_counter()
+        store.add_vectors(vectors, documents)
+        build_s = time.perf_counter() - start
+        report = evaluate_quantization(store, queries, args.k)
+        print(
+            f"{quantizer.kind:>10} {report['float32_bytes'] / 1e6:>11.1f} "
+            f"{report['code_bytes'] / 1e6:>9.1f} {report['compression']:>6.1f} "
+            f"{report['recall_adc']:>11.3f} {report['recall_rerank']:>14.3f} {build_s:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Re-Ranking Latency / Quality Benchmark
+
+Builds queries from a saved index: each query is a random word window taken
+from one chunk, and that chunk is the answer. Compares plain vector top-k
+with cross-encoder re-ranking of ``fetch_k`` candidates on:
+
+- hit@k (the answer chunk reaches the LLM) and MRR,
+- retrieval ms/query, cold and with the score cache warm,
+- estimated ``rewrite_question`` loops per question (a miss costs one loop,
+  geometric in the miss rate) and time-to-answer given ``--llm-seconds``
+  per grade + generate round.
+
+    python benchmarks/bench_rerank.py --index .cache/indexes/lilianweng-blog --queries 200
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from embedding_cache import CachedEmbeddings  # noqa: E402
+from parallel_embeddings import ParallelHuggingFaceEmbeddings  # noqa: E402
+from rerank import CrossEncoderReranker  # noqa: E402
+from vector_store import MmapVectorStore  # noqa: E402
+
+
+def make_queries(store: MmapVectorStore, n: int, words: int, seed: int = 0) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    ids = store.ids()
+    queries = []
+    for id_ in rng.sample(ids, min(n, len(ids))):
+        tokens = store.get_by_ids([id_])[0].page_content.split()
+        if len(tokens) < words:
+            continue
+        start = rng.randrange(len(tokens) - words + 1)
+        queries.append((" ".join(tokens[start : start + words]), id_))
+    return queries
+
+
+def evaluate(name, retrieve, queries, k, llm_seconds):
+    hits, rr = 0, 0.0
+    start = time.perf_counter()
+    for query, answer in queries:
+        ids = [doc.id for doc in retrieve(query)][:k]
+        if answer in ids:
+            hits += 1
+            rr += 1 / (ids.index(answer) + 1)
+    ms = (time.perf_counter() - start) * 1000 / len(queries)
+    hit_rate = hits / len(queries)
+    loops = (1 - hit_rate) / hit_rate if hit_rate else float("inf")
+    answer_s = (1 + loops) * (ms / 1000 + llm_seconds)
+    print(
+        f"{name:>30} {hit_rate:>7.3f} {rr / len(queries):>7.3f} {ms:>9.1f} "
+        f"{loops:>7.2f} {answer_s:>10.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--index", default=".cache/indexes/lilianweng-blog")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=8)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--llm-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    embeddings = CachedEmbeddings(ParallelHuggingFaceEmbeddings(model_name=args.model))
+    store = MmapVectorStore.load(args.index, embeddings)
+    queries = make_queries(store, args.queries, args.query_words)
+    print(f"{len(store)} chunks, {len(queries)} queries, k={args.k}")
+    print(f"{'retriever':>30} {'hit@k':>7} {'MRR':>7} {'ms/query':>9} {'loops':>7} {'answer s':>10}")
+
+    evaluate("vector top-k", lambda q: store.similarity_search(q, k=args.k), queries, args.k, args.llm_seconds)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        reranker = CrossEncoderReranker(cache_dir=cache_dir)
+        reranker.score("warm up", ["load the model"])
+        for fetch_k in args.fetch_k:
+            def retrieve(q, fetch_k=fetch_k):
+                return reranker.rerank(q, store.similarity_search(q, k=fetch_k), args.k)
+
+            evaluate(f"rerank fetch_k={fetch_k} (cold)", retrieve, queries, args.k, args.llm_seconds)
+            evaluate(f"rerank fetch_k={fetch_k} (warm)", retrieve, queries, args.k, args.llm_seconds)
+    embeddings.embeddings.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Similarity Search Benchmark
+
+Compares queries/sec of ``MmapVectorStore`` (normalized matrix + argpartition,
+single and batched) against ``InMemoryVectorStore`` on random 384-d vectors,
+the size of the all-MiniLM-L6-v2 embeddings used by the RAG agents.
+
+    python benchmarks/bench_search.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from vector_store import MmapVectorStore  # noqa: E402
+
+
+def queries_per_sec(search, queries: np.ndarray, min_seconds: float = 1.0) -> float:
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for query in queries:
+            search(query)
+            done += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed
+
+
+def build_stores(n: int, dim: int, with_baseline: bool, rng: np.random.Generator):
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    documents = [Document(page_content=f"chunk {i}") for i in range(n)]
+    ids = [str(i) for i in range(n)]
+    embedding = DeterministicFakeEmbedding(size=dim)
+
+    store = MmapVectorStore(embedding)
+    store.add_vectors(vectors, documents, ids)
+
+    baseline = None
+    if with_baseline:
+        baseline = InMemoryVectorStore(embedding)
+        for id_, vector in zip(ids, vectors):
+            baseline.store[id_] = {"id": id_, "vector": vector.tolist(), "text": "", "metadata": {}}
+    return store, baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument(
+        "--baseline-max",
+        type=int,
+        default=100_000,
+        help="skip InMemoryVectorStore above this size (it holds vectors as Python lists)",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>10} {'InMemory q/s':>14} {'Mmap q/s':>12} {'Mmap batch q/s':>16}")
+    for n in args.sizes:
+        store, baseline = build_stores(n, args.dim, n <= args.baseline_max, rng)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        mmap_qps = queries_per_sec(
+            lambda q: store.similarity_search_by_vector(q, k=args.k), queries
+        )
+        start = time.perf_counter()
+        store.batch_similarity_search_with_score_by_vector(queries, k=args.k)
+        batch_qps = len(queries) / (time.perf_counter() - start)
+
+        if baseline is not None:
+            baseline_qps = queries_per_sec(
+                lambda q: baseline.similarity_search_by_vector(q.tolist(), k=args.k),
+                queries[:8],
+            )
+            baseline_text = f"{baseline_qps:14.1f}"
+        else:
+            baseline_text = f"{'skipped':>14}"
+        print(f"{n:>10} {baseline_text} {mmap_qps:12.1f} {batch_qps:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
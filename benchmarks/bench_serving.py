@@ -0,0 +1,122 @@
+"""
+Serving Load Test
+
+Drives ``AgentServer`` with a fake streaming chat model (``--tokens`` tokens,
+``--token-latency`` seconds each, no API key needed) behind ``create_agent``
+with an in-memory checkpointer. ``--clients`` concurrent clients send
+``--requests`` turns spread over ``--threads`` conversations and stream the
+answers. Reports requests/sec, p50/p99 latency, p50 time to first token and
+rejected (over-queue) requests, next to the old blocking ``invoke`` loop.
+
+    python benchmarks/bench_serving.py --requests 2000 --clients 200 --max-concurrency 64
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from serving import AgentServer, Overloaded  # noqa: E402
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Answers every turn with ``tokens`` words, ``token_latency`` seconds apart."""
+
+    tokens: int = 20
+    token_latency: float = 0.005
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _words(self, messages) -> list[str]:
+        return [f"w{i} " for i in range(self.tokens)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.tokens * self.token_latency)
+        message = AIMessage(content="".join(self._words(messages)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for word in self._words(messages):
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+async def load_test(server: AgentServer, requests: int, clients: int, threads: int):
+    pending = iter(range(requests))
+    latencies, first_tokens, rejected = [], [], 0
+
+    async def client() -> None:
+        nonlocal rejected
+        for i in pending:
+            start = time.perf_counter()
+            first = None
+            try:
+                async for _ in server.stream("agent", f"thread-{i % threads}", f"question {i}"):
+                    first = first or time.perf_counter() - start
+            except Overloaded:
+                rejected += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            first_tokens.append(first)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start, latencies, first_tokens, rejected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--baseline-requests", type=int, default=20)
+    args = parser.parse_args()
+
+    model = FakeStreamingChatModel(tokens=args.tokens, token_latency=args.token_latency)
+    agent = create_agent(model, tools=[], checkpointer=InMemorySaver())
+
+    start = time.perf_counter()
+    for i in range(args.baseline_requests):
+        config = {"configurable": {"thread_id": f"thread-{i % args.threads}"}}
+        agent.invoke({"messages": [{"role": "user", "content": f"question {i}"}]}, config)
+    baseline = args.baseline_requests / (time.perf_counter() - start)
+
+    server = AgentServer({"agent": agent}, max_concurrency=args.max_concurrency, max_queue=args.max_queue)
+    elapsed, latencies, first_tokens, rejected = asyncio.run(
+        load_test(server, args.requests, args.clients, args.threads)
+    )
+
+    print(f"blocking invoke loop: {baseline:8.1f} req/s")
+    print(f"AgentServer:          {len(latencies) / elapsed:8.1f} req/s")
+    print(f"  p50 latency        {percentile(latencies, 0.50) * 1000:8.1f} ms")
+    print(f"  p99 latency        {percentile(latencies, 0.99) * 1000:8.1f} ms")
+    print(f"  p50 first token    {statistics.median(first_tokens) * 1000:8.1f} ms")
+    print(f"  rejected           {rejected:8d}")
+    print(f"  server stats       {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
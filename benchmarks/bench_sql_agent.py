@@ -0,0 +1,192 @@
+"""
+SQL Agent Benchmark
+
+Answers "Which genre on average has the longest tracks?" against a synthetic
+Chinook-shaped SQLite database (``--tracks`` rows in ``Track``) with a
+scripted chat model that sleeps ``--latency`` seconds per call, so no API key
+is needed. Two agents are compared over ``--questions`` runs of the question:
+
+- ``toolkit``: the ``SQLDatabaseToolkit`` flow the old prompt forces: list
+  tables, fetch schemas, run the LLM query checker, run the query, answer.
+- ``cached``: ``sql_cache`` tools with the relevant schemas in the prompt:
+  run the query, answer. Repeated queries are served by the result cache.
+
+Reports model calls, tool calls and latency per question.
+
+    python benchmarks/bench_sql_agent.py --tracks 200000 --latency 0.3
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sql_cache import QueryCache, SchemaCatalog, SchemaContext, connect_read_only, sql_tools  # noqa: E402
+
+QUESTION = "Which genre on average has the longest tracks?"
+QUERY = (
+    "SELECT g.Name, AVG(t.Milliseconds) AS AvgMilliseconds FROM Track t "
+    "JOIN Genre g ON t.GenreId = g.GenreId GROUP BY g.GenreId ORDER BY AvgMilliseconds DESC LIMIT 5"
+)
+
+SCHEMA = """
+CREATE TABLE Artist (ArtistId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+CREATE TABLE Album (AlbumId INTEGER PRIMARY KEY, Title NVARCHAR(160),
+    ArtistId INTEGER REFERENCES Artist(ArtistId));
+CREATE TABLE Genre (GenreId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+CREATE TABLE MediaType (MediaTypeId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+CREATE TABLE Track (TrackId INTEGER PRIMARY KEY, Name NVARCHAR(200),
+    AlbumId INTEGER REFERENCES Album(AlbumId), MediaTypeId INTEGER REFERENCES MediaType(MediaTypeId),
+    GenreId INTEGER REFERENCES Genre(GenreId), Composer NVARCHAR(220), Milliseconds INTEGER,
+    Bytes INTEGER, UnitPrice NUMERIC(10,2));
+CREATE TABLE Playlist (PlaylistId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+CREATE TABLE PlaylistTrack (PlaylistId INTEGER REFERENCES Playlist(PlaylistId),
+    TrackId INTEGER REFERENCES Track(TrackId), PRIMARY KEY (PlaylistId, TrackId));
+CREATE TABLE Employee (EmployeeId INTEGER PRIMARY KEY, LastName NVARCHAR(20), FirstName NVARCHAR(20),
+    Title NVARCHAR(30), ReportsTo INTEGER REFERENCES Employee(EmployeeId), City NVARCHAR(40));
+CREATE TABLE Customer (CustomerId INTEGER PRIMARY KEY, FirstName NVARCHAR(40), LastName NVARCHAR(20),
+    Country NVARCHAR(40), Email NVARCHAR(60), SupportRepId INTEGER REFERENCES Employee(EmployeeId));
+CREATE TABLE Invoice (InvoiceId INTEGER PRIMARY KEY, CustomerId INTEGER REFERENCES Customer(CustomerId),
+    InvoiceDate DATETIME, BillingCountry NVARCHAR(40), Total NUMERIC(10,2));
+CREATE TABLE InvoiceLine (InvoiceLineId INTEGER PRIMARY KEY, InvoiceId INTEGER REFERENCES Invoice(InvoiceId),
+    TrackId INTEGER REFERENCES Track(TrackId), UnitPrice NUMERIC(10,2), Quantity INTEGER);
+"""
+
+
+def build_database(path: Path, tracks: int) -> None:
+    rng = random.Random(0)
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    genres = ["Rock", "Jazz", "Metal", "Alternative & Punk", "Blues", "Latin", "Classical", "Sci Fi & Fantasy"]
+    db.executemany("INSERT INTO Genre VALUES (?, ?)", enumerate(genres, 1))
+    db.executemany("INSERT INTO MediaType VALUES (?, ?)", [(1, "MPEG audio file"), (2, "AAC audio file")])
+    db.executemany("INSERT INTO Artist VALUES (?, ?)", [(i, f"Artist {i}") for i in range(1, 276)])
+    db.executemany("INSERT INTO Album VALUES (?, ?, ?)", [(i, f"Album {i}", rng.randint(1, 275)) for i in range(1, 348)])
+    db.executemany(
+        "INSERT INTO Track VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, f"Track {i}", rng.randint(1, 347), rng.randint(1, 2), g, None, rng.randint(60_000, 60_000 * g), 0, 0.99)
+            for i in range(1, tracks + 1)
+            for g in [rng.randint(1, len(genres))]
+        ),
+    )
+    db.commit()
+    db.close()
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Plays back one tool call per model call, then answers; the query checker echoes."""
+
+    turns: list[tuple[str, dict]]
+    latency: float = 0.3
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        turn = sum(isinstance(m, ToolMessage) for m in messages)
+        if turn < len(self.turns):
+            name, args = self.turns[turn]
+            message = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{turn}"}])
+        else:
+            message = AIMessage(content=f"The answer is in: {messages[-1].text[:60]}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def toolkit_tools(path: Path, checker: BaseChatModel) -> list:
+    """The four ``SQLDatabaseToolkit`` tools, on a plain connection, without caching."""
+    db = connect_read_only(path)
+
+    @tool("sql_db_list_tables")
+    def list_tables(tool_input: str = "") -> str:
+        """List the tables in the database."""
+        return ", ".join(r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+    @tool("sql_db_schema")
+    def schema(table_names: str) -> str:
+        """Schema and sample rows for the given tables."""
+        parts = []
+        for name in (n.strip() for n in table_names.split(",")):
+            parts.append(db.execute("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).fetchone()[0])
+            parts.append(str(db.execute(f"SELECT * FROM {name} LIMIT 3").fetchall()))
+        return "\n\n".join(parts)
+
+    @tool("sql_db_query_checker")
+    def query_checker(query: str) -> str:
+        """Double check the query with the model before executing it."""
+        return checker.invoke(f"Double check this SQLite query for mistakes:\n{query}").text
+
+    @tool("sql_db_query")
+    def query(query: str) -> str:
+        """Execute a SQL query."""
+        return str(db.execute(query).fetchall())
+
+    return [list_tables, schema, query_checker, query]
+
+
+def run(agent, questions: int) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    tool_calls = model_calls = 0
+    for _ in range(questions):
+        messages = agent.invoke({"messages": [{"role": "user", "content": QUESTION}]})["messages"]
+        tool_calls += sum(isinstance(m, ToolMessage) for m in messages)
+        model_calls += sum(isinstance(m, AIMessage) for m in messages)
+    return (time.perf_counter() - start) / questions, model_calls, tool_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=200_000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        build_database(path, args.tracks)
+
+        checker = ScriptedChatModel(turns=[], latency=args.latency)
+        toolkit_model = ScriptedChatModel(
+            turns=[
+                ("sql_db_list_tables", {"tool_input": ""}),
+                ("sql_db_schema", {"table_names": "Genre, Track"}),
+                ("sql_db_query_checker", {"query": QUERY}),
+                ("sql_db_query", {"query": QUERY}),
+            ],
+            latency=args.latency,
+        )
+        toolkit = create_agent(toolkit_model, toolkit_tools(path, checker))
+
+        catalog = SchemaCatalog(path, cache_dir=Path(tmp) / "sql")
+        cache = QueryCache(path)
+        cached_model = ScriptedChatModel(turns=[("sql_db_query", {"query": QUERY})], latency=args.latency)
+        cached = create_agent(cached_model, sql_tools(catalog, cache), middleware=[SchemaContext(catalog)])
+
+        print(f"relevant tables: {catalog.relevant(QUESTION)}")
+        # +1 model call per toolkit question for the query checker's own LLM call
+        for name, agent, extra in (("toolkit", toolkit, 1), ("cached", cached, 0)):
+            seconds, model_calls, tool_calls = run(agent, args.questions)
+            print(
+                f"{name:<8} {seconds * 1000:8.0f} ms/question  "
+                f"model calls {model_calls / args.questions + extra:4.1f}  tool calls {tool_calls / args.questions:4.1f}"
+            )
+        print(f"query cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
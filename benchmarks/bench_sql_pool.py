@@ -0,0 +1,88 @@
+"""
+SQL Pool Benchmark
+
+Runs an aggregate query from ``--sessions`` concurrent threads against a
+synthetic Chinook-shaped database (``--tracks`` rows), once on a single
+shared connection behind a lock (the old one-connection backend) and once on
+a ``ReadOnlySQLitePool`` of ``--pool-size`` connections. It then renders an
+unbounded ``SELECT * FROM Track`` with ``fetchall()`` + ``str()`` and with the
+pool's row/byte budget, comparing time, peak Python memory and output size.
+
+    python benchmarks/bench_sql_pool.py --tracks 500000 --sessions 8 --pool-size 8
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_sql_agent import build_database  # noqa: E402
+from sql_pool import ReadOnlySQLitePool, connect_read_only  # noqa: E402
+
+AGGREGATE = (
+    "SELECT g.Name, AVG(t.Milliseconds) FROM Track t JOIN Genre g ON t.GenreId = g.GenreId "
+    "GROUP BY g.GenreId ORDER BY 2 DESC"
+)
+
+
+def throughput(run, sessions: int, queries: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as executor:
+        list(executor.map(lambda _: run(AGGREGATE), range(queries)))
+    return queries / (time.perf_counter() - start)
+
+
+def measure(render) -> tuple[float, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = render()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 2**20, len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=500_000)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        build_database(path, args.tracks)
+
+        shared = connect_read_only(path)
+        lock = threading.Lock()
+
+        def single(sql):
+            with lock:
+                return shared.execute(sql).fetchall()
+
+        pool = ReadOnlySQLitePool(path, size=args.pool_size, max_rows=200, max_bytes=16_000)
+        pool.execute("SELECT 1")
+        print(f"{'single connection':<20} {throughput(single, args.sessions, args.queries):7.1f} queries/s")
+        pooled = throughput(pool.execute, args.sessions, args.queries)
+        print(f"{f'pool of {args.pool_size}':<20} {pooled:7.1f} queries/s")
+
+        for name, render in (
+            ("fetchall + str", lambda: str(shared.execute("SELECT * FROM Track").fetchall())),
+            ("budgeted stream", lambda: pool.execute("SELECT * FROM Track").format()),
+        ):
+            seconds, peak_mb, chars = measure(render)
+            print(f"{name:<16} {seconds * 1000:8.1f} ms  peak {peak_mb:7.1f} MB  output {chars:>10,} chars")
+        print(f"pool stats: {pool.stats()}")
+        shared.close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
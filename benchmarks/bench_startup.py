@@ -0,0 +1,88 @@
+"""
+Startup Benchmark
+
+Measures import-to-ready time of the agent scripts, each in a fresh
+interpreter: the seconds to ``import`` the module (which now builds nothing),
+to open its persisted vector index (``rag``/``custom_rag``, skipped when no
+index has been saved yet), and to build its compiled graph through the
+registry. Components that cannot be built here (missing API key or provider
+package) are reported with the error instead of a time.
+
+    python benchmarks/bench_startup.py --repeat 3
+    python benchmarks/bench_startup.py --only rag supervisor
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from registry import registry  # noqa: E402
+
+# registry name -> (module, lazy vector store attribute, index path attribute)
+INDEXES = {
+    "rag": ("rag_agent", "vector_store", "INDEX_PATH"),
+    "custom_rag": ("custom_rag_agent", "vectorstore", "INDEX_PATH"),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+result = {}
+name, module_name = sys.argv[1], sys.argv[2]
+try:
+    import importlib
+    module = importlib.import_module(module_name)
+    result["import"] = time.perf_counter() - start
+    if len(sys.argv) > 3:
+        from vector_store import MmapVectorStore
+        store, path = sys.argv[3], sys.argv[4]
+        if MmapVectorStore.exists(getattr(module, path)):
+            t = time.perf_counter()
+            getattr(module, store).get()
+            result["index"] = time.perf_counter() - t
+    from registry import registry
+    t = time.perf_counter()
+    registry.get(name)
+    result["graph"] = time.perf_counter() - t
+    result["ready"] = time.perf_counter() - start
+except Exception as exc:
+    result["error"] = f"{type(exc).__name__}: {exc}"[:120]
+print(json.dumps(result))
+"""
+
+
+def probe(name: str, module: str) -> dict:
+    args = [sys.executable, "-c", PROBE, name, module]
+    if name in INDEXES:
+        args += INDEXES[name][1:]
+    out = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, timeout=600)
+    lines = out.stdout.strip().splitlines()
+    return json.loads(lines[-1]) if lines else {"error": out.stderr.strip().splitlines()[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", default=None, help="registry names to measure")
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, "-c", "import langchain.agents, langgraph.prebuilt"], cwd=ROOT)
+    print(f"{'graph':<12} {'import':>9} {'index':>9} {'graph':>9} {'ready':>9}")
+    for name in args.only or registry.names():
+        module = registry._targets[name].partition(":")[0]
+        runs = [probe(name, module) for _ in range(args.repeat)]
+        cells = []
+        for key in ("import", "index", "graph", "ready"):
+            values = [run[key] for run in runs if key in run]
+            cells.append(f"{statistics.median(values):8.3f}s" if values else f"{'-':>9}")
+        error = next((run["error"] for run in runs if "error" in run), "")
+        print(f"{name:<12} {' '.join(cells)}  {error}")
+
+
+if __name__ == "__main__":
+    main()
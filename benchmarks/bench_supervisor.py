@@ -0,0 +1,140 @@
+"""
+Supervisor Fan-Out Benchmark
+
+Runs the supervisor pattern from ``supervisor_agent.py`` (calendar and email
+sub-agents behind human-in-the-loop approval) with a scripted chat model that
+sleeps ``--latency`` seconds per call, so no API key is needed. A request
+with ``--actions`` independent actions is handled either one tool call per
+supervisor turn (``sequential``, the old prompt) or with all calls in one turn
+(``parallel``), through ``invoke`` and ``ainvoke``. Every interrupt is
+approved; the time covers the first run plus the resume.
+
+    python benchmarks/bench_supervisor.py --actions 2 4 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from langchain.agents import create_agent
+from langchain.agents.middleware import HumanInTheLoopMiddleware
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from subagents import subagent_tool  # noqa: E402
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Plays back ``turns`` of tool calls (one list per model call), then answers."""
+
+    turns: list[list[tuple[str, dict]]]
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> ChatResult:
+        turn = sum(isinstance(m, AIMessage) for m in messages)
+        if turn < len(self.turns):
+            calls = [
+                {"name": name, "args": args, "id": f"call_{turn}_{i}"}
+                for i, (name, args) in enumerate(self.turns[turn])
+            ]
+            message = AIMessage(content="", tool_calls=calls)
+        else:
+            message = AIMessage(content="Done.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+@tool
+def create_calendar_event(title: str) -> str:
+    """Create a calendar event."""
+    return f"Event created: {title}"
+
+
+@tool
+def send_email(to: str) -> str:
+    """Send an email."""
+    return f"Email sent to {to}"
+
+
+def build_supervisor(actions: int, parallel: bool, latency: float):
+    def subagent(tool_, prefix):
+        model = ScriptedChatModel(turns=[[(tool_.name, {list(tool_.args)[0]: "x"})]], latency=latency)
+        middleware = [HumanInTheLoopMiddleware(interrupt_on={tool_.name: True}, description_prefix=prefix)]
+        return create_agent(model, tools=[tool_], middleware=middleware)
+
+    tools = [
+        subagent_tool(subagent(create_calendar_event, "Calendar event"), "schedule_event", "Schedule events."),
+        subagent_tool(subagent(send_email, "Outbound email"), "manage_email", "Send emails."),
+    ]
+    calls = [(tools[i % 2].name, {"request": f"action {i}"}) for i in range(actions)]
+    turns = [calls] if parallel else [[call] for call in calls]
+    model = ScriptedChatModel(turns=turns, latency=latency)
+    return create_agent(model, tools=tools, checkpointer=InMemorySaver())
+
+
+def approve_all(interrupts) -> Command:
+    return Command(
+        resume={
+            i.id: {"decisions": [{"type": "approve"} for _ in i.value["action_requests"]]}
+            for i in interrupts
+        }
+    )
+
+
+def run_sync(supervisor, thread_id: str) -> float:
+    config = {"configurable": {"thread_id": thread_id}}
+    start = time.perf_counter()
+    result = supervisor.invoke({"messages": [{"role": "user", "content": "do everything"}]}, config)
+    while result.get("__interrupt__"):
+        result = supervisor.invoke(approve_all(result["__interrupt__"]), config)
+    return time.perf_counter() - start
+
+
+async def run_async(supervisor, thread_id: str) -> float:
+    config = {"configurable": {"thread_id": thread_id}}
+    start = time.perf_counter()
+    result = await supervisor.ainvoke({"messages": [{"role": "user", "content": "do everything"}]}, config)
+    while result.get("__interrupt__"):
+        result = await supervisor.ainvoke(approve_all(result["__interrupt__"]), config)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--actions", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{'actions':>8} {'mode':>11} {'invoke s':>9} {'ainvoke s':>10}")
+    for actions in args.actions:
+        for parallel in (False, True):
+            supervisor = build_supervisor(actions, parallel, args.latency)
+            mode = "parallel" if parallel else "sequential"
+            sync_seconds = run_sync(supervisor, f"sync-{actions}-{mode}")
+            async_seconds = asyncio.run(run_async(supervisor, f"async-{actions}-{mode}"))
+            print(f"{actions:>8} {mode:>11} {sync_seconds:9.2f} {async_seconds:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
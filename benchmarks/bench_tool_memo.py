@@ -0,0 +1,102 @@
+"""
+Tool Fast Path Benchmark
+
+Asks the quickstart weather agent ``--requests`` questions from ``--users``
+users, with a scripted model that sleeps ``--latency`` seconds per call and
+asks for the user's location, then its weather, before answering. The plain
+agent is compared with the same agent plus ``ToolMemo`` and
+``SpeculativeToolCalls``, reporting model calls per request, latency, and the
+model steps saved.
+
+    python benchmarks/bench_tool_memo.py --requests 20 --latency 0.3
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from quickstart import Context, likely_tool_calls, tools  # noqa: E402
+from tool_memo import SpeculativeToolCalls, ToolMemo  # noqa: E402
+
+QUESTIONS = [
+    "what's the weather like?",
+    "do I need an umbrella today?",
+    "is it going to be hot this afternoon?",
+    "what is the weather in yogyakarta indonesia?",
+]
+
+
+class ScriptedWeatherModel(BaseChatModel):
+    """Asks for the location, then the weather, then answers; each call sleeps ``latency``."""
+
+    latency: float = 0.3
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-weather"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        turn = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        results = {m.name: m.text for m in messages[turn:] if isinstance(m, ToolMessage)}
+        if "get_user_location" not in results:
+            call = {"name": "get_user_location", "args": {}, "id": f"call_{self.calls}"}
+        elif "get_weather_for_location" not in results:
+            call = {
+                "name": "get_weather_for_location",
+                "args": {"city": results["get_user_location"]},
+                "id": f"call_{self.calls}",
+            }
+        else:
+            message = AIMessage(content=results["get_weather_for_location"])
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[call]))])
+
+
+def run(middleware: list, requests: int, users: int, latency: float) -> tuple[float, int]:
+    model = ScriptedWeatherModel(latency=latency)
+    agent = create_agent(model, tools=tools, middleware=middleware, context_schema=Context)
+    questions = itertools.cycle(QUESTIONS)
+    start = time.perf_counter()
+    for i in range(requests):
+        agent.invoke(
+            {"messages": [{"role": "user", "content": next(questions)}]},
+            context=Context(user_id=str(i % users)),
+        )
+    return time.perf_counter() - start, model.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    memo = ToolMemo({"get_user_location": 3600, "get_weather_for_location": 600})
+    speculate = SpeculativeToolCalls(tools, likely_tool_calls, memo=memo)
+    for name, middleware in (("plain agent", []), ("memo + speculation", [memo, speculate])):
+        seconds, calls = run(middleware, args.requests, args.users, args.latency)
+        print(
+            f"{name:<20} {calls / args.requests:4.2f} model calls/request"
+            f"  {seconds / args.requests * 1000:7.1f} ms/request"
+        )
+    print(f"speculation: {speculate.stats()}")
+    print(f"memo: {memo.stats()}")
+
+
+if __name__ == "__main__":
+    main()
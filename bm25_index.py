@@ -0,0 +1,255 @@
+"""
+BM25 Keyword Index and Hybrid Retrieval
+
+Inverted index kept next to ``MmapVectorStore``'s vector matrix: postings are
+``(term, row, tf)`` triples buffered per ``add`` and merged and sorted into
+CSR lists on the next search, so a query
+touches only the postings of its own terms. Number-bearing phrases such as
+"pasal 4" or "bab 3" are indexed as extra bigram terms, which makes exact
+article/chapter lookups precise.
+
+``HybridRetriever`` fuses the keyword and vector result lists with reciprocal
+rank fusion, and answers keyword-style queries (article numbers, quoted
+phrases) from the index alone, without calling the embedding API.
+
+    vector_store = MmapVectorStore(embeddings, bm25=BM25Index())
+    vector_store.add_documents(all_splits)     # indexes keywords as well
+    retriever = HybridRetriever(vectorstore=vector_store, k=4)
+    retriever.invoke("Apa isi bab 3 pasal 4?")  # BM25 only
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from vector_store import MmapVectorStore, top_k
+
+_WORD = re.compile(r"\w+")
+_QUOTED = re.compile(r"\"[^\"]+\"|'[^']+'")
+_ROMAN = re.compile(r"^x{0,3}(ix|iv|v?i{0,3})$")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10}
+# Words that number a part of a legal or structured text ("Pasal 4 ayat 2", "Section 3").
+_STRUCTURAL = frozenset(
+    "pasal bab ayat huruf bagian paragraf article chapter section clause paragraph part".split()
+)
+
+
+def _number(word: str) -> str | None:
+    """``"4"`` -> ``"4"``, ``"iii"`` -> ``"3"`` (chapters are "BAB III"); else ``None``."""
+    if word.isdigit():
+        return str(int(word))
+    if not word or not _ROMAN.match(word):
+        return None
+    values = [_ROMAN_VALUES[c] for c in word]
+    return str(sum(-v if v < nxt else v for v, nxt in zip(values, values[1:] + [0])))
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased words plus ``"word number"`` bigrams (``"pasal 4"``, ``"bab 3"``).
+
+    Roman numerals only count after a structural marker: "bab iii" is chapter
+    3, but in "model v" or "figure i" they are ordinary words.
+    """
+    words = _WORD.findall(text.lower())
+    bigrams = []
+    for a, b in zip(words, words[1:]):
+        number = _number(b) if b.isdigit() or a in _STRUCTURAL else None
+        if number is not None and _number(a) is None:
+            bigrams.append(f"{a} {number}")
+    return words + bigrams
+
+
+def is_keyword_query(query: str) -> bool:
+    """Exact lookups (a numbered article/chapter or a quoted phrase) that BM25 answers best.
+
+    Only structural markers count: "pasal 4" or "chapter III" is a lookup,
+    "revenue in 2023" or "top 5 agents" is an ordinary question.
+    """
+    words = _WORD.findall(query.lower())
+    numbered = any(a in _STRUCTURAL and _number(b) is not None for a, b in zip(words, words[1:]))
+    return numbered or bool(_QUOTED.search(query))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Fuse ranked id lists: each id scores ``sum(1 / (k + rank))``, best first."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, start=1):
+            scores[id_] = scores.get(id_, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 over the rows of a vector store."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: dict[str, int] = {}
+        self.doc_len = np.zeros(0, dtype=np.float32)  # 0 for deleted / empty rows
+        self._terms = np.zeros(0, dtype=np.int32)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.float32)
+        # (terms, rows, tfs) of each ``add`` since the last merge.
+        self._pending: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._lists = None
+
+    def __len__(self) -> int:
+        return int((self.doc_len > 0).sum())
+
+    def add(self, texts: Sequence[str], start: int) -> None:
+        """Index ``texts`` as rows ``start, start + 1, ...``."""
+        terms, rows, tfs = [], [], []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                terms.append(self.vocab.setdefault(term, len(self.vocab)))
+                rows.append(start + i)
+                tfs.append(tf)
+        end = start + len(texts)
+        if end > len(self.doc_len):
+            # Rows past the last add stay at length 0, i.e. empty.
+            doc_len = np.zeros(max(end, 2 * len(self.doc_len), 256), dtype=np.float32)
+            doc_len[: len(self.doc_len)] = self.doc_len
+            self.doc_len = doc_len
+        self.doc_len[start:end] = lengths
+        self._pending.append(
+            (
+                np.asarray(terms, dtype=np.int32),
+                np.asarray(rows, dtype=np.int32),
+                np.asarray(tfs, dtype=np.float32),
+            )
+        )
+        self._lists = None
+
+    def _merge(self) -> None:
+        """Append the buffered postings to the flat arrays in one copy."""
+        if not self._pending:
+            return
+        terms, rows, tfs = zip(*self._pending)
+        self._terms = np.concatenate([self._terms, *terms])
+        self._rows = np.concatenate([self._rows, *rows])
+        self._tfs = np.concatenate([self._tfs, *tfs])
+        self._pending = []
+
+    def remove(self, rows) -> None:
+        self.doc_len[np.asarray(rows, dtype=np.int64)] = 0
+        self._lists = None
+
+    def compact(self, rows: np.ndarray) -> None:
+        """Keep only ``rows`` (in order), matching a compacted vector matrix."""
+        self._merge()
+        rows = np.asarray(rows, dtype=np.int64)
+        remap = np.full(len(self.doc_len), -1, dtype=np.int64)
+        remap[rows] = np.arange(len(rows))
+        keep = remap[self._rows] >= 0
+        self._terms = self._terms[keep]
+        self._rows = remap[self._rows[keep]].astype(np.int32)
+        self._tfs = self._tfs[keep]
+        self.doc_len = self.doc_len[rows]
+        self._lists = None
+
+    def _inverted_lists(self):
+        """CSR postings of live rows: ``offsets``, ``rows``, ``tfs``, plus ``avgdl``."""
+        if self._lists is None:
+            self._merge()
+            live = self.doc_len[self._rows] > 0
+            terms, rows, tfs = self._terms[live], self._rows[live], self._tfs[live]
+            order = np.argsort(terms, kind="stable")
+            counts = np.bincount(terms, minlength=len(self.vocab))
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            alive = self.doc_len > 0
+            avgdl = float(self.doc_len[alive].mean()) if alive.any() else 1.0
+            self._lists = (offsets, rows[order], tfs[order], avgdl)
+        return self._lists
+
+    def search(self, query: str, k: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """Top ``k`` rows by BM25 score (only rows matching a query term)."""
+        offsets, rows, tfs, avgdl = self._inverted_lists()
+        n = len(self)
+        hits, weights = [], []
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            lo, hi = offsets[term_id], offsets[term_id + 1]
+            if lo == hi:
+                continue
+            df = hi - lo
+            idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            posting_rows, tf = rows[lo:hi], tfs[lo:hi]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[posting_rows] / avgdl)
+            hits.append(posting_rows)
+            weights.append(idf * tf * (self.k1 + 1) / (tf + norm))
+        if not hits:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # Sum the term scores over the matched rows only, not over the whole corpus.
+        matched, inverse = np.unique(np.concatenate(hits), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.float32)
+        best = top_k(scores, k)
+        return matched[best].astype(np.int64), scores[best]
+
+    def save(self, path: str | os.PathLike) -> None:
+        self._merge()
+        vocab = np.array(sorted(self.vocab, key=self.vocab.get), dtype=str)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                params=np.array(json.dumps({"k1": self.k1, "b": self.b})),
+                vocab=vocab,
+                doc_len=self.doc_len,
+                terms=self._terms,
+                rows=self._rows,
+                tfs=self._tfs,
+            )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "BM25Index":
+        with np.load(Path(path)) as data:
+            index = cls(**json.loads(str(data["params"])))
+            index.vocab = {str(term): i for i, term in enumerate(data["vocab"])}
+            index.doc_len = data["doc_len"]
+            index._terms = data["terms"]
+            index._rows = data["rows"]
+            index._tfs = data["tfs"]
+        return index
+
+
+class HybridRetriever(BaseRetriever):
+    """BM25 + vector retrieval fused with reciprocal rank fusion.
+
+    Keyword-style queries (see :func:`is_keyword_query`) are answered from the
+    BM25 index alone unless ``always_fuse`` is set.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: MmapVectorStore
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    always_fuse: bool = False
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        keyword = self.vectorstore.keyword_search_with_score(query, k=self.fetch_k)
+        if keyword and is_keyword_query(query) and not self.always_fuse:
+            return [doc for doc, _ in keyword[: self.k]]
+        dense = self.vectorstore.similarity_search_with_score(query, k=self.fetch_k)
+        by_id = {doc.id: doc for doc, _ in dense + keyword}
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc, _ in keyword], [doc.id for doc, _ in dense]], k=self.rrf_k
+        )
+        return [by_id[id_] for id_, _ in fused[: self.k]]
@@ -0,0 +1,133 @@
+"""
+Per-Chunk Relevance Grading
+
+Grades retrieved chunks one by one instead of asking the grader about the
+whole concatenated context. Chunks are graded concurrently on a shared thread
+pool, highest-ranked first. Once the first ``min_relevant`` relevant chunks in
+retrieval order are known (every chunk ranked above them has been graded), the
+result is returned without waiting for the rest, so the answer does not depend
+on which grader call happened to finish first. Only the relevant chunks (in
+retrieval order) are handed on, so the answer prompt gets less, better context.
+
+    result = grade_chunks(docs, lambda doc: grade(question, doc), min_relevant=2)
+    result.relevant  # -> list[Document]
+    grading_stats.record(result)  # totals for a GradingStats() kept by the app
+"""
+
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+
+@dataclass
+class GradingResult:
+    relevant: list[Document] = field(default_factory=list)
+    graded: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+
+class GradingStats:
+    """Running totals over ``grade_chunks`` results; ``stats()`` reports them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = self.graded = self.skipped = self.relevant = 0
+        self.seconds = 0.0
+
+    def record(self, result: GradingResult) -> GradingResult:
+        with self._lock:
+            self.calls += 1
+            self.graded += result.graded
+            self.skipped += result.skipped
+            self.relevant += len(result.relevant)
+            self.seconds += result.seconds
+        return result
+
+    def stats(self) -> dict:
+        chunks = self.graded + self.skipped
+        return {
+            "calls": self.calls,
+            "chunks": chunks,
+            "graded": self.graded,
+            "skipped": self.skipped,
+            "relevant": self.relevant,
+            "relevant_rate": self.relevant / self.graded if self.graded else 0.0,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+_POOL_SIZE = 32
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool() -> ThreadPoolExecutor:
+    """One grading pool per process, so threads are reused instead of left behind per call."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_POOL_SIZE, thread_name_prefix="chunk-grading")
+        return _pool
+
+
+def grade_chunks(
+    documents: Sequence[Document],
+    is_relevant: Callable[[Document], bool],
+    min_relevant: int | None = None,
+    max_workers: int = 8,
+) -> GradingResult:
+    """Run ``is_relevant`` over ``documents`` concurrently, highest-ranked first.
+
+    Args:
+        min_relevant: return the first this many relevant chunks in rank order,
+            as soon as every chunk ranked above them is graded; ``None`` grades
+            every chunk.
+        max_workers: grader calls in flight at once (at most 32).
+    """
+    result = GradingResult()
+    started = time.perf_counter()
+    if not documents:
+        return result
+    pool = _shared_pool()
+    verdicts: list[bool | None] = [None] * len(documents)
+    pending = {}
+    next_index = 0
+    while True:
+        while next_index < len(documents) and len(pending) < max_workers:
+            pending[pool.submit(is_relevant, documents[next_index])] = next_index
+            next_index += 1
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            verdicts[pending.pop(future)] = future.result()
+            result.graded += 1
+        if min_relevant is not None and _ranked_relevant(verdicts, min_relevant) is not None:
+            break
+    # Calls still running after an early stop finish on the shared pool; their
+    # verdicts are not needed, and chunks never submitted are skipped.
+    result.skipped = len(documents) - result.graded
+    relevant = [i for i, verdict in enumerate(verdicts) if verdict]
+    if min_relevant is not None:
+        relevant = _ranked_relevant(verdicts, min_relevant) or relevant
+    result.relevant = [documents[i] for i in relevant]
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _ranked_relevant(verdicts: list[bool | None], min_relevant: int) -> list[int] | None:
+    """Indices of the first ``min_relevant`` relevant chunks, once every chunk above them is graded."""
+    found = []
+    for i, verdict in enumerate(verdicts):
+        if verdict is None:
+            return None
+        if verdict:
+            found.append(i)
+            if len(found) == min_relevant:
+                return found
+    return None
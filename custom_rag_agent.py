@@ -1,11 +1,14 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.document_loaders import WebBaseLoader
 from langgraph.graph import MessagesState
-from langchain.chat_models import init_chat_model
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.vectorstores import InMemoryVectorStore
 from langchain_core.tools import create_retriever_tool
 from langchain_core.messages import convert_to_messages
+from ingest import load_web_documents
+from vector_store import MmapVectorStore
+from incremental_index import IncrementalIndexer
+from llm_cache import ResponseCache, template_fields
+from chunk_grading import GradingStats, grade_chunks
+from rerank import RerankingRetriever
+from registry import lazy
+from resource_pool import pool
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -15,34 +18,62 @@ urls = [
     "https://lilianweng.github.io/posts/2024-04-12-diffusion-video/",
 ]
 
-docs = [WebBaseLoader(url).load() for url in urls]
-docs[0][0].page_content.strip()[:1000]
+# Components are built on first use. A persisted index is opened as is; the
+# posts are only fetched and indexed when it does not exist yet, or by
+# refresh_index().
+INDEX_PATH = ".cache/indexes/lilianweng-blog"
 
-docs_list = [item for sublist in docs for item in sublist]
+def refresh_index(store: MmapVectorStore):
+    """Re-fetch the blog posts and re-embed whatever changed."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-    chunk_size=100, chunk_overlap=50
-)
-doc_splits = text_splitter.split_documents(docs_list)
-
-doc_splits[0].page_content.strip()
-
-vectorstore = InMemoryVectorStore.from_documents(
-    documents=doc_splits, embedding=HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=100, chunk_overlap=50
+    )
+    return IncrementalIndexer(store, text_splitter).update(load_web_documents(urls))
+
+@lazy
+def vectorstore():
+    exists = MmapVectorStore.exists(INDEX_PATH)
+    store = MmapVectorStore.open(INDEX_PATH, pool.embeddings("sentence-transformers/all-MiniLM-L6-v2"))
+    if not exists:
+        print(f"Index update: {refresh_index(store)}")
+    return store
+
+@lazy
+def retriever_tool():
+    retriever = RerankingRetriever(
+        vectorstore=vectorstore.get(), reranker=pool.reranker(), fetch_k=20, k=4
+    )
+    return create_retriever_tool(
+        retriever,
+        "retrieve_blog_posts",
+        "Search and return information about Lilian Weng blog posts.",
+        response_format="content_and_artifact",
     )
-)
-retriever = vectorstore.as_retriever()
-
-retriever_tool = create_retriever_tool(
-    retriever,
-    "retrieve_blog_posts",
-    "Search and return information about Lilian Weng blog posts.",
-)
 
-retriever_tool.invoke({"query": "types of reward hacking"})
+# One Gemini client (and connection pool) for the whole process: the cached
+# variant below is a copy that shares it.
+@lazy
+def response_model():
+    return pool.chat_model("gemini-2.5-flash", model_provider="google_genai")
+
+# Grader, rewriter and answer prompts are deterministic: serve repeats from
+# disk instead of re-calling Gemini. Near-repeats (via the semantic tier) are
+# matched on the question and context filled into the rewrite/answer
+# templates, never on the shared template text; grader prompts differ only in
+# the chunk they quote, so they are matched exactly.
+@lazy
+def llm_cache():
+    return ResponseCache(
+        ".cache/llm",
+        embeddings=vectorstore.embeddings,
+        semantic_text=template_fields({"rewrite": REWRITE_PROMPT, "answer": GENERATE_PROMPT}),
+    )
 
-response_model = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
+@lazy
+def cached_model():
+    return pool.chat_model("gemini-2.5-flash", model_provider="google_genai", cache=llm_cache.get())
 
 def generate_query_or_respond(state: MessagesState):
     """Call the model to generate a response based on the current state. Given
@@ -50,12 +81,13 @@ def generate_query_or_respond(state: MessagesState):
     """
     response = (
         response_model
-        .bind_tools([retriever_tool]).invoke(state["messages"])  
+        .bind_tools([retriever_tool.get()]).invoke(state["messages"])  
     )
     return {"messages": [response]}
 
 from pydantic import BaseModel, Field
 from typing import Literal
+from langchain_core.documents import Document
 
 GRADE_PROMPT = (
     "You are a grader assessing relevance of a retrieved document to a user question. \n "
@@ -72,25 +104,37 @@ class GradeDocuments(BaseModel):
         description="Relevance score: 'yes' if relevant, or 'no' if not relevant"
     )
 
-grader_model = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
+# Grade each retrieved chunk on its own, in parallel, and keep only the
+# relevant ones for generate_answer.
+MIN_RELEVANT_CHUNKS = 2
+grading_stats = GradingStats()
 
-def grade_documents(
-    state: MessagesState,
-) -> Literal["generate_answer", "rewrite_question"]:
-    """Determine whether the retrieved documents are relevant to the question."""
+def grade_documents(state: MessagesState):
+    """Keep only the retrieved chunks that are relevant to the question."""
     question = state["messages"][0].content
-    context = state["messages"][-1].content
-
-    prompt = GRADE_PROMPT.format(question=question, context=context)
-    response = (
-        grader_model
-        .with_structured_output(GradeDocuments).invoke(  
-            [{"role": "user", "content": prompt}]
-        )
+    tool_message = state["messages"][-1]
+    chunks = tool_message.artifact or [Document(page_content=tool_message.content)]
+    grader = cached_model.with_structured_output(GradeDocuments)
+
+    def is_relevant(chunk: Document) -> bool:
+        prompt = GRADE_PROMPT.format(question=question, context=chunk.page_content)
+        return grader.invoke([{"role": "user", "content": prompt}]).binary_score == "yes"
+
+    result = grading_stats.record(grade_chunks(chunks, is_relevant, min_relevant=MIN_RELEVANT_CHUNKS))
+    # Same id: replaces the tool message, so generate_answer only sees relevant chunks.
+    filtered = tool_message.model_copy(
+        update={
+            "content": "\n\n".join(doc.page_content for doc in result.relevant),
+            "artifact": result.relevant,
+        }
     )
-    score = response.binary_score
+    return {"messages": [filtered]}
 
-    if score == "yes":
+def route_after_grading(
+    state: MessagesState,
+) -> Literal["generate_answer", "rewrite_question"]:
+    """Answer when any relevant chunk survived grading, otherwise rewrite."""
+    if state["messages"][-1].artifact:
         return "generate_answer"
     else:
         return "rewrite_question"
@@ -109,7 +153,7 @@ def rewrite_question(state: MessagesState):
     messages = state["messages"]
     question = messages[0].content
     prompt = REWRITE_PROMPT.format(question=question)
-    response = response_model.invoke([{"role": "user", "content": prompt}])
+    response = cached_model.invoke([{"role": "user", "content": prompt}])
     return {"messages": [{"role": "user", "content": response.content}]}
 
 GENERATE_PROMPT = (
@@ -126,89 +170,101 @@ def generate_answer(state: MessagesState):
     question = state["messages"][0].content
     context = state["messages"][-1].content
     prompt = GENERATE_PROMPT.format(question=question, context=context)
-    response = response_model.invoke([{"role": "user", "content": prompt}])
+    response = cached_model.invoke([{"role": "user", "content": prompt}])
     return {"messages": [response]}
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
 
-workflow = StateGraph(MessagesState)
-
-workflow.add_node(generate_query_or_respond)
-workflow.add_node("retrieve", ToolNode([retriever_tool]))
-workflow.add_node(rewrite_question)
-workflow.add_node(generate_answer)
-workflow.add_edge(START, "generate_query_or_respond")
-
-workflow.add_conditional_edges(
-    "generate_query_or_respond",
-    tools_condition,
-    {
-        "tools": "retrieve",
-        END: END,
-    },
-)
+@lazy
+def graph():
+    workflow = StateGraph(MessagesState)
+
+    workflow.add_node(generate_query_or_respond)
+    workflow.add_node("retrieve", ToolNode([retriever_tool.get()]))
+    workflow.add_node(grade_documents)
+    workflow.add_node(rewrite_question)
+    workflow.add_node(generate_answer)
+    workflow.add_edge(START, "generate_query_or_respond")
+
+    workflow.add_conditional_edges(
+        "generate_query_or_respond",
+        tools_condition,
+        {
+            "tools": "retrieve",
+            END: END,
+        },
+    )
 
-workflow.add_conditional_edges(
-    "retrieve",
-    grade_documents,
-)
-workflow.add_edge("generate_answer", END)
-workflow.add_edge("rewrite_question", "generate_query_or_respond")
-
-graph = workflow.compile()
-
-from IPython.display import Image, display
-
-display(Image(graph.get_graph().draw_mermaid_png()))
-
-for chunk in graph.stream(
-    {
-        "messages": [
-            {
-                "role": "user",
-                "content": "What does Lilian Weng say about types of reward hacking?",
-            }
-        ]
-    }
-):
-    for node, update in chunk.items():
-        print("Update from node", node)
-        if "messages" in update:
-            messages = convert_to_messages(update["messages"])
-            messages[-1].pretty_print()
-        else:
-            print(update)
-        print("\n\n")
-
-# input = {
-#     "messages": convert_to_messages(
-#         [
-#             {
-#                 "role": "user",
-#                 "content": "What does Lilian Weng say about types of reward hacking?",
-#             },
-#             {
-#                 "role": "assistant",
-#                 "content": "",
-#                 "tool_calls": [
-#                     {
-#                         "id": "1",
-#                         "name": "retrieve_blog_posts",
-#                         "args": {"query": "types of reward hacking"},
-#                     }
-#                 ],
-#             },
-#             {
-#                 "role": "tool",
-#                 "content": "reward hacking can be categorized into two types: environment or goal misspecification, and reward tampering",
-#                 "tool_call_id": "1",
-#             },
-#         ]
-#     )
-# }
-
-# response = generate_answer(input)
-# response["messages"][-1].pretty_print()
-
-# generate_query_or_respond(input)["messages"][-1].pretty_print()
\ No newline at end of file
+    workflow.add_edge("retrieve", "grade_documents")
+    workflow.add_conditional_edges(
+        "grade_documents",
+        route_after_grading,
+    )
+    workflow.add_edge("generate_answer", END)
+    workflow.add_edge("rewrite_question", "generate_query_or_respond")
+
+    return workflow.compile()
+
+if __name__ == "__main__":
+    from IPython.display import Image, display
+
+    print(f"Index update: {refresh_index(vectorstore.get())}")
+
+    display(Image(graph.get_graph().draw_mermaid_png()))
+
+    retriever_tool.invoke({"query": "types of reward hacking"})
+
+    for chunk in graph.stream(
+        {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": "What does Lilian Weng say about types of reward hacking?",
+                }
+            ]
+        }
+    ):
+        for node, update in chunk.items():
+            print("Update from node", node)
+            if "messages" in update:
+                messages = convert_to_messages(update["messages"])
+                messages[-1].pretty_print()
+            else:
+                print(update)
+            print("\n\n")
+
+    print(f"LLM cache: {llm_cache.stats()}")
+    print(f"Grading: {grading_stats.stats()}")
+
+    # input = {
+    #     "messages": convert_to_messages(
+    #         [
+    #             {
+    #                 "role": "user",
+    #                 "content": "What does Lilian Weng say about types of reward hacking?",
+    #             },
+    #             {
+    #                 "role": "assistant",
+    #                 "content": "",
+    #                 "tool_calls": [
+    #                     {
+    #                         "id": "1",
+    #                         "name": "retrieve_blog_posts",
+    #                         "args": {"query": "types of reward hacking"},
+    #                     }
+    #                 ],
+    #             },
+    #             {
+    #                 "role": "tool",
+    #                 "content": "reward hacking can be categorized into two types: environment or goal misspecification, and reward tampering",
+    #                 "tool_call_id": "1",
+    #             },
+    #         ]
+    #     )
+    # }
+
+    # response = generate_answer(input)
+    # response["messages"][-1].pretty_print()
+
+    # generate_query_or_respond(input)["messages"][-1].pretty_print()
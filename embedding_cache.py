@@ -0,0 +1,328 @@
+"""
+Persistent Embedding Cache
+
+Wraps any LangChain embedder (HuggingFaceEmbeddings, GoogleGenerativeAIEmbeddings,
+...) and keeps the vectors it produces on local disk, keyed by model name and a
+hash of the chunk text. Vectors live in a memory-mappable float32 file and the
+key -> slot table lives next to it in SQLite, so a restart with an unchanged
+corpus does zero embedding calls.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_DIR = ".cache/embeddings"
+# Cache hits whose last-used time is held in memory before it is written.
+TOUCH_BATCH = 1024
+
+
+def model_name_of(embeddings: Embeddings) -> str:
+    """Best-effort model identifier for an embedder."""
+    for attr in ("model_name", "model"):
+        name = getattr(embeddings, attr, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embeddings).__name__
+
+
+def text_key(text: str) -> str:
+    """Content hash used as the cache key for a chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk float32 vector cache for a single model with LRU eviction.
+
+    Layout inside ``cache_dir/<model>/``:
+
+    - ``vectors.f32``: raw ``(capacity, dim)`` float32 matrix, memory-mapped
+    - ``index.sqlite``: ``key -> slot`` table with a last-used clock
+
+    The free slots and the entry count are kept in memory, so a write only
+    looks up the keys it stores. Hits update the last-used clock in memory;
+    it is written every ``TOUCH_BATCH`` hits, before evicting and on ``close``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | os.PathLike,
+        model_name: str,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path = Path(cache_dir) / safe_name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._vectors: np.memmap | None = None
+
+        self._db = sqlite3.connect(self.path / "index.sqlite", check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+            """
+        )
+        self.dim = self._meta("dim")
+        self._clock = self._meta("clock") or 0
+        self._touched: dict[str, int] = {}  # key -> last use not yet written
+        self._capacity = self._meta("capacity") or 0
+        used = {slot for (slot,) in self._db.execute("SELECT slot FROM entries")}
+        self._count = len(used)
+        # Unused slots, lowest last so they are handed out first.
+        self._free = [slot for slot in range(self._capacity - 1, -1, -1) if slot not in used]
+        if self.dim:
+            self._open_vectors()
+
+    # -- metadata helpers ----------------------------------------------------
+
+    def _meta(self, name: str) -> int | None:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: int) -> None:
+        self._db.execute(
+            "INSERT INTO meta(name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, value),
+        )
+
+    # -- vector file ---------------------------------------------------------
+
+    def _open_vectors(self) -> None:
+        file = self.path / "vectors.f32"
+        if self._capacity == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(file, dtype=np.float32, mode="r+", shape=(self._capacity, self.dim))
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, self._capacity * 2, 64)
+        if self.entry_limit is not None:
+            capacity = min(capacity, self.entry_limit)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self.path / "vectors.f32", "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._free[:0] = range(capacity - 1, self._capacity - 1, -1)
+        self._capacity = capacity
+        self._set_meta("capacity", capacity)
+        self._open_vectors()
+
+    @property
+    def entry_limit(self) -> int | None:
+        """Maximum number of vectors allowed by ``max_entries``/``max_bytes``."""
+        limits = []
+        if self.max_entries is not None:
+            limits.append(self.max_entries)
+        if self.max_bytes is not None and self.dim:
+            limits.append(max(1, self.max_bytes // (self.dim * 4)))
+        return min(limits) if limits else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the vector file on disk."""
+        return self._capacity * (self.dim or 0) * 4
+
+    def _slots(self, keys: list[str]) -> dict[str, int]:
+        """``key -> slot`` for the ``keys`` that are cached."""
+        slots = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            slots.update(
+                self._db.execute(f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch)
+            )
+        return slots
+
+    def _write_touched(self) -> None:
+        """Write the buffered last-used times (the caller commits)."""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(clock, key) for key, clock in self._touched.items()],
+            )
+            self._touched.clear()
+        self._set_meta("clock", self._clock)
+
+    # -- public API ----------------------------------------------------------
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Return cached vectors for the keys that are present."""
+        if not keys or not self.dim:
+            return {}
+        found = {}
+        with self._lock:
+            for key, slot in self._slots(keys).items():
+                found[key] = np.array(self._vectors[slot])
+                self._clock += 1
+                self._touched[key] = self._clock
+            if len(self._touched) >= TOUCH_BATCH:
+                self._write_touched()
+                self._db.commit()
+        return found
+
+    def put_many(self, items: dict[str, np.ndarray]) -> None:
+        """Store vectors, evicting least-recently-used entries when full."""
+        if not items:
+            return
+        with self._lock:
+            if not self.dim:
+                self.dim = len(next(iter(items.values())))
+                self._set_meta("dim", self.dim)
+            self._write_touched()
+            existing = self._slots(list(items))
+            limit = self.entry_limit
+            new_keys = [key for key in items if key not in existing]
+            if limit is not None:
+                new_keys = new_keys[-limit:]
+                overflow = self._count + len(new_keys) - limit
+                if overflow > 0:
+                    victims = self._db.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_used ASC LIMIT ?", (overflow,)
+                    ).fetchall()
+                    self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                    for key, slot in victims:
+                        existing.pop(key, None)
+                        self._free.append(slot)
+                    self._count -= len(victims)
+
+            total = self._count + len(new_keys)
+            if total > self._capacity:
+                self._grow(total)
+
+            rows = []
+            for key in new_keys:
+                slot = self._free.pop()
+                self._vectors[slot] = np.asarray(items[key], dtype=np.float32)
+                self._clock += 1
+                rows.append((key, slot, self._clock))
+            for key, slot in existing.items():
+                if key in items:
+                    self._vectors[slot] = np.asarray(items[key], dtype=np.float32)
+            self._vectors.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries(key, slot, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._count += len(rows)
+            self._set_meta("clock", self._clock)
+            self._db.commit()
+
+    def clear(self) -> None:
+        """Drop every cached vector."""
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._touched.clear()
+            self._count = 0
+            self._free = list(range(self._capacity - 1, -1, -1))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._touched:
+                self._write_touched()
+                self._db.commit()
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._db.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embedder wrapper that serves repeated chunks from an :class:`EmbeddingCache`.
+
+    Example:
+        embeddings = CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        )
+        embeddings.embed_documents([doc.page_content for doc in all_splits])
+        print(embeddings.stats())
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_dir: str | os.PathLike = DEFAULT_CACHE_DIR,
+        model_name: str | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        cache_queries: bool = True,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name or model_name_of(embeddings)
+        self.cache = EmbeddingCache(cache_dir, self.model_name, max_entries, max_bytes)
+        self.cache_queries = cache_queries
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents_array(self, texts: list[str]) -> np.ndarray:
+        """Embed ``texts`` as a ``(len(texts), dim)`` float32 array."""
+        keys = [text_key(text) for text in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, vectors)
+            }
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        if not texts:
+            return np.zeros((0, self.cache.dim or 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        if not self.cache_queries:
+            return self.embeddings.embed_query(text)
+        key = text_key("query:" + text)
+        found = self.cache.get_many([key])
+        if key in found:
+            self.hits += 1
+            return found[key].tolist()
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many({key: np.asarray(vector, dtype=np.float32)})
+        return list(vector)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and on-disk footprint."""
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.cache),
+            "bytes": self.cache.nbytes,
+        }
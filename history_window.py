@@ -0,0 +1,199 @@
+"""
+Conversation History Window
+
+Bounds the prompt of a checkpointed conversation: the model sees a rolling
+summary of older turns plus the most recent messages that fit in
+``max_tokens``. The checkpointed history itself is left untouched.
+
+The summary is cached by the last message it covers. While the window still
+fits, every turn reuses it. When the window overflows, the oldest messages are
+cut down to ``keep_tokens`` in one step. Only the messages that slid out are
+folded into the previous summary, with one model call, and earlier turns are
+never summarized again.
+
+Tokens are counted with the tiktoken encoding that
+``RecursiveCharacterTextSplitter.from_tiktoken_encoder`` uses (``"gpt2"`` by
+default), memoized per message id.
+
+    window = HistoryWindow(llm, max_tokens=3000)
+    agent = create_react_agent(model=llm, tools=tools, pre_model_hook=window.pre_model_hook, ...)
+    supervisor = create_agent(llm, tools=tools, middleware=[window])
+"""
+
+import json
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage, get_buffer_string
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "Messages to add:\n{messages}\n\n"
+    "Return only the updated summary. Keep facts, names, numbers, decisions and open "
+    "questions; drop pleasantries and anything already superseded."
+)
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n\n"
+
+
+def tiktoken_counter(encoding_name: str = "gpt2") -> Callable[[str], int]:
+    """Token count of a string with the same encoder as ``from_tiktoken_encoder``."""
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _message_text(message: BaseMessage) -> str:
+    text = get_buffer_string([message])
+    if isinstance(message, AIMessage) and message.tool_calls:
+        text += json.dumps([call["args"] for call in message.tool_calls], default=str)
+    return text
+
+
+def _safe_cut(messages: Sequence[BaseMessage], cut: int) -> int:
+    """Move ``cut`` so the window does not start with orphaned tool results."""
+    forward = cut
+    while forward < len(messages) and isinstance(messages[forward], ToolMessage):
+        forward += 1
+    if forward < len(messages):
+        return forward
+    while cut > 0 and isinstance(messages[cut], ToolMessage):
+        cut -= 1
+    return cut
+
+
+class HistoryWindow(AgentMiddleware):
+    """Token-budgeted message window plus an incrementally updated summary.
+
+    Args:
+        summarizer: chat model (or ``prompt -> str`` callable) that writes the summary.
+        max_tokens: budget for summary plus window; the window is cut when it is exceeded.
+        keep_tokens: window size right after a cut (default ``max_tokens // 2``),
+            so the summary is updated once per several turns, not every turn.
+        encoding_name: tiktoken encoding used when ``token_counter`` is not given.
+        token_counter: ``text -> tokens``; overrides the tiktoken encoder.
+        max_summaries: summaries kept in memory (one per conversation position).
+    """
+
+    def __init__(
+        self,
+        summarizer: Any,
+        max_tokens: int = 3000,
+        keep_tokens: int | None = None,
+        encoding_name: str = "gpt2",
+        token_counter: Callable[[str], int] | None = None,
+        max_summaries: int = 4096,
+    ):
+        super().__init__()
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens if keep_tokens is not None else max_tokens // 2
+        self.encoding_name = encoding_name
+        self._counter = token_counter
+        self.max_summaries = max_summaries
+        # id of the last summarized message -> (messages covered, summary, summary tokens)
+        self._summaries: OrderedDict[str, tuple[int, str, int]] = OrderedDict()
+        self._tokens: OrderedDict[tuple[str, int], int] = OrderedDict()
+        self.calls = self.trimmed = self.summary_updates = 0
+        self.tokens_in = self.tokens_sent = 0
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        text = _message_text(message)
+        key = (message.id or text, len(text))
+        count = self._tokens.get(key)
+        if count is None:
+            if self._counter is None:
+                self._counter = tiktoken_counter(self.encoding_name)
+            count = self._counter(text)
+            self._tokens[key] = count
+            if len(self._tokens) > 16 * self.max_summaries:
+                self._tokens.popitem(last=False)
+        return count
+
+    def _cached_summary(self, messages: Sequence[BaseMessage]) -> tuple[int, str, int]:
+        """Longest prefix of ``messages`` with a cached summary: ``(length, summary, tokens)``."""
+        for end in range(len(messages), 0, -1):
+            entry = self._summaries.get(messages[end - 1].id or "")
+            if entry is not None and entry[0] == end:
+                self._summaries.move_to_end(messages[end - 1].id)
+                return entry
+        return 0, "", 0
+
+    def _plan(self, messages: Sequence[BaseMessage]):
+        """``(window, summary, start, cut)``; a summary update is due when ``cut > start``."""
+        counts = [self.count_tokens(m) for m in messages]
+        self.calls += 1
+        self.tokens_in += sum(counts)
+        start, summary, summary_tokens = self._cached_summary(messages)
+        if sum(counts[start:]) + summary_tokens <= self.max_tokens:
+            return list(messages[start:]), summary, start, start
+        tail, cut = 0, len(messages)
+        while cut > start + 1 and tail + counts[cut - 1] <= self.keep_tokens:
+            cut -= 1
+            tail += counts[cut]
+        cut = max(_safe_cut(messages, min(cut, len(messages) - 1)), start)
+        return list(messages[cut:]), summary, start, cut
+
+    def _summary_prompt(self, summary: str, messages: Sequence[BaseMessage]) -> str:
+        return SUMMARY_PROMPT.format(summary=summary or "(none yet)", messages=get_buffer_string(messages))
+
+    def _store(self, messages: Sequence[BaseMessage], cut: int, summary: str) -> None:
+        key = messages[cut - 1].id
+        if key:
+            self._summaries[key] = (cut, summary, self.count_tokens(HumanMessage(content=SUMMARY_PREFIX + summary)))
+            if len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+        self.summary_updates += 1
+
+    def _finish(self, window: list[BaseMessage], summary: str, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        if len(window) < len(messages):
+            self.trimmed += 1
+        if summary:
+            window = [HumanMessage(content=SUMMARY_PREFIX + summary, additional_kwargs={"lc_source": "summarization"})] + window
+        self.tokens_sent += sum(self.count_tokens(m) for m in window)
+        return window
+
+    def window(self, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        """The messages to send to the model in place of ``messages``."""
+        window, summary, start, cut = self._plan(messages)
+        if cut > start:
+            prompt = self._summary_prompt(summary, messages[start:cut])
+            if hasattr(self.summarizer, "invoke"):
+                summary = self.summarizer.invoke(prompt).text
+            else:
+                summary = self.summarizer(prompt)
+            self._store(messages, cut, summary)
+        return self._finish(window, summary, messages)
+
+    async def awindow(self, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        window, summary, start, cut = self._plan(messages)
+        if cut > start:
+            prompt = self._summary_prompt(summary, messages[start:cut])
+            if hasattr(self.summarizer, "ainvoke"):
+                summary = (await self.summarizer.ainvoke(prompt)).text
+            else:
+                summary = self.summarizer(prompt)
+            self._store(messages, cut, summary)
+        return self._finish(window, summary, messages)
+
+    def pre_model_hook(self, state: dict) -> dict:
+        """``create_react_agent`` hook: window the model input, keep the stored history."""
+        return {"llm_input_messages": self.window(state["messages"])}
+
+    def wrap_model_call(self, request: ModelRequest, handler):
+        return handler(request.override(messages=self.window(request.messages)))
+
+    async def awrap_model_call(self, request: ModelRequest, handler):
+        return await handler(request.override(messages=await self.awindow(request.messages)))
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "trimmed": self.trimmed,
+            "summary_updates": self.summary_updates,
+            "tokens_in": self.tokens_in,
+            "tokens_sent": self.tokens_sent,
+        }
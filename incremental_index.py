@@ -0,0 +1,241 @@
+"""
+Incremental Re-Indexing
+
+Keeps a vector store in sync with a corpus without re-splitting and
+re-embedding everything on every run. A manifest next to the saved index
+records, for every source document, a fingerprint of its content and the ids
+of the chunks it produced. On ``update()``:
+
+- unchanged documents are skipped before splitting,
+- changed documents are re-split; only chunks whose content/metadata changed
+  are embedded, and their stale chunk ids are deleted from the store. Chunk
+  ids leave out position metadata (``start_index``), so an edit near the top
+  of a document does not change the ids of the chunks below it; those only
+  get their metadata rewritten, with the stored vector,
+- documents that disappeared from the corpus have their chunks deleted.
+
+An index saved without a manifest (e.g. by ``MmapVectorStore.load_or_build``)
+is adopted, not wiped: its chunks are grouped by source into a manifest with
+unknown fingerprints. The next update re-splits those documents but takes
+the vectors of chunks whose text is already stored from the store instead of
+embedding them again.
+
+The splitter settings (class, chunk_size, chunk_overlap, ...) and the
+embedding model name are part of every fingerprint, so changing either one
+re-indexes the corpus.
+
+    vector_store = MmapVectorStore.open(".cache/indexes/agent-blog", embeddings)
+    indexer = IncrementalIndexer(vector_store, text_splitter)
+    print(indexer.update(docs))
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+from embedding_cache import model_name_of
+from vector_store import MmapVectorStore
+
+MANIFEST_FILE = "manifest.json"
+# Metadata that only says where a chunk sits in its document.
+POSITION_METADATA = ("start_index",)
+
+
+def _hash(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _metadata_json(doc: Document, exclude: tuple[str, ...] = ()) -> str:
+    metadata = {key: value for key, value in doc.metadata.items() if key not in exclude}
+    return json.dumps(metadata, sort_keys=True, default=str)
+
+
+def splitter_fingerprint(splitter: TextSplitter) -> dict:
+    """Settings that change how a document is chunked."""
+    config = {"class": type(splitter).__qualname__}
+    for name, value in sorted(vars(splitter).items()):
+        if callable(value):
+            value = getattr(value, "__qualname__", repr(value))
+        config[name.lstrip("_")] = value
+    return config
+
+
+def document_key(doc: Document) -> str:
+    """Identity of a source document: its source, plus the page for PDFs."""
+    source = str(doc.metadata.get("source", ""))
+    if "page" in doc.metadata:
+        return f"{source}#page={doc.metadata['page']}"
+    return source
+
+
+@dataclass
+class IndexStats:
+    documents: int = 0
+    unchanged_documents: int = 0
+    changed_documents: int = 0
+    removed_documents: int = 0
+    chunks_added: int = 0
+    chunks_reused: int = 0
+    chunks_deleted: int = 0
+    chunks_kept: int = 0
+
+
+class IncrementalIndexer:
+    """Sync a :class:`MmapVectorStore` with a corpus using a fingerprint manifest."""
+
+    def __init__(
+        self,
+        store: MmapVectorStore,
+        splitter: TextSplitter,
+        manifest_path: str | os.PathLike | None = None,
+        key: Callable[[Document], str] = document_key,
+    ):
+        if manifest_path is None:
+            if store.path is None:
+                raise ValueError("Pass manifest_path or give the store a path to save to")
+            manifest_path = store.path / MANIFEST_FILE
+        self.store = store
+        self.splitter = splitter
+        self.manifest_path = Path(manifest_path)
+        self.key = key
+        config = {
+            "splitter": splitter_fingerprint(splitter),
+            "model": model_name_of(store.embeddings),
+        }
+        self.config = _hash(json.dumps(config, sort_keys=True, default=repr))
+        # Stored vectors can stand in for new chunks with the same text, unless
+        # the manifest was written for another embedding model/splitter.
+        self.reuse_vectors = True
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self) -> dict:
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self._adopt()
+        if manifest.get("config") != self.config:
+            # Different splitter/model: every fingerprint is stale, but the old
+            # chunk ids are still needed so they can be deleted.
+            self.reuse_vectors = False
+            for entry in manifest["sources"].values():
+                entry["fingerprint"] = None
+        return manifest
+
+    def _adopt(self) -> dict:
+        """Manifest for chunks already in the store, grouped by the source they name."""
+        sources: dict[str, dict] = {}
+        for doc in self.store.get_by_ids(self.store.ids()):
+            sources.setdefault(self.key(doc), {"fingerprint": None, "chunks": []})["chunks"].append(doc.id)
+        return {"sources": sources}
+
+    def _reuse(self, chunks: list[Document], old: list[Document], stats: IndexStats) -> list[Document]:
+        """Add the chunks whose text an ``old`` chunk already has with its vector; returns the rest."""
+        if not (self.reuse_vectors and chunks and old):
+            return chunks
+        stored = {doc.page_content: doc.id for doc in old}
+        reused = [chunk for chunk in chunks if chunk.page_content in stored]
+        if not reused:
+            return chunks
+        vectors = self.store.vectors_by_ids([stored[chunk.page_content] for chunk in reused])
+        self.store.add_vectors(vectors, reused, ids=[chunk.id for chunk in reused])
+        stats.chunks_reused += len(reused)
+        return [chunk for chunk in chunks if chunk.page_content not in stored]
+
+    def _chunk_ids(self, key: str, chunks: list[Document]) -> list[str]:
+        ids, seen = [], {}
+        for chunk in chunks:
+            base = _hash(self.config, key, chunk.page_content, _metadata_json(chunk, POSITION_METADATA))
+            seen[base] = seen.get(base, 0) + 1
+            ids.append(base if seen[base] == 1 else f"{base}-{seen[base]}")
+        return ids
+
+    def diff(self, doc: Document, stats: IndexStats) -> tuple[list[Document], list[str]]:
+        """Record ``doc`` in the manifest and return its new chunks (ids set) and stale chunk ids.
+
+        Unchanged documents are not split and return nothing. New chunks whose
+        text is already stored are added right away with the stored vector;
+        only the chunks returned need embedding.
+        """
+        key = self.key(doc)
+        sources = self.manifest["sources"]
+        fingerprint = _hash(self.config, doc.page_content, _metadata_json(doc))
+        entry = sources.get(key)
+        if entry and entry["fingerprint"] == fingerprint:
+            stats.unchanged_documents += 1
+            stats.chunks_kept += len(entry["chunks"])
+            return [], []
+
+        stats.changed_documents += 1
+        chunks = self.splitter.split_documents([doc])
+        ids = self._chunk_ids(key, chunks)
+        old = {doc.id: doc for doc in self.store.get_by_ids(entry["chunks"])} if entry else {}
+        to_add = []
+        for chunk_id, chunk in zip(ids, chunks):
+            chunk.id = chunk_id
+            kept = old.get(chunk_id)
+            # Same id but moved within the document: the stored metadata is stale.
+            if kept is not None and kept.metadata == json.loads(_metadata_json(chunk)):
+                stats.chunks_kept += 1
+            else:
+                to_add.append(chunk)
+        sources[key] = {"fingerprint": fingerprint, "chunks": ids}
+        stale = sorted(set(entry["chunks"]) - set(ids)) if entry else []
+        return self._reuse(to_add, list(old.values()), stats), stale
+
+    def remove_missing(self, seen_keys: set[str], stats: IndexStats) -> list[str]:
+        """Drop documents not in ``seen_keys`` from the manifest; returns their chunk ids."""
+        removed = []
+        sources = self.manifest["sources"]
+        for key in list(sources):
+            if key not in seen_keys:
+                removed += sources.pop(key)["chunks"]
+                stats.removed_documents += 1
+        return removed
+
+    def save(self, changed: bool = True) -> None:
+        """Save the store (when ``changed`` or never saved) and then the manifest."""
+        path = self.store.path
+        if path is not None and (changed or not MmapVectorStore.exists(path)):
+            self.store.save()
+        self.manifest["config"] = self.config
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest))
+        os.replace(tmp, self.manifest_path)
+
+    def update(self, documents: list[Document], cleanup: bool = True) -> IndexStats:
+        """Bring the store in line with ``documents`` and persist store + manifest.
+
+        With ``cleanup=False`` documents missing from ``documents`` are left
+        in the index (useful when feeding the corpus in several batches).
+        """
+        stats = IndexStats(documents=len(documents))
+        seen_keys = set()
+        to_add: list[Document] = []
+        to_delete: list[str] = []
+        for doc in documents:
+            seen_keys.add(self.key(doc))
+            chunks, stale = self.diff(doc, stats)
+            to_add += chunks
+            to_delete += stale
+        if cleanup:
+            to_delete += self.remove_missing(seen_keys, stats)
+
+        if to_delete:
+            self.store.delete(to_delete)
+        if to_add:
+            self.store.add_documents(to_add, ids=[chunk.id for chunk in to_add])
+        stats.chunks_added = len(to_add)
+        stats.chunks_deleted = len(to_delete)
+        self.save(changed=bool(to_add or to_delete))
+        return stats
@@ -0,0 +1,334 @@
+"""
+LLM Response Cache
+
+Two-tier ``BaseCache`` for chat models, plugged in with
+``init_chat_model(..., cache=ResponseCache(...))``:
+
+- exact tier: SQLite rows keyed by the whitespace-normalized prompt plus the
+  model's ``llm_string``. The ``llm_string`` already carries the model name,
+  its parameters and anything bound to the call (tools, or the
+  ``with_structured_output`` schema such as ``GradeDocuments``), so answers
+  never leak between models or output schemas.
+- semantic tier (optional): prompt texts are embedded into a
+  :class:`MmapVectorStore`, and a miss in the exact tier is answered by the
+  most similar cached prompt for the same ``llm_string`` when its cosine
+  similarity reaches ``threshold``. For prompts rendered from fixed
+  templates, pass ``semantic_text=template_fields({...})``: only the
+  filled-in fields are embedded (the shared boilerplate would make unrelated
+  prompts look alike), entries only match prompts of the same template, and
+  prompts matching no template use the exact tier alone.
+
+Entries expire after ``ttl`` seconds. New semantic entries are written to
+disk in batches (every ``save_every`` entries or ``save_interval`` seconds,
+and on ``flush``/``close``). Embedding happens outside the cache lock, so
+parallel callers only wait for each other on the SQLite and index updates.
+``stats()`` reports hit rates and the model latency the hits saved.
+
+    llm_cache = ResponseCache(".cache/llm", embeddings=embeddings,
+                              semantic_text=template_fields({"answer": GENERATE_PROMPT}))
+    grader_model = init_chat_model("gemini-2.5-flash", model_provider="google_genai", cache=llm_cache)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps, loads
+
+from vector_store import MmapVectorStore, embed_documents_array
+
+DB_FILE = "responses.sqlite"
+SEMANTIC_DIR = "semantic"
+MAX_PENDING = 1024
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Serialized prompt with runs of whitespace in every string collapsed."""
+    try:
+        return json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except json.JSONDecodeError:
+        return " ".join(prompt.split())
+
+
+def prompt_text(prompt: str) -> str:
+    """The message contents of a serialized chat prompt, for embedding."""
+    try:
+        messages = json.loads(prompt)
+    except json.JSONDecodeError:
+        return " ".join(prompt.split())
+    parts = []
+    for message in messages if isinstance(messages, list) else [messages]:
+        content = message.get("kwargs", {}).get("content", "") if isinstance(message, dict) else ""
+        if isinstance(content, list):
+            content = " ".join(c.get("text", "") if isinstance(c, dict) else str(c) for c in content)
+        parts.append(" ".join(str(content).split()))
+    return "\n".join(parts)
+
+
+def template_fields(templates: dict[str, str]) -> Callable[[str], tuple[str, str] | None]:
+    """``semantic_text`` for prompts rendered from ``templates`` (name -> ``str.format`` template).
+
+    Maps a prompt's text to ``(template name, its filled-in fields)``, or
+    ``None`` when it was not rendered from any of them.
+    """
+    patterns = []
+    for name, template in templates.items():
+        parts = re.split(r"\{(\w+)\}", " ".join(template.split()))
+        regex, seen = "", set()
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                regex += re.escape(part)
+            elif part in seen:
+                regex += f"(?P={part})"
+            else:
+                seen.add(part)
+                regex += f"(?P<{part}>.*?)"
+        patterns.append((name, re.compile(regex, re.DOTALL)))
+
+    def fields(text: str) -> tuple[str, str] | None:
+        for name, pattern in patterns:
+            match = pattern.fullmatch(text)
+            if match:
+                return name, "\n".join(f"{key}: {value}" for key, value in match.groupdict().items())
+        return None
+
+    return fields
+
+
+@dataclass
+class _State:
+    """What the finalizer needs besides the cache itself: unsaved semantic entries, closed flag."""
+
+    unsaved: int = 0
+    closed: bool = False
+
+
+def _close(lock: threading.RLock, db: sqlite3.Connection, store: MmapVectorStore | None, state: _State) -> None:
+    with lock:
+        if state.closed:
+            return
+        state.closed = True
+        if store is not None and state.unsaved:
+            store.save()
+            state.unsaved = 0
+        db.close()
+
+
+class ResponseCache(BaseCache):
+    """Exact + semantic chat model response cache with TTL, stored on disk.
+
+    Args:
+        directory: holds ``responses.sqlite`` and the semantic index.
+        embeddings: enables the semantic tier when given.
+        ttl: seconds an entry stays valid; ``None`` keeps entries forever.
+        threshold: minimum cosine similarity for a semantic hit.
+        semantic_text: maps a prompt's text to ``(group, text to embed)``, or
+            ``None`` to skip the semantic tier; semantic hits stay within a
+            group. Defaults to the whole prompt in one group.
+        save_every / save_interval: write the semantic index after this many
+            new entries or seconds since the last write, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike = ".cache/llm",
+        embeddings: Embeddings | None = None,
+        ttl: float | None = 7 * 24 * 3600,
+        threshold: float = 0.97,
+        semantic_text: Callable[[str], tuple[str, str] | None] | None = None,
+        save_every: int = 32,
+        save_interval: float = 30.0,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.threshold = threshold
+        self.semantic_text = semantic_text or (lambda text: ("", text))
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.directory / DB_FILE), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, llm TEXT, prompt TEXT, response TEXT, "
+            "created REAL, latency REAL)"
+        )
+        self._db.commit()
+        self.embeddings = embeddings
+        self.store = (
+            MmapVectorStore.open(self.directory / SEMANTIC_DIR, embeddings) if embeddings else None
+        )
+        # Misses waiting for their ``update``; calls that fail never send one,
+        # so only the most recent ``MAX_PENDING`` are kept.
+        self._pending: OrderedDict[str, tuple[float, list[float] | None]] = OrderedDict()
+        self._state = _State()
+        self._saved_at = time.monotonic()
+        self.lookups = self.exact_hits = self.semantic_hits = self.index_saves = 0
+        self.latency_saved = 0.0
+        # Flushes and closes at garbage collection or interpreter exit, without
+        # keeping the cache alive.
+        self._finalizer = weakref.finalize(self, _close, self._lock, self._db, self.store, self._state)
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return _hash(normalize_prompt(prompt) + "\0" + llm_string)
+
+    def _row(self, key: str) -> tuple[str, float] | None:
+        row = self._db.execute(
+            "SELECT response, created, latency FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, created, latency = row
+        if self.ttl is not None and time.time() - created > self.ttl:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            if self.store is not None:
+                self.store.delete([key])
+                self._state.unsaved += 1
+            return None
+        return response, latency or 0.0
+
+    def _embed(self, text: str) -> list[float]:
+        return embed_documents_array(self.embeddings, [text])[0].tolist()
+
+    def _semantic(self, prompt: str, llm_string: str) -> tuple[str, str] | None:
+        """(group, text to embed) for the semantic tier, or ``None`` to skip it."""
+        if self.store is None:
+            return None
+        semantic = self.semantic_text(prompt_text(prompt))
+        if semantic is None:
+            return None
+        group, text = semantic
+        return _hash(llm_string + "\0" + group), text
+
+    def _semantic_match(self, key: str, vector: list[float], group: str) -> tuple[str, float] | None:
+        if not len(self.store):
+            return None
+        hits = self.store.similarity_search_with_score_by_vector(
+            vector, k=1, filter=lambda doc: doc.metadata.get("llm") == group
+        )
+        for doc, score in hits:
+            if score >= self.threshold and doc.id != key:
+                return self._row(doc.id)
+        return None
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            if self._state.closed:
+                return None
+            self.lookups += 1
+            found = self._row(key)
+            if found is not None:
+                self.exact_hits += 1
+        vector = None
+        semantic = self._semantic(prompt, llm_string) if found is None else None
+        if semantic is not None:
+            vector = self._embed(semantic[1])
+            with self._lock:
+                if self._state.closed:
+                    return None
+                found = self._semantic_match(key, vector, semantic[0])
+                if found is not None:
+                    self.semantic_hits += 1
+        with self._lock:
+            if found is None:
+                self._pending[key] = (time.perf_counter(), vector)
+                self._pending.move_to_end(key)
+                if len(self._pending) > MAX_PENDING:
+                    self._pending.popitem(last=False)
+                return None
+            response, latency = found
+            self.latency_saved += latency
+        return loads(response, allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self._state.closed:
+            return
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            started, vector = self._pending.pop(key, (None, None))
+        latency = time.perf_counter() - started if started is not None else None
+        semantic = self._semantic(prompt, llm_string)
+        if semantic is not None and vector is None:
+            vector = self._embed(semantic[1])
+        with self._lock:
+            if self._state.closed:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses(key, llm, prompt, response, created, latency) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, _hash(llm_string), normalize_prompt(prompt), dumps(return_val), time.time(), latency),
+            )
+            self._db.commit()
+            if semantic is not None:
+                group, text = semantic
+                self.store.add_vectors([vector], [Document(page_content=text, metadata={"llm": group})], ids=[key])
+                self._state.unsaved += 1
+                if self._state.unsaved >= self.save_every or time.monotonic() - self._saved_at >= self.save_interval:
+                    self.flush()
+
+    def flush(self) -> None:
+        """Write new semantic entries to disk."""
+        with self._lock:
+            if self.store is None or self._state.closed or not self._state.unsaved:
+                return
+            self.store.save()
+            self._state.unsaved = 0
+            self._saved_at = time.monotonic()
+            self.index_saves += 1
+
+    def close(self) -> None:
+        """Flush the semantic index and close the database; later lookups miss and updates are dropped."""
+        self._finalizer()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            if self._state.closed:
+                return
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            if self.store is not None:
+                self.store.delete(self.store.ids())
+                self._state.unsaved += 1
+                self.flush()
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.lookups - hits,
+            "hit_rate": hits / self.lookups if self.lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+            "index_saves": self.index_saves,
+        }
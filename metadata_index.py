@@ -0,0 +1,162 @@
+"""
+Metadata Pre-Filter Index
+
+Per-field inverted lists (value -> rows) over the scalar metadata of
+``MmapVectorStore`` documents. A dict filter is resolved to candidate rows
+first, and only those rows are scored, so a filtered search costs time
+proportional to the matching subset instead of the whole corpus:
+
+    vector_store.similarity_search(
+        "hak pekerja", filter={"source": file_path, "page": {"$gte": 10, "$lte": 40}}
+    )
+
+Supported conditions: ``{"field": value}``, ``{"field": {"$eq" | "$in" |
+"$gt" | "$gte" | "$lt" | "$lte": ...}}`` and ``{"$and" | "$or": [...]}``.
+Range conditions scan the field's distinct values, not its rows.
+"""
+
+import json
+import operator
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_RANGE = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+_SCALARS = (str, int, float, bool)
+
+
+def _comparable(value: Any, operand: Any) -> bool:
+    if isinstance(value, bool) or isinstance(operand, bool):
+        return False
+    if isinstance(value, (int, float)) and isinstance(operand, (int, float)):
+        return True
+    return type(value) is type(operand)
+
+
+class MetadataIndex:
+    """Inverted lists from ``(field, value)`` to store rows."""
+
+    def __init__(self):
+        self.fields: dict[str, dict[Any, list[int]]] = {}
+        self._arrays: dict[tuple[str, Any], np.ndarray] = {}
+        self._numeric: dict[str, np.ndarray] = {}
+
+    def add(self, metadatas: Sequence[dict], start: int) -> None:
+        """Index the metadata of rows ``start, start + 1, ...``."""
+        for row, metadata in enumerate(metadatas, start):
+            for field, value in metadata.items():
+                if isinstance(value, _SCALARS):
+                    postings = self.fields.setdefault(field, {})
+                    if value not in postings:
+                        self._numeric.pop(field, None)
+                    postings.setdefault(value, []).append(row)
+                    self._arrays.pop((field, value), None)
+
+    def _postings(self, field: str, value: Any) -> np.ndarray:
+        array = self._arrays.get((field, value))
+        if array is None:
+            array = np.asarray(self.fields.get(field, {}).get(value, ()), dtype=np.int64)
+            self._arrays[(field, value)] = array
+        return array
+
+    def compact(self, rows: np.ndarray) -> None:
+        """Keep only ``rows`` (in order), matching a compacted vector matrix."""
+        remap = {int(row): new for new, row in enumerate(rows)}
+        self._arrays.clear()
+        self._numeric.clear()
+        for postings in self.fields.values():
+            for value in list(postings):
+                kept = [remap[row] for row in postings[value] if row in remap]
+                if kept:
+                    postings[value] = kept
+                else:
+                    del postings[value]
+
+    def _in_range(self, field: str, bounds: dict) -> list:
+        """Distinct values of ``field`` within all ``$gt/$gte/$lt/$lte`` bounds."""
+        postings = self.fields.get(field, {})
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in bounds.values()):
+            return [
+                value
+                for value in postings
+                if all(_comparable(value, b) and _RANGE[op](value, b) for op, b in bounds.items())
+            ]
+        keys = self._numeric.get(field)
+        if keys is None:
+            keys = np.sort(np.array([v for v in postings if _comparable(v, 0)], dtype=np.float64))
+            self._numeric[field] = keys
+        lo, hi = 0, len(keys)
+        for op, bound in bounds.items():
+            if op in ("$gt", "$gte"):
+                lo = max(lo, int(np.searchsorted(keys, bound, "right" if op == "$gt" else "left")))
+            else:
+                hi = min(hi, int(np.searchsorted(keys, bound, "left" if op == "$lt" else "right")))
+        return [int(v) if v.is_integer() else v for v in keys[lo:hi].tolist()]
+
+    def _field_rows(self, field: str, condition: Any) -> np.ndarray:
+        postings = self.fields.get(field, {})
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        values: list | None = None
+        bounds = {}
+        for op, operand in condition.items():
+            if op in _RANGE:
+                bounds[op] = operand
+                continue
+            if op == "$eq":
+                chosen = [operand]
+            elif op == "$in":
+                chosen = list(operand)
+            else:
+                raise ValueError(f"Unsupported filter operator {op!r}")
+            values = chosen if values is None else [v for v in values if v in set(chosen)]
+        if bounds:
+            in_range = self._in_range(field, bounds)
+            values = in_range if values is None else [v for v in values if v in set(in_range)]
+        # A row has one value per field, so the posting lists are disjoint.
+        parts = [self._postings(field, value) for value in dict.fromkeys(values) if value in postings]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def rows(self, filter: dict) -> np.ndarray:
+        """Sorted rows matching ``filter`` (may include deleted rows)."""
+        result: np.ndarray | None = None
+        for key, condition in filter.items():
+            if key == "$and":
+                parts = [self.rows(sub) for sub in condition]
+                rows = parts[0] if parts else np.zeros(0, dtype=np.int64)
+                for part in parts[1:]:
+                    rows = np.intersect1d(rows, part, assume_unique=True)
+            elif key == "$or":
+                parts = [self.rows(sub) for sub in condition]
+                rows = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            else:
+                rows = self._field_rows(key, condition)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return result if result is not None else np.zeros(0, dtype=np.int64)
+
+    def save(self, path: str | os.PathLike) -> None:
+        header, rows, offset = {}, [], 0
+        for field, postings in self.fields.items():
+            entries = []
+            for value, value_rows in postings.items():
+                entries.append([value, offset, len(value_rows)])
+                rows += value_rows
+                offset += len(value_rows)
+            header[field] = entries
+        with open(path, "wb") as f:
+            np.savez(f, header=np.array(json.dumps(header)), rows=np.asarray(rows, dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "MetadataIndex":
+        index = cls()
+        with np.load(Path(path)) as data:
+            header = json.loads(str(data["header"]))
+            rows = data["rows"].tolist()
+        for field, entries in header.items():
+            index.fields[field] = {
+                value: rows[offset : offset + count] for value, offset, count in entries
+            }
+        return index
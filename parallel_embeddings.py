@@ -0,0 +1,145 @@
+"""
+Multi-Process Local Embeddings
+
+Drop-in replacement for ``HuggingFaceEmbeddings`` that spreads
+sentence-transformers inference over a pool of worker processes. Each worker
+loads the model once and gets ``cpu_count // workers`` torch threads. Inputs
+are sorted by length and packed into batches under a padded-token budget, so
+short chunks are batched wide and long chunks narrow, with little padding
+wasted. Results come back in input order.
+
+    embeddings = ParallelHuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2", workers=8
+    )
+"""
+
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_model = None
+
+
+def _init_worker(model_name: str, model_kwargs: dict, threads: int) -> None:
+    """Load the model once per worker process."""
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _model = SentenceTransformer(model_name, **model_kwargs)
+
+
+def _encode(texts: list[str], encode_kwargs: dict) -> np.ndarray:
+    vectors = _model.encode(texts, batch_size=len(texts), show_progress_bar=False, **encode_kwargs)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token-count proxy (~4 characters per word-piece) used for sorting."""
+    return len(text) // 4 + 1
+
+
+def pack_batches(
+    lengths: list[int], token_budget: int, max_batch: int, max_length: int
+) -> list[list[int]]:
+    """Group indices (longest first) so ``len(batch) * longest_in_batch <= token_budget``."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    longest = 0
+    for i in order:
+        length = min(lengths[i], max_length)
+        padded = (len(batch) + 1) * max(longest, length)
+        if batch and padded > token_budget or len(batch) == max_batch:
+            batches.append(batch)
+            batch, longest = [], 0
+        batch.append(i)
+        longest = max(longest, length)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class ParallelHuggingFaceEmbeddings(Embeddings):
+    """Sentence-transformers embeddings computed by a process pool.
+
+    Args:
+        workers: worker processes; defaults to half the CPU count.
+        token_budget: padded tokens per batch (``batch_size * longest_input``).
+        max_batch: upper bound on texts per batch for very short inputs.
+        length_function: token-count estimate used for sorting and packing.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        workers: int | None = None,
+        model_kwargs: dict | None = None,
+        encode_kwargs: dict | None = None,
+        token_budget: int = 8192,
+        max_batch: int = 256,
+        max_length: int = 256,
+        length_function: Callable[[str], int] = approx_tokens,
+    ):
+        cpus = os.cpu_count() or 1
+        self.model_name = model_name
+        self.workers = workers or max(1, cpus // 2)
+        self.threads_per_worker = max(1, cpus // self.workers)
+        self.model_kwargs = model_kwargs or {}
+        self.encode_kwargs = encode_kwargs or {}
+        self.token_budget = token_budget
+        self.max_batch = max_batch
+        self.max_length = max_length
+        self.length_function = length_function
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Workers start from a fresh interpreter: forking a parent that
+                # already runs threads or has torch loaded can deadlock.
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.model_kwargs, self.threads_per_worker),
+                )
+            return self._pool
+
+    def embed_documents_array(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        lengths = [self.length_function(text) for text in texts]
+        batches = pack_batches(lengths, self.token_budget, self.max_batch, self.max_length)
+        pool = self._executor()
+        futures = [
+            pool.submit(_encode, [texts[i] for i in batch], self.encode_kwargs)
+            for batch in batches
+        ]
+        out: np.ndarray | None = None
+        for batch, future in zip(batches, futures):
+            vectors = future.result()
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[batch] = vectors
+        return out
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._executor().submit(_encode, [text], self.encode_kwargs).result()[0].tolist()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,308 @@
+"""
+Quantized Vector Storage
+
+Compressed alternative to keeping every embedding resident at float32:
+
+- ``ScalarQuantizer``: one uint8 per dimension (4x smaller)
+- ``ProductQuantizer``: one byte per sub-vector of ``dsub`` dimensions
+  (32x smaller at the default ``dsub=8``)
+
+``QuantizedVectorStore`` scores queries against the codes with asymmetric
+distance computation (float query, compressed rows) and optionally re-ranks
+the best candidates with the exact float32 rows, which stay in the
+memory-mapped ``vectors.npy`` and are only paged in for those candidates.
+
+    vector_store = QuantizedVectorStore(embeddings, quantizer=ProductQuantizer(), rerank=8)
+    vector_store.add_documents(all_splits)
+    vector_store.save(".cache/indexes/pp-18-2021-pq")
+    print(vector_store.memory_footprint())
+"""
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ann_index import cluster_sums
+from vector_store import MmapVectorStore, normalize, top_k
+
+QUANTIZER_FILE = "quantizer.npz"
+CODES_FILE = "codes.npy"
+
+# Rows scored per block so temporaries stay small on multi-million-row stores.
+SCAN_BLOCK = 1 << 16
+
+
+class ScalarQuantizer:
+    """Per-dimension min/max quantization to uint8."""
+
+    kind = "int8"
+
+    def __init__(self):
+        self.low: np.ndarray | None = None
+        self.scale: np.ndarray | None = None
+
+    @property
+    def trained(self) -> bool:
+        return self.low is not None
+
+    @property
+    def code_size(self) -> int:
+        return len(self.low)
+
+    def fit(self, vectors: np.ndarray) -> None:
+        self.low = vectors.min(axis=0).astype(np.float32)
+        high = vectors.max(axis=0).astype(np.float32)
+        self.scale = np.maximum(high - self.low, 1e-12) / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale + self.low
+
+    def scores(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Inner products ``query . decode(codes)`` without decoding the rows."""
+        bias = float(query @ self.low)
+        weights = query * self.scale
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK):
+            block = codes[start:start + SCAN_BLOCK].astype(np.float32)
+            out[start:start + SCAN_BLOCK] = block @ weights + bias
+        return out
+
+    def state(self) -> dict[str, np.ndarray]:
+        return {"low": self.low, "scale": self.scale}
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.low, self.scale = state["low"], state["scale"]
+
+
+def kmeans_l2(vectors: np.ndarray, k: int, niter: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain Euclidean k-means used to train each PQ codebook."""
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(niter):
+        sums, counts = cluster_sums(vectors, nearest_l2(vectors, centroids), k)
+        empty = counts == 0
+        centroids = sums / np.maximum(counts, 1)[:, None]
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+    return centroids.astype(np.float32)
+
+
+def nearest_l2(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    distances = np.ascontiguousarray(vectors) @ (-2 * centroids.T)
+    distances += (centroids ** 2).sum(axis=1)
+    return np.argmin(distances, axis=1)
+
+
+class ProductQuantizer:
+    """Split vectors into ``m`` sub-vectors and store one codebook index per sub-vector.
+
+    Args:
+        dsub: dimensions per sub-vector; ``m = ceil(dim / dsub)``.
+        ksub: codebook size per sub-space (at most 256 so codes fit in a byte).
+        train_size: maximum number of rows sampled for training.
+    """
+
+    kind = "pq"
+
+    def __init__(
+        self,
+        dsub: int = 8,
+        ksub: int = 256,
+        train_size: int = 16384,
+        niter: int = 15,
+        seed: int = 0,
+    ):
+        self.dsub = dsub
+        self.ksub = ksub
+        self.train_size = train_size
+        self.niter = niter
+        self.seed = seed
+        self.codebooks: np.ndarray | None = None
+
+    @property
+    def trained(self) -> bool:
+        return self.codebooks is not None
+
+    @property
+    def m(self) -> int:
+        return len(self.codebooks)
+
+    @property
+    def code_size(self) -> int:
+        return self.m
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """``(n, dim)`` -> ``(m, n, dsub)``, zero-padding the last sub-vector."""
+        n, dim = vectors.shape
+        m = -(-dim // self.dsub)
+        padded = np.zeros((n, m * self.dsub), dtype=np.float32)
+        padded[:, :dim] = vectors
+        return padded.reshape(n, m, self.dsub).transpose(1, 0, 2)
+
+    def fit(self, vectors: np.ndarray) -> None:
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.train_size:
+            vectors = vectors[np.sort(rng.choice(len(vectors), self.train_size, replace=False))]
+        ksub = min(self.ksub, len(vectors))
+        self.codebooks = np.stack([
+            kmeans_l2(np.ascontiguousarray(sub), ksub, self.niter, rng)
+            for sub in self._split(np.asarray(vectors))
+        ])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), SCAN_BLOCK):
+            subs = self._split(np.asarray(vectors[start:start + SCAN_BLOCK]))
+            for j, (sub, codebook) in enumerate(zip(subs, self.codebooks)):
+                codes[start:start + SCAN_BLOCK, j] = nearest_l2(sub, codebook)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def scores(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """ADC: per-query lookup table of sub-vector inner products, summed per row."""
+        table = np.einsum("mkd,md->mk", self.codebooks, self._split(query[None, :])[:, 0, :])
+        out = np.zeros(len(codes), dtype=np.float32)
+        for j in range(self.m):
+            out += table[j][codes[:, j]]
+        return out
+
+    def state(self) -> dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.codebooks = state["codebooks"]
+        self.dsub = self.codebooks.shape[2]
+
+
+QUANTIZERS = {cls.kind: cls for cls in (ScalarQuantizer, ProductQuantizer)}
+
+
+class QuantizedVectorStore(MmapVectorStore):
+    """``MmapVectorStore`` that searches compressed codes instead of float32 rows.
+
+    The quantizer is trained on the first ``min_train`` rows (searches before
+    that are exact). ``rerank`` candidates per requested result are re-scored
+    with the exact vectors; ``rerank=0`` returns the ADC scores as-is. An
+    ``ann`` index is not used by this store.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        path=None,
+        quantizer: ScalarQuantizer | ProductQuantizer | None = None,
+        rerank: int = 4,
+        min_train: int = 1000,
+        **kwargs: Any,
+    ):
+        super().__init__(embedding, path, **kwargs)
+        self.quantizer = quantizer or ProductQuantizer()
+        self.rerank = rerank
+        self.min_train = min_train
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+
+    def train(self) -> None:
+        """(Re)train the quantizer on the live rows and encode the whole store."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[: self._size])
+            self.quantizer.fit(np.asarray(self._vectors[rows]))
+            self._codes = self.quantizer.encode(self._vectors[: self._size])
+
+    def add_vectors(self, vectors, documents, ids=None) -> list[str]:
+        with self._lock:
+            start = self._size
+            ids_ = super().add_vectors(vectors, documents, ids)
+            if self.quantizer.trained:
+                codes = self.quantizer.encode(self._vectors[start:self._size])
+                self._codes = np.concatenate([self._codes[:start], codes])
+            elif len(self) >= self.min_train:
+                self.train()
+        return ids_
+
+    def _search_rows(self, queries, k, exact=False):
+        if exact or not self.quantizer.trained:
+            return super()._search_rows(queries, k, exact=True)
+        queries = normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        n = self._size
+        k = min(k, len(self))
+        dead = ~self._alive[:n]
+        results = []
+        for query in queries:
+            scores = self.quantizer.scores(query, self._codes[:n])
+            scores[dead] = -np.inf
+            if not self.rerank:
+                rows = top_k(scores, k)
+                results.append((rows, scores[rows]))
+                continue
+            candidates = np.sort(top_k(scores, k * self.rerank))
+            exact_scores = self._vectors[candidates] @ query
+            exact_scores[dead[candidates]] = -np.inf
+            best = top_k(exact_scores, k)
+            results.append((candidates[best], exact_scores[best]))
+        return results
+
+    def memory_footprint(self) -> dict:
+        """Bytes needed for search with codes vs. full-precision rows."""
+        live = len(self)
+        code_bytes = live * (self.quantizer.code_size if self.quantizer.trained else 0)
+        float_bytes = live * self.dim * 4
+        return {
+            "rows": live,
+            "float32_bytes": float_bytes,
+            "code_bytes": code_bytes,
+            "compression": float_bytes / code_bytes if code_bytes else 1.0,
+        }
+
+    # -- persistence ---------------------------------------------------------
+
+    def _save_extras(self, directory: Path, rows: np.ndarray) -> list[str]:
+        files = super()._save_extras(directory, rows)
+        if not self.quantizer.trained:
+            return files
+        np.save(directory / CODES_FILE, self._codes[rows])
+        with open(directory / QUANTIZER_FILE, "wb") as f:
+            np.savez(f, kind=np.array(self.quantizer.kind), **self.quantizer.state())
+        return files + [CODES_FILE, QUANTIZER_FILE]
+
+    def _load_extras(self, path: Path) -> None:
+        super()._load_extras(path)
+        if not (path / QUANTIZER_FILE).exists():
+            return
+        with np.load(path / QUANTIZER_FILE) as data:
+            state = {name: data[name] for name in data.files if name != "kind"}
+            kind = str(data["kind"])
+        if self.quantizer.kind != kind:
+            self.quantizer = QUANTIZERS[kind]()
+        self.quantizer.set_state(state)
+        self._codes = np.load(path / CODES_FILE)
+
+
+def evaluate_quantization(
+    store: QuantizedVectorStore, queries: np.ndarray, k: int = 4
+) -> dict:
+    """Recall@k of the compressed search (with and without re-ranking) vs. exact."""
+    queries = normalize(np.atleast_2d(queries))
+    exact = store._search_rows(queries, k, exact=True)
+    report = dict(store.memory_footprint())
+    rerank = store.rerank
+    try:
+        for label, setting in (("recall_adc", 0), ("recall_rerank", rerank or 4)):
+            store.rerank = setting
+            approx = store._search_rows(queries, k)
+            hits = sum(
+                len(np.intersect1d(found, truth))
+                for (found, _), (truth, _) in zip(approx, exact)
+            )
+            report[label] = hits / (len(queries) * min(k, len(store)))
+    finally:
+        store.rerank = rerank
+    report["recall_loss"] = 1.0 - report["recall_rerank" if rerank else "recall_adc"]
+    return report
@@ -1,9 +1,12 @@
+import re
 from dataclasses import dataclass
-import os
 
-from langgraph.prebuilt import create_react_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.checkpoint.memory import MemorySaver
+from langchain.agents import create_agent
+from sqlite_checkpointer import SQLiteCheckpointer
+from history_window import HistoryWindow
+from registry import lazy
+from resource_pool import pool
+from tool_memo import SpeculativeToolCalls, ToolMemo
 from langgraph.runtime import get_runtime
 
 from dotenv import load_dotenv
@@ -34,11 +37,30 @@ def get_user_location() -> str:
     user_id = runtime.context.user_id
     return "Florida" if user_id == "1" else "SF"
 
-model = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0,
-    google_api_key=os.getenv("GOOGLE_API_KEY") 
-)
+tools = [get_user_location, get_weather_for_location]
+
+WEATHER = re.compile(r"\b(weather|forecast|sunny|rain\w*|snow\w*|temperature|hot|cold|umbrella)\b", re.I)
+NAMED_PLACE = re.compile(r"\b(in|at|for|near)\s+(?!here\b|my\b|this\b|today\b|tomorrow\b)\w+", re.I)
+
+def likely_tool_calls(question: str, context: Context | None, results: dict[str, str]) -> list[tuple[str, dict]]:
+    """A weather question that names no place is about the user's own location."""
+    if not WEATHER.search(question) or NAMED_PLACE.search(question):
+        return []
+    if "get_user_location" in results:
+        return [("get_weather_for_location", {"city": results["get_user_location"]})]
+    return [("get_user_location", {})] if context is not None else []
+
+# Both tools are deterministic: repeated calls within the TTL (seconds) are
+# answered from memory, and the location lookup plus the weather it feeds are
+# run before the first model call when the question makes them predictable.
+tool_memo = ToolMemo({"get_user_location": 3600, "get_weather_for_location": 600})
+speculative_calls = SpeculativeToolCalls(tools, likely_tool_calls, memo=tool_memo)
+
+# Shares the Gemini client of the other agents in this process (the API key
+# is read from GOOGLE_API_KEY); temperature is applied per request.
+@lazy
+def model():
+    return pool.chat_model("gemini-2.5-flash", model_provider="google_genai", temperature=0)
 
 @dataclass
 class ResponseFormat:
@@ -46,37 +68,44 @@ class ResponseFormat:
     punny_response: str
     weather_conditions: str | None = None
 
-checkpointer = MemorySaver()
-
-agent = create_react_agent(
-    model=model,
-    tools=[get_user_location, get_weather_for_location],
-    prompt=system_prompt,
-    response_format=ResponseFormat,
-    context_schema=Context,
-    checkpointer=checkpointer
-)
-
-config = {"configurable": {"thread_id": "1"}}
-
-response = agent.invoke(
-    {"messages": [{"role": "user", "content": "what is the weather in yogyakarta indonesia?"}]},
-    config=config,
-    context=Context(user_id="1")
-)
-
-print(response['structured_response'])
-# ResponseFormat(
-#     punny_response="Florida is still having a 'sun-derful' day! The sunshine is playing 'ray-dio' hits all day long! I'd say it's the perfect weather for some 'solar-bration'! If you were hoping for rain, I'm afraid that idea is all 'washed up' - the forecast remains 'clear-ly' brilliant!",
-#     weather_conditions="It's always sunny in Florida!"
-# )
-
-response = agent.invoke(
-    {"messages": [{"role": "user", "content": "thank you!"}]},
-    config=config,
-    context=Context(user_id="1")
-)
-
-print(response['structured_response'])
-# ResponseFormat(
-#     punny_response="You're 'thund-erfully' welcome! It's always a 'breeze' to help you stay 'current' with the weather. I'm just 'cloud'-ing around waiting to 'shower' you with more forecasts whenever you need them. Have a 'sun-sational' day in the Florida sunshine!",
\ No newline at end of file
+@lazy
+def agent():
+    return create_agent(
+        model.get(),
+        tools=tools,
+        system_prompt=system_prompt,
+        middleware=[HistoryWindow(model.get(), max_tokens=2000), tool_memo, speculative_calls],
+        response_format=ResponseFormat,
+        context_schema=Context,
+        checkpointer=SQLiteCheckpointer(".cache/checkpoints/quickstart.sqlite", keep_last=20)
+    )
+
+if __name__ == "__main__":
+    config = {"configurable": {"thread_id": "1"}}
+
+    response = agent.invoke(
+        {"messages": [{"role": "user", "content": "what is the weather in yogyakarta indonesia?"}]},
+        config=config,
+        context=Context(user_id="1")
+    )
+
+    print(response['structured_response'])
+    # ResponseFormat(
+    #     punny_response="Florida is still having a 'sun-derful' day! The sunshine is playing 'ray-dio' hits all day long! I'd say it's the perfect weather for some 'solar-bration'! If you were hoping for rain, I'm afraid that idea is all 'washed up' - the forecast remains 'clear-ly' brilliant!",
+    #     weather_conditions="It's always sunny in Florida!"
+    # )
+
+    response = agent.invoke(
+        {"messages": [{"role": "user", "content": "thank you!"}]},
+        config=config,
+        context=Context(user_id="1")
+    )
+
+    print(response['structured_response'])
+    # ResponseFormat(
+    #     punny_response="You're 'thund-erfully' welcome! It's always a 'breeze' to help you stay 'current' with the weather. I'm just 'cloud'-ing around waiting to 'shower' you with more forecasts whenever you need them. Have a 'sun-sational' day in the Florida sunshine!",
+    #     weather_conditions=None
+    # )
+
+    # {'requests': 2, ..., 'model_steps_saved': 0, ...}: the first question names a place.
+    print(speculative_calls.stats(), tool_memo.stats())
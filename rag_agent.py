@@ -1,40 +1,77 @@
-import bs4
-from langgraph.prebuilt import create_react_agent
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import Annotated
+
+from langgraph.prebuilt import InjectedState, create_react_agent
 from langchain.tools import tool
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain.chat_models import init_chat_model
+from sqlite_checkpointer import SQLiteCheckpointer
+from history_window import HistoryWindow
 from langchain.agents import AgentState
 from langchain.messages import MessageLikeRepresentation
+from ingest import load_web_documents
+from vector_store import MmapVectorStore
+from incremental_index import IncrementalIndexer
+from rerank import RerankingRetriever
+from retrieval_memo import RetrievalMemo
+from registry import lazy
+from resource_pool import pool
 from dotenv import load_dotenv
 load_dotenv()
 
-loader = WebBaseLoader(
-    web_paths=("https://lilianweng.github.io/posts/2023-06-23-agent/",),
-    bs_kwargs=dict(
-        parse_only=bs4.SoupStrainer(
-            class_=("post-content", "post-title", "post-header")
-        )
-    ),
-)
-docs = loader.load()
-
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-all_splits = text_splitter.split_documents(docs)
-
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-vector_store = InMemoryVectorStore(embeddings)
+# Nothing below is built at import time: each component is created on first
+# use. A persisted index is opened as is; the blog post is only fetched and
+# indexed when the index does not exist yet, or by refresh_index().
+INDEX_PATH = ".cache/indexes/agent-blog"
+
+def load_documents():
+    import bs4
+
+    return load_web_documents(
+        ["https://lilianweng.github.io/posts/2023-06-23-agent/"],
+        bs_kwargs=dict(
+            parse_only=bs4.SoupStrainer(
+                class_=("post-content", "post-title", "post-header")
+            )
+        ),
+    )
 
-_ = vector_store.add_documents(documents=all_splits)
+def refresh_index(store: MmapVectorStore):
+    """Re-fetch the source documents and re-embed whatever changed."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return IncrementalIndexer(store, text_splitter).update(load_documents())
+
+# Models and embedders come from the process-wide pool, shared with the other
+# agents served from the same process.
+@lazy
+def embeddings():
+    return pool.embeddings("sentence-transformers/all-MiniLM-L6-v2")
+
+@lazy
+def vector_store():
+    exists = MmapVectorStore.exists(INDEX_PATH)
+    store = MmapVectorStore.open(INDEX_PATH, embeddings.get())
+    if not exists:
+        print(f"Index update: {refresh_index(store)}")
+    return store
+
+# One embedding + scan per distinct query per turn, shared by the injected
+# context and the tool.
+@lazy
+def retrieval_memo():
+    return RetrievalMemo(vector_store.get(), fetch_k=10)
+
+# Over-fetch with the vector index, keep the 2 best chunks by cross-encoder score.
+@lazy
+def retriever():
+    return RerankingRetriever(
+        vectorstore=retrieval_memo.get(), reranker=pool.reranker(), fetch_k=10, k=2
+    )
 
 @tool(response_format="content_and_artifact")
-def retrieve_context(query: str):
+def retrieve_context(query: str, state: Annotated[dict, InjectedState]):
     """Retrieve information to help answer a query."""
-    retrieved_docs = vector_store.similarity_search(query, k=2)
+    with retrieval_memo.turn(state["messages"]):
+        retrieved_docs = retriever.invoke(query)
     serialized = "\n\n".join(
         (f"Source: {doc.metadata}\nContent: {doc.page_content}")
         for doc in retrieved_docs
@@ -43,8 +80,9 @@ def retrieve_context(query: str):
 
 def prompt_with_context(state: AgentState) -> list[MessageLikeRepresentation]:
     """Inject context into state messages."""
-    last_query = state["messages"][-1].text
-    retrieved_docs = vector_store.similarity_search(last_query)
+    # Retrieve for the user's question, not a trailing tool result.
+    with retrieval_memo.turn(state["messages"]) as question:
+        retrieved_docs = retrieval_memo.similarity_search(question)
 
     docs_content = "\n\n".join(doc.page_content for doc in retrieved_docs)
 
@@ -62,24 +100,35 @@ tools = [retrieve_context]
 #     "Use the tool to help answer user queries."
 # )
 
-llm = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
+@lazy
+def llm():
+    return pool.chat_model("gemini-2.5-flash", model_provider="google_genai")
+
+@lazy
+def agent():
+    return create_react_agent(
+        model=llm.get(),
+        tools=tools,
+        prompt=prompt_with_context,
+        # the retrieved context is added on top of a bounded window of the history
+        pre_model_hook=HistoryWindow(llm.get(), max_tokens=3000).pre_model_hook,
+        checkpointer=SQLiteCheckpointer(".cache/checkpoints/rag_agent.sqlite", keep_last=20),
+    )
 
-checkpointer = MemorySaver()
+if __name__ == "__main__":
+    print(f"Index update: {refresh_index(vector_store.get())}")
+    print(f"Embedding cache: {embeddings.stats()}")
 
-agent = create_react_agent(
-    model=llm,
-    tools=tools,
-    prompt=prompt_with_context,
-    checkpointer=checkpointer
-)
+    query = "What is task decomposition?"
 
-query = "What is task decomposition?"
+    config = {"configurable": {"thread_id": "1"}}
 
-config = {"configurable": {"thread_id": "1"}}
+    for step in agent.stream(
+        {"messages": [{"role": "user", "content": query}]},
+        config=config,
+        stream_mode="values",
+    ):
+        step["messages"][-1].pretty_print()
 
-for step in agent.stream(
-    {"messages": [{"role": "user", "content": query}]},
-    config=config,
-    stream_mode="values",
-):
-    step["messages"][-1].pretty_print()
\ No newline at end of file
+    print(f"Retrieval memo: {retrieval_memo.stats()}")
+    print(f"Resource pool: {pool.stats()}")
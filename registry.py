@@ -0,0 +1,131 @@
+"""
+Lazy Component Registry
+
+The agent scripts declare their chat models, embedders, vector stores and
+compiled graphs as :class:`Lazy` factories instead of building them at import
+time. Importing a script is then cheap; each component is built once, on first
+use, and shared by everything that needs it (thread-safe). A ``Lazy`` forwards
+attribute access to the built object, so ``agent.invoke(...)`` works as before;
+pass ``component.get()`` where the real object is needed (e.g. to
+``create_agent`` or a pydantic field).
+
+The registry maps graph names to ``"module:attribute"`` targets, so a server
+imports only the scripts it actually serves:
+
+    @lazy
+    def vector_store():
+        return MmapVectorStore.open(".cache/indexes/agent-blog", embeddings.get())
+
+    agent = registry.get("rag")          # imports rag_agent, builds its graph
+    print(registry.stats())              # build seconds per component
+"""
+
+import importlib
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """A value built by ``factory()`` on first use, then cached."""
+
+    def __init__(self, factory: Callable[[], T], name: str | None = None):
+        self.factory = factory
+        self.name = name or f"{factory.__module__}.{factory.__qualname__}"
+        self.seconds: float | None = None
+        self._value: T | None = None
+        self._built = False
+        self._lock = threading.RLock()
+        _components.append(self)
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        """The built value; the first caller builds it, concurrent callers wait."""
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    start = time.perf_counter()
+                    self._value = self.factory()
+                    self.seconds = time.perf_counter() - start
+                    self._built = True
+        return self._value
+
+    def reset(self) -> None:
+        """Drop the built value; the next use builds it again."""
+        with self._lock:
+            self._value, self._built, self.seconds = None, False, None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        return f"Lazy({self.name}{', built' if self._built else ''})"
+
+
+_components: list[Lazy] = []
+
+
+def lazy(factory: Callable[[], T]) -> Lazy[T]:
+    """Decorator form of :class:`Lazy`."""
+    return Lazy(factory)
+
+
+def resolve(target: Any) -> Any:
+    """Build ``target``: a ``"module:attribute"`` string, a :class:`Lazy`, a factory, or a ready object."""
+    if isinstance(target, str):
+        module, _, attr = target.partition(":")
+        target = getattr(importlib.import_module(module), attr)
+    if isinstance(target, Lazy):
+        return target.get()
+    if callable(target) and not hasattr(target, "astream"):
+        return target()
+    return target
+
+
+class Registry:
+    """Named graphs, resolved and built on first :meth:`get`."""
+
+    def __init__(self, targets: dict[str, Any] | None = None):
+        self._targets: dict[str, Any] = dict(targets or {})
+        self._built: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target: Any) -> None:
+        with self._lock:
+            self._targets[name] = target
+            self._built.pop(name, None)
+
+    def names(self) -> list[str]:
+        return list(self._targets)
+
+    def get(self, name: str) -> Any:
+        if name not in self._built:
+            if name not in self._targets:
+                raise KeyError(f"Unknown component {name!r}")
+            with self._lock:
+                if name not in self._built:
+                    self._built[name] = resolve(self._targets[name])
+        return self._built[name]
+
+    def stats(self) -> dict[str, float]:
+        """Build seconds of every component built so far in this process."""
+        return {c.name: round(c.seconds, 4) for c in _components if c.built}
+
+
+registry = Registry(
+    {
+        "quickstart": "quickstart:agent",
+        "rag": "rag_agent:agent",
+        "custom_rag": "custom_rag_agent:graph",
+        "supervisor": "supervisor_agent:supervisor_agent",
+        "sql": "sql_agent:agent",
+    }
+)
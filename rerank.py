@@ -0,0 +1,139 @@
+"""
+Cross-Encoder Re-Ranking
+
+Second retrieval stage: over-fetch ``fetch_k`` candidates with the cheap
+vector search, re-score the (query, chunk) pairs with a small local
+cross-encoder in batches, and keep the best ``k``. Scores are cached on disk
+per (model, query, chunk), so repeated questions and rewrite loops that
+retrieve the same chunks skip the model entirely.
+
+    reranker = CrossEncoderReranker()
+    retriever = RerankingRetriever(vectorstore=vector_store, reranker=reranker, fetch_k=20, k=4)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def pair_key(model_name: str, query: str, text: str) -> str:
+    h = hashlib.sha256()
+    for part in (model_name, query, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class CrossEncoderReranker:
+    """Batched cross-encoder scoring with a persistent (query, chunk) score cache.
+
+    Args:
+        model: anything with ``predict(pairs, batch_size=...)``; defaults to a
+            ``sentence_transformers.CrossEncoder`` loaded on first use.
+        max_length: tokens per pair the cross-encoder reads (bounds CPU cost).
+        cache_dir: where ``scores.sqlite`` lives; ``None`` keeps scores in memory.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        model: Any = None,
+        batch_size: int = 32,
+        max_length: int = 256,
+        cache_dir: str | os.PathLike | None = ".cache/rerank",
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self._model = model
+        self._lock = threading.Lock()
+        database = ":memory:"
+        if cache_dir is not None:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            database = str(Path(cache_dir) / "scores.sqlite")
+        self._db = sqlite3.connect(database, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL)")
+        self._db.commit()
+        self.hits = self.misses = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+        return self._model
+
+    def score(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """Relevance score of every text for ``query`` (higher is better)."""
+        keys = [pair_key(self.model_name, query, text) for text in texts]
+        with self._lock:
+            known: dict[str, float] = {}
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                placeholders = ",".join("?" * len(part))
+                known.update(
+                    self._db.execute(
+                        f"SELECT key, score FROM scores WHERE key IN ({placeholders})", part
+                    )
+                )
+        missing = {key: text for key, text in zip(keys, texts) if key not in known}
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            pairs = [(query, text) for text in missing.values()]
+            scores = np.asarray(self.model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+            fresh = dict(zip(missing, scores.tolist()))
+            with self._lock:
+                self._db.executemany("INSERT OR REPLACE INTO scores(key, score) VALUES (?, ?)", fresh.items())
+                self._db.commit()
+            known.update(fresh)
+        return np.array([known[key] for key in keys], dtype=np.float32)
+
+    def rerank(self, query: str, documents: Sequence[Document], k: int) -> list[Document]:
+        """The ``k`` best ``documents`` by cross-encoder score, with it in metadata."""
+        if not documents:
+            return []
+        scores = self.score(query, [doc.page_content for doc in documents])
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [
+            documents[i].model_copy(
+                update={"metadata": {**documents[i].metadata, "rerank_score": float(scores[i])}}
+            )
+            for i in order
+        ]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+class RerankingRetriever(BaseRetriever):
+    """Vector search for ``fetch_k`` candidates, cross-encoder re-rank to ``k``."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: VectorStore
+    reranker: CrossEncoderReranker
+    fetch_k: int = 20
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        candidates = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return self.reranker.rerank(query, candidates, self.k)
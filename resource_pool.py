@@ -0,0 +1,190 @@
+"""
+Shared Resource Pool
+
+One process-wide home for the expensive, thread-safe objects the agent
+scripts used to build separately: chat-model clients, embedders (model
+weights, worker pools, the on-disk embedding cache) and cross-encoder
+rerankers. Each is created once per configuration and handed out to every
+agent that asks for the same configuration.
+
+Chat models are keyed by provider, model and client settings. Per-request
+settings (``temperature``, ``cache``, ``tags``, ...) do not get a client of
+their own: they are applied to a shallow copy that shares the underlying
+client, and with it the keep-alive HTTP connection pool. Plain HTTP fetches
+go through the shared ``requests.Session`` of :mod:`ingest`.
+
+:meth:`ResourcePool.stats` reports instances, reuse, resident memory and
+open TCP connections.
+
+    llm = pool.chat_model("gemini-2.5-flash", model_provider="google_genai")
+    grader = pool.chat_model("gemini-2.5-flash", model_provider="google_genai", cache=llm_cache)
+    embeddings = pool.embeddings("sentence-transformers/all-MiniLM-L6-v2")
+    print(pool.stats())
+"""
+
+import os
+import resource
+import sys
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from langchain.chat_models import init_chat_model
+
+from ingest import get_session
+
+# Chat-model fields that only change requests, not the client connection.
+REQUEST_PARAMS = frozenset({"temperature", "top_p", "top_k", "cache", "tags", "metadata", "callbacks"})
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of a config value; unhashable objects are keyed by identity."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return ("id", id(value))
+
+
+def resident_memory_mb() -> float:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def open_connections() -> int | None:
+    """Established TCP connections owned by this process (Linux only, else ``None``)."""
+    try:
+        inodes = set()
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                target = os.readlink(f"/proc/self/fd/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(target[8:-1])
+        count = 0
+        for table in ("/proc/self/net/tcp", "/proc/self/net/tcp6"):
+            try:
+                lines = Path(table).read_text().splitlines()[1:]
+            except OSError:
+                continue
+            for line in lines:
+                fields = line.split()
+                if fields[3] == "01" and fields[9] in inodes:
+                    count += 1
+        return count
+    except OSError:
+        return None
+
+
+class ResourcePool:
+    """Shared instances keyed by ``(kind, config)``; creation is thread-safe."""
+
+    def __init__(self):
+        self._instances: dict[tuple, Any] = {}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def shared(self, kind: str, config: Any, factory: Callable[[], Any]) -> Any:
+        """The instance for ``(kind, config)``, created with ``factory()`` on first request."""
+        key = (kind, _freeze(config))
+        with self._lock:
+            if key in self._instances:
+                self.hits += 1
+                return self._instances[key]
+            lock = self._locks.setdefault(key, threading.Lock())
+        # Build outside the pool lock so a slow model load does not block other kinds.
+        with lock:
+            with self._lock:
+                if key in self._instances:
+                    self.hits += 1
+                    return self._instances[key]
+            instance = factory()
+            with self._lock:
+                self._instances[key] = instance
+                self.misses += 1
+        return instance
+
+    def chat_model(self, model: str, model_provider: str | None = None, **kwargs: Any) -> Any:
+        """A shared ``init_chat_model`` client; per-request settings share its connection."""
+        client_kwargs = {k: v for k, v in kwargs.items() if k not in REQUEST_PARAMS}
+        request_kwargs = {k: v for k, v in kwargs.items() if k in REQUEST_PARAMS}
+        config = (model, model_provider, client_kwargs)
+        base = self.shared(
+            "chat_model", config, lambda: init_chat_model(model, model_provider=model_provider, **client_kwargs)
+        )
+        if not request_kwargs:
+            return base
+        fields = type(base).model_fields
+        unknown = set(request_kwargs) - set(fields)
+        if unknown:
+            # Not a field of this model class: it has to go to the constructor.
+            return self.shared(
+                "chat_model", (model, model_provider, kwargs),
+                lambda: init_chat_model(model, model_provider=model_provider, **kwargs),
+            )
+        return self.shared("chat_model", (config, request_kwargs), lambda: base.model_copy(update=request_kwargs))
+
+    def embeddings(
+        self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", provider: str = "huggingface", **kwargs: Any
+    ) -> Any:
+        """A shared embedder behind the on-disk embedding cache.
+
+        ``provider`` is ``"huggingface"`` (local sentence-transformers worker
+        pool) or ``"google_genai"`` (batched Gemini API client).
+        """
+
+        def build():
+            from embedding_cache import CachedEmbeddings
+
+            if provider == "huggingface":
+                from parallel_embeddings import ParallelHuggingFaceEmbeddings
+
+                return CachedEmbeddings(ParallelHuggingFaceEmbeddings(model_name=model_name, **kwargs))
+            if provider == "google_genai":
+                from async_embeddings import GeminiBatchEmbeddings
+
+                return CachedEmbeddings(GeminiBatchEmbeddings(model=model_name, **kwargs))
+            raise ValueError(f"Unknown embeddings provider {provider!r}")
+
+        return self.shared("embeddings", (provider, model_name, kwargs), build)
+
+    def reranker(self, **kwargs: Any) -> Any:
+        """A shared ``CrossEncoderReranker`` (one copy of the cross-encoder weights)."""
+
+        def build():
+            from rerank import CrossEncoderReranker
+
+            return CrossEncoderReranker(**kwargs)
+
+        return self.shared("reranker", kwargs, build)
+
+    def http_session(self):
+        """The process-wide keep-alive ``requests.Session``."""
+        return get_session()
+
+    def stats(self) -> dict:
+        with self._lock:
+            kinds: dict[str, int] = {}
+            for kind, _ in self._instances:
+                kinds[kind] = kinds.get(kind, 0) + 1
+            hits, misses = self.hits, self.misses
+        return {
+            "instances": kinds,
+            "hits": hits,
+            "misses": misses,
+            "rss_mb": round(resident_memory_mb(), 1),
+            "connections": open_connections(),
+        }
+
+
+pool = ResourcePool()
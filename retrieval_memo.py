@@ -0,0 +1,175 @@
+"""
+Per-Turn Retrieval Memo
+
+A ``VectorStore`` proxy that remembers query embeddings and search results
+for the duration of one user turn. Within a turn, the context injected
+before each model call and the ``retrieve_context`` tool read the same memo:
+each distinct query (whitespace- and case-normalized) is embedded once, and a
+search for ``k`` results is answered from an earlier search for at least
+``k``. Searches always fetch at least ``fetch_k`` results, so a prompt search
+for 4 and a re-ranker's fetch of 10 share one scan.
+
+A turn is identified by the id of its user message (unique per thread), and
+opened with :meth:`RetrievalMemo.turn`. Searches outside a turn go straight
+to the wrapped store. Only the most recent ``max_turns`` turns are kept.
+
+    memo = RetrievalMemo(vector_store, fetch_k=10)
+    retriever = RerankingRetriever(vectorstore=memo, reranker=CrossEncoderReranker(), fetch_k=10, k=2)
+
+    with memo.turn(state["messages"]):
+        docs = memo.similarity_search(question)    # embeds + scans
+        docs = retriever.invoke(question)          # same query: memo hit
+"""
+
+import contextvars
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.vectorstores import VectorStore
+
+from vector_store import MmapVectorStore
+
+_turn: contextvars.ContextVar[str | None] = contextvars.ContextVar("retrieval_turn", default=None)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def last_user_message(messages: Sequence[BaseMessage]) -> HumanMessage | None:
+    """The latest user message that belongs to the stored history (has an id)."""
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage) and message.id:
+            return message
+    return None
+
+
+class _TurnMemo:
+    def __init__(self):
+        self.embeddings: dict[str, list[float]] = {}
+        self.results: dict[str, tuple[int, list[tuple[Document, float]]]] = {}
+
+
+class RetrievalMemo(VectorStore):
+    """Memoizes ``similarity_search`` per user turn on top of ``vectorstore``."""
+
+    def __init__(self, vectorstore: VectorStore, fetch_k: int = 10, max_turns: int = 256):
+        self.vectorstore = vectorstore
+        self.fetch_k = fetch_k
+        self.max_turns = max_turns
+        self._turns: OrderedDict[str, _TurnMemo] = OrderedDict()
+        self._lock = threading.Lock()
+        self.searches = self.result_hits = self.scans = 0
+        self.embeds = self.embed_hits = 0
+
+    @property
+    def embeddings(self) -> Embeddings | None:
+        return self.vectorstore.embeddings
+
+    @contextmanager
+    def turn(self, messages: Sequence[BaseMessage]):
+        """Scope searches in this block to the turn of ``messages``' last user message; yields its text."""
+        question = last_user_message(messages)
+        token = _turn.set(question.id if question is not None else None)
+        try:
+            yield question.text if question is not None else ""
+        finally:
+            _turn.reset(token)
+
+    def _memo(self) -> _TurnMemo | None:
+        key = _turn.get()
+        if key is None:
+            return None
+        with self._lock:
+            memo = self._turns.get(key)
+            if memo is None:
+                memo = self._turns[key] = _TurnMemo()
+                if len(self._turns) > self.max_turns:
+                    self._turns.popitem(last=False)
+            else:
+                self._turns.move_to_end(key)
+            return memo
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        memo = self._memo()
+        if memo is None or kwargs:
+            with self._lock:
+                self.searches += 1
+                self.scans += 1
+                self.embeds += 1
+            return self.vectorstore.similarity_search_with_score(query, k, **kwargs)
+        key = normalize_query(query)
+        # The prompt hook and tool calls of one turn can search concurrently:
+        # the memo is read and written under the lock, embedding and scanning
+        # happen outside it.
+        with self._lock:
+            self.searches += 1
+            fetched, results = memo.results.get(key, (0, []))
+            if fetched >= k:
+                self.result_hits += 1
+                return results[:k]
+            embedding = memo.embeddings.get(key)
+            if embedding is None:
+                self.embeds += 1
+            else:
+                self.embed_hits += 1
+            self.scans += 1
+        if embedding is None:
+            embedding = self.vectorstore.embeddings.embed_query(query)
+            with self._lock:
+                memo.embeddings.setdefault(key, embedding)
+        fetch = max(k, self.fetch_k)
+        results = self.vectorstore.similarity_search_with_score_by_vector(embedding, fetch)
+        with self._lock:
+            if memo.results.get(key, (0, []))[0] < fetch:
+                memo.results[key] = (fetch, results)
+        return results[:k]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.vectorstore.similarity_search_by_vector(embedding, k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        return self.vectorstore._select_relevance_score_fn()
+
+    def add_texts(self, texts: Iterable[str], metadatas: list[dict] | None = None, **kwargs: Any) -> list[str]:
+        with self._lock:
+            self._turns.clear()
+        return self.vectorstore.add_texts(texts, metadatas, **kwargs)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        vectorstore_cls: type[VectorStore] = MmapVectorStore,
+        fetch_k: int = 10,
+        max_turns: int = 256,
+        **kwargs: Any,
+    ) -> "RetrievalMemo":
+        """Build a ``vectorstore_cls`` store from ``texts`` and wrap it."""
+        store = vectorstore_cls.from_texts(texts, embedding, metadatas=metadatas, **kwargs)
+        return cls(store, fetch_k=fetch_k, max_turns=max_turns)
+
+    def stats(self) -> dict:
+        """Searches served, and the embeddings and scans the memo avoided."""
+        return {
+            "searches": self.searches,
+            "result_hits": self.result_hits,
+            "embeddings": self.embeds,
+            "embeddings_avoided": self.embed_hits + self.result_hits,
+            "scans": self.scans,
+            "scans_avoided": self.result_hits,
+        }
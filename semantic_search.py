@@ -1,16 +1,16 @@
 import os
 from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
 import asyncio
+from ingest import load_pdf
+from vector_store import MmapVectorStore
+from ann_index import IVFIndex
+from bm25_index import BM25Index, HybridRetriever
+from registry import lazy
+from resource_pool import pool
 from dotenv import load_dotenv
 load_dotenv()
 
-os.environ["LANGSMITH_TRACING"] = "true"
-os.environ["LANGSMITH_API_KEY"] = os.getenv("LANGSMITH_API_KEY")
-
 # documents = [
 #     Document(
 #         page_content="Dogs are great companions, known for their loyalty and friendliness.",
@@ -23,55 +23,89 @@ os.environ["LANGSMITH_API_KEY"] = os.getenv("LANGSMITH_API_KEY")
 # ]
 
 file_path = "data/PP Nomor 18 Tahun 2021.pdf"
-loader = PyPDFLoader(file_path)
-
-docs = loader.load()
+INDEX_PATH = ".cache/indexes/pp-18-2021"
 
-print(len(docs))
+# Built on first use: with a saved index, the PDF is neither parsed nor split.
+def split_documents():
+    docs = load_pdf(file_path)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=200, add_start_index=True
+    )
+    return text_splitter.split_documents(docs)
+
+@lazy
+def embeddings():
+    return pool.embeddings("models/gemini-embedding-001", provider="google_genai")
+
+@lazy
+def vector_store():
+    return MmapVectorStore.load_or_build(
+        INDEX_PATH,
+        embeddings.get(),
+        split_documents,
+        ann=IVFIndex(nprobe=8),
+        bm25=BM25Index(),
+    )
 
-print(f"{docs[0].page_content[:200]}\n")
-print(docs[0].metadata)
+# Article/chapter lookups are answered from the BM25 index without embedding
+# the query; other questions fuse keyword and vector results.
+@lazy
+def retriever():
+    return HybridRetriever(vectorstore=vector_store.get(), k=4)
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000, chunk_overlap=200, add_start_index=True
-)
-all_splits = text_splitter.split_documents(docs)
+if __name__ == "__main__":
+    os.environ["LANGSMITH_TRACING"] = "true"
+    os.environ["LANGSMITH_API_KEY"] = os.getenv("LANGSMITH_API_KEY")
 
-print(len(all_splits))
+    docs = load_pdf(file_path)
 
-embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001")
+    print(len(docs))
 
-vector_1 = embeddings.embed_query(all_splits[0].page_content)
-vector_2 = embeddings.embed_query(all_splits[1].page_content)
+    print(f"{docs[0].page_content[:200]}\n")
+    print(docs[0].metadata)
 
-assert len(vector_1) == len(vector_2)
-print(f"Generated vectors of length {len(vector_1)}\n")
-print(vector_1[:10])
+    all_splits = split_documents()
 
-vector_store = InMemoryVectorStore(embeddings)
+    print(len(all_splits))
 
-ids = vector_store.add_documents(documents=all_splits)
+    vector_1, vector_2 = embeddings.embed_documents(
+        [all_splits[0].page_content, all_splits[1].page_content]
+    )
 
-results = vector_store.similarity_search(
-    "Apa isi bab 3 pasal 4?"
-)
+    assert len(vector_1) == len(vector_2)
+    print(f"Generated vectors of length {len(vector_1)}\n")
+    print(vector_1[:10])
 
-print(results[0])
+    vector_store.get()
+    print(f"Embedding cache: {embeddings.stats()}")
 
-async def main():
-    results2 = await vector_store.asimilarity_search(
+    results = retriever.invoke(
         "Apa isi bab 3 pasal 4?"
     )
-    print(results2[0])
 
-asyncio.run(main())
+    print(results[0])
+
+    async def main():
+        results2 = await retriever.ainvoke(
+            "Apa isi bab 3 pasal 4?"
+        )
+        print(results2[0])
+
+    asyncio.run(main())
+
+    # Metadata filters are resolved through the store's metadata index, so only
+    # the chunks of pages 10-40 are scored.
+    results = vector_store.similarity_search(
+        "Apa hak pekerja?", filter={"source": file_path, "page": {"$gte": 10, "$lte": 40}}
+    )
+    print(results[0])
 
-results = vector_store.similarity_search_with_score("What was Nike's revenue in 2023?")
-doc, score = results[0]
-print(f"Score: {score}\n")
-print(doc)
+    results = vector_store.similarity_search_with_score("What was Nike's revenue in 2023?")
+    doc, score = results[0]
+    print(f"Score: {score}\n")
+    print(doc)
 
-embedding = embeddings.embed_query("How were Nike's margins impacted in 2023?")
+    embedding = embeddings.embed_query("How were Nike's margins impacted in 2023?")
 
-results = vector_store.similarity_search_by_vector(embedding)
-print(results[0])
\ No newline at end of file
+    results = vector_store.similarity_search_by_vector(embedding)
+    print(results[0])
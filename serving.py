@@ -0,0 +1,215 @@
+"""
+Async Agent Server
+
+Serves the compiled graphs (``quickstart:agent``, ``rag_agent:agent``,
+``custom_rag_agent:graph``, ``supervisor_agent:supervisor_agent``) to many
+concurrent conversations from one event loop. Each graph is imported and
+compiled once, on first use. Runs go through ``astream``/``ainvoke``:
+
+- requests on the same ``thread_id`` run one at a time in arrival order;
+  different threads run concurrently, up to ``max_concurrency``;
+- at most ``max_queue`` requests may wait for a slot; beyond that
+  :class:`Overloaded` is raised immediately instead of queueing without bound;
+- :meth:`AgentServer.stream` yields model tokens as they are generated;
+- a cancelled request (a client that disconnects, :meth:`AgentServer.cancel`,
+  or ``timeout``) closes the graph run and frees its slot. The checkpoint keeps
+  the last completed step.
+
+    server = AgentServer({"rag": "rag_agent:agent"}, max_concurrency=32)
+    async for token in server.stream("rag", "user-42", "What is task decomposition?"):
+        print(token, end="", flush=True)
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk
+from langgraph.types import Command
+
+from registry import resolve
+
+
+class Overloaded(RuntimeError):
+    """Raised when the request queue is full."""
+
+
+@dataclass
+class ServerStats:
+    completed: int = 0
+    rejected: int = 0
+    cancelled: int = 0
+    failed: int = 0
+    running: int = 0
+    queued: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=100_000))
+
+
+class AgentServer:
+    """Runs named compiled graphs for many ``thread_id`` conversations at once.
+
+    ``graphs`` maps a name to a compiled graph, a zero-argument factory, a
+    :class:`registry.Lazy`, or a ``"module:attribute"`` string (imported and
+    built in a worker thread on first use).
+    """
+
+    def __init__(
+        self,
+        graphs: dict[str, Any],
+        max_concurrency: int = 64,
+        max_queue: int = 256,
+        timeout: float | None = None,
+    ):
+        self._targets = dict(graphs)
+        self._graphs: dict[str, Any] = {}
+        self._loading: dict[str, asyncio.Lock] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._threads: dict[str, tuple[asyncio.Lock, int]] = {}
+        self._tasks: dict[str, set[asyncio.Task]] = {}
+        self._stats = ServerStats()
+
+    async def graph(self, name: str) -> Any:
+        """The compiled graph for ``name``, loading it once."""
+        if name not in self._graphs:
+            if name not in self._targets:
+                raise KeyError(f"Unknown graph {name!r}")
+            lock = self._loading.setdefault(name, asyncio.Lock())
+            async with lock:
+                if name not in self._graphs:
+                    self._graphs[name] = await asyncio.to_thread(resolve, self._targets[name])
+        return self._graphs[name]
+
+    @asynccontextmanager
+    async def _admit(self, thread_id: str):
+        """Queue for the thread's turn and a free slot, or raise :class:`Overloaded`."""
+        stats = self._stats
+        if stats.queued >= self.max_queue:
+            stats.rejected += 1
+            raise Overloaded(f"{stats.queued} requests already queued")
+        lock, users = self._threads.get(thread_id, (asyncio.Lock(), 0))
+        self._threads[thread_id] = (lock, users + 1)
+        task = asyncio.current_task()
+        self._tasks.setdefault(thread_id, set()).add(task)
+        stats.queued += 1
+        queued = True
+        try:
+            async with lock:
+                async with self._slots:
+                    stats.queued -= 1
+                    queued = False
+                    stats.running += 1
+                    try:
+                        yield
+                    finally:
+                        stats.running -= 1
+        finally:
+            if queued:
+                stats.queued -= 1
+            self._tasks[thread_id].discard(task)
+            if not self._tasks[thread_id]:
+                del self._tasks[thread_id]
+            lock, users = self._threads[thread_id]
+            if users == 1:
+                del self._threads[thread_id]
+            else:
+                self._threads[thread_id] = (lock, users - 1)
+
+    @staticmethod
+    def _input(message: str | dict | Command) -> dict | Command:
+        if isinstance(message, str):
+            return {"messages": [{"role": "user", "content": message}]}
+        return message
+
+    def _config(self, thread_id: str, config: dict | None) -> dict:
+        config = dict(config or {})
+        config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+        return config
+
+    @asynccontextmanager
+    async def _run(self, thread_id: str):
+        """Admission plus bookkeeping for one request."""
+        start = time.perf_counter()
+        try:
+            async with self._admit(thread_id):
+                async with asyncio.timeout(self.timeout):
+                    yield
+        except (asyncio.CancelledError, TimeoutError, GeneratorExit):
+            self._stats.cancelled += 1
+            raise
+        except Overloaded:
+            raise
+        except Exception:
+            self._stats.failed += 1
+            raise
+        self._stats.completed += 1
+        self._stats.latencies.append(time.perf_counter() - start)
+
+    async def ainvoke(
+        self, name: str, thread_id: str, message: str | dict | Command, config: dict | None = None, **kwargs
+    ) -> dict:
+        """Run one turn on ``thread_id`` and return the final state.
+
+        ``message`` is a user message, a full graph input, or a ``Command``
+        (e.g. resuming a human-in-the-loop interrupt). ``kwargs`` go to
+        ``ainvoke`` (e.g. ``context=...``).
+        """
+        graph = await self.graph(name)
+        async with self._run(thread_id):
+            return await graph.ainvoke(self._input(message), self._config(thread_id, config), **kwargs)
+
+    async def stream(
+        self,
+        name: str,
+        thread_id: str,
+        message: str | dict | Command,
+        config: dict | None = None,
+        nodes: set[str] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Yield the AI text tokens of one turn on ``thread_id`` as they are generated.
+
+        ``nodes`` restricts tokens to those graph nodes (e.g. only the answer
+        node, not a grader). Closing the iterator early cancels the run.
+        """
+        graph = await self.graph(name)
+        async with self._run(thread_id):
+            run = graph.astream(
+                self._input(message), self._config(thread_id, config), stream_mode="messages", **kwargs
+            )
+            async with aclosing(run):
+                async for chunk, metadata in run:
+                    if not isinstance(chunk, AIMessageChunk) or not chunk.text:
+                        continue
+                    if nodes is None or metadata.get("langgraph_node") in nodes:
+                        yield chunk.text
+
+    def cancel(self, thread_id: str) -> int:
+        """Cancel the running and queued requests of ``thread_id``; returns how many."""
+        tasks = [task for task in self._tasks.get(thread_id, ()) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def stats(self) -> dict:
+        stats = self._stats
+        latencies = sorted(stats.latencies)
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {
+            "completed": stats.completed,
+            "rejected": stats.rejected,
+            "cancelled": stats.cancelled,
+            "failed": stats.failed,
+            "running": stats.running,
+            "queued": stats.queued,
+            "p50_seconds": percentile(0.50),
+            "p99_seconds": percentile(0.99),
+        }
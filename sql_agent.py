@@ -1,39 +1,46 @@
 import os
-import requests, pathlib
+import pathlib
 from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_community.utilities import SQLDatabase
+from registry import lazy
+from resource_pool import pool
+from sql_cache import QueryCache, SchemaCatalog, SchemaContext, sql_tools
+from sql_pool import ReadOnlySQLitePool
 from dotenv import load_dotenv
 load_dotenv()
 
-llm = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
-
 url = "https://storage.googleapis.com/benchmarks-artifacts/chinook/Chinook.db"
 local_path = pathlib.Path("Chinook.db")
 
-if local_path.exists():
-    print(f"{local_path} already exists, skipping download.")
-else:
-    response = requests.get(url)
-    if response.status_code == 200:
-        local_path.write_bytes(response.content)
-        print(f"File downloaded and saved as {local_path}")
+def download_database():
+    if local_path.exists():
+        print(f"{local_path} already exists, skipping download.")
     else:
-        print(f"Failed to download the file. Status code: {response.status_code}")
-
-db = SQLDatabase.from_uri("sqlite:///Chinook.db")
-
-print(f"Dialect: {db.dialect}")
-print(f"Available tables: {db.get_usable_table_names()}")
-print(f'Sample output: {db.run("SELECT * FROM Artist LIMIT 5;")}')
-
-toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-
-tools = toolkit.get_tools()
-
-for tool in tools:
-    print(f"{tool.name}: {tool.description}\n")
+        response = pool.http_session().get(url)
+        if response.status_code == 200:
+            local_path.write_bytes(response.content)
+            print(f"File downloaded and saved as {local_path}")
+        else:
+            print(f"Failed to download the file. Status code: {response.status_code}")
+
+# The model, database and agent are built on first use.
+@lazy
+def llm():
+    return pool.chat_model("gemini-2.5-flash", model_provider="google_genai")
+
+# The schema is introspected once (and cached on disk until Chinook.db
+# changes); the tables relevant to each question go straight into the prompt,
+# so the agent does not spend model steps listing tables and fetching schemas.
+@lazy
+def catalog():
+    download_database()
+    return SchemaCatalog(local_path, embeddings=pool.embeddings("sentence-transformers/all-MiniLM-L6-v2"))
+
+# Queries run on a pool of read-only connections shared by all sessions; a
+# result is cut off at 200 rows / 16 KB before it reaches the prompt.
+@lazy
+def query_cache():
+    download_database()
+    return QueryCache(local_path, pool=ReadOnlySQLitePool(local_path, size=8, max_rows=200, max_bytes=16_000))
 
 system_prompt = """
 You are an agent designed to interact with a SQL database.
@@ -46,31 +53,38 @@ You can order the results by a relevant column to return the most interesting
 examples in the database. Never query for all the columns from a specific table,
 only ask for the relevant columns given the question.
 
-You MUST double check your query before executing it. If you get an error while
-executing a query, rewrite the query and try again.
+If you get an error while executing a query, rewrite the query and try again.
 
 DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the
 database.
 
-To start you should ALWAYS look at the tables in the database to see what you
-can query. Do NOT skip this step.
+The schemas of the tables most relevant to the question are given below, so
+you can usually write the query right away. Only use sql_db_schema for a table
+that is listed but whose schema is not shown.
+"""
+
+@lazy
+def agent():
+    return create_agent(
+        llm.get(),
+        sql_tools(catalog.get(), query_cache.get()),
+        system_prompt=system_prompt.format(dialect="SQLite", top_k=5),
+        middleware=[SchemaContext(catalog.get())],
+    )
+
+if __name__ == "__main__":
+    download_database()
 
-Then you should query the schema of the most relevant tables.
-""".format(
-    dialect=db.dialect,
-    top_k=5,
-)
+    print(f"Available tables: {catalog.table_names()}")
+    print(f'Sample output: {query_cache.run("SELECT * FROM Artist LIMIT 5;").format()}')
 
-agent = create_agent(
-    llm,
-    tools,
-    system_prompt=system_prompt,
-)
+    question = "Which genre on average has the longest tracks?"
 
-question = "Which genre on average has the longest tracks?"
+    for step in agent.stream(
+        {"messages": [{"role": "user", "content": question}]},
+        stream_mode="values",
+    ):
+        step["messages"][-1].pretty_print()
 
-for step in agent.stream(
-    {"messages": [{"role": "user", "content": question}]},
-    stream_mode="values",
-):
-    step["messages"][-1].pretty_print()
\ No newline at end of file
+    print(f"Query cache: {query_cache.stats()}")
+    print(f"Query timings: {query_cache.pool.stats()}")
\ No newline at end of file
@@ -0,0 +1,337 @@
+"""
+SQL Schema Catalog and Query Cache
+
+Removes the discovery round-trips from the SQL agent. With
+``SQLDatabaseToolkit`` every question starts with ``sql_db_list_tables``,
+``sql_db_schema`` and ``sql_db_query_checker`` calls, each one a model step,
+before the real query runs. Here:
+
+- :class:`SchemaCatalog` introspects a SQLite database once into a compact
+  per-table description (columns, keys, foreign keys, row count, sample rows),
+  saved as JSON under ``.cache/sql``. It is rebuilt only when the database file
+  changes. :meth:`SchemaCatalog.relevant` picks the tables for a question by
+  embedding similarity, plus any bridge tables that join them.
+- :class:`SchemaContext` middleware appends those table descriptions to the
+  system prompt, so the agent can write its query on the first step.
+- :class:`QueryCache` runs read-only ``SELECT``s on a
+  :class:`sql_pool.ReadOnlySQLitePool` and keeps their (row/byte budgeted)
+  results, keyed by the normalized SQL. The cache is dropped whenever the
+  database file's mtime (or that of its WAL) changes.
+
+    catalog = SchemaCatalog("Chinook.db", embeddings=pool.embeddings())
+    cache = QueryCache("Chinook.db")
+    agent = create_agent(llm, sql_tools(catalog, cache), system_prompt=..., middleware=[SchemaContext(catalog)])
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from langchain.agents.middleware import AgentMiddleware, ModelRequest
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import BaseTool, tool
+
+from sql_pool import QueryResult, ReadOnlySQLitePool, connect_read_only
+
+DEFAULT_CACHE_DIR = ".cache/sql"
+
+_LITERALS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_WRITE_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|replace\s+into|create|drop|alter|attach|detach|pragma|vacuum|reindex)\b"
+)
+
+
+def database_version(path: str | os.PathLike) -> list[int]:
+    """``(mtime_ns, size)`` of the database file and its non-empty WAL; changes on every write."""
+    version = []
+    for suffix in ("", "-wal"):
+        try:
+            stat = os.stat(f"{path}{suffix}")
+        except FileNotFoundError:
+            continue
+        if suffix and not stat.st_size:
+            continue
+        version += [stat.st_mtime_ns, stat.st_size]
+    return version
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and case outside string literals; drop the trailing ``;``."""
+    parts = _LITERALS.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part.casefold()) for i, part in enumerate(parts)
+    ).strip()
+
+
+def is_read_only(sql: str) -> bool:
+    """A single ``SELECT``/``WITH`` statement without write keywords."""
+    code = "".join(_LITERALS.split(normalize_sql(sql))[::2])
+    return code.startswith(("select", "with")) and ";" not in code and not _WRITE_KEYWORDS.search(code)
+
+
+def _words(text: str) -> set[str]:
+    """Lower-case words of identifiers and text, camelCase split, plural ``s`` dropped."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    return {w.rstrip("s") if len(w) > 3 else w for w in re.findall(r"[a-z0-9]+", text.lower())}
+
+
+def _introspect(connection: sqlite3.Connection, sample_rows: int) -> dict[str, dict]:
+    tables = {}
+    names = [
+        row[0]
+        for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    for name in names:
+        quoted = '"' + name.replace('"', '""') + '"'
+        foreign = {
+            row[3]: f"{row[2]}.{row[4]}"
+            for row in connection.execute(f"PRAGMA foreign_key_list({quoted})")
+        }
+        columns = [
+            {"name": col, "type": type_, "pk": bool(pk), "references": foreign.get(col)}
+            for _, col, type_, _, _, pk in connection.execute(f"PRAGMA table_info({quoted})")
+        ]
+        rows = connection.execute(f"SELECT count(*) FROM {quoted}").fetchone()[0]
+        samples = connection.execute(f"SELECT * FROM {quoted} LIMIT {sample_rows}").fetchall()
+        tables[name] = {
+            "columns": columns,
+            "rows": rows,
+            "samples": [[v if isinstance(v, (int, float, type(None))) else str(v)[:40] for v in row] for row in samples],
+        }
+    return tables
+
+
+class SchemaCatalog:
+    """Compact, cached description of a SQLite database's tables.
+
+    Args:
+        embeddings: used to match questions to tables; without it tables are
+            ranked by word overlap with their table and column names.
+        cache_dir: where the introspected catalog is kept between runs.
+        sample_rows: example rows shown per table.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        embeddings: Embeddings | None = None,
+        cache_dir: str | os.PathLike | None = DEFAULT_CACHE_DIR,
+        sample_rows: int = 3,
+    ):
+        self.path = Path(path)
+        self.embeddings = embeddings
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.sample_rows = sample_rows
+        self._tables: dict[str, dict] = {}
+        self._version: list[int] | None = None
+        self._vectors: np.ndarray | None = None
+        self._lock = threading.Lock()
+        self.introspections = 0
+
+    def _cache_file(self) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{self.path.resolve().as_posix().strip('/').replace('/', '_')}.json"
+
+    def tables(self) -> dict[str, dict]:
+        """Table name -> ``{"columns", "rows", "samples"}``, refreshed when the database changes."""
+        version = database_version(self.path)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._load(version)
+        return self._tables
+
+    def _load(self, version: list[int]) -> None:
+        cache_file = self._cache_file()
+        cached = None
+        if cache_file is not None and cache_file.exists():
+            cached = json.loads(cache_file.read_text())
+        if cached is not None and cached["version"] == version and cached["sample_rows"] == self.sample_rows:
+            tables = cached["tables"]
+        else:
+            connection = connect_read_only(self.path)
+            try:
+                tables = _introspect(connection, self.sample_rows)
+            finally:
+                connection.close()
+            self.introspections += 1
+            if cache_file is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache_file.with_suffix(".tmp")
+                tmp.write_text(json.dumps({"version": version, "sample_rows": self.sample_rows, "tables": tables}))
+                os.replace(tmp, cache_file)
+        self._tables, self._version, self._vectors = tables, version, None
+
+    def table_names(self) -> list[str]:
+        return list(self.tables())
+
+    def describe(self, names: list[str] | None = None) -> str:
+        """One compact line per table plus its sample rows."""
+        tables = self.tables()
+        lines = []
+        for name in names if names is not None else list(tables):
+            table = tables.get(name)
+            if table is None:
+                lines.append(f"{name}: no such table")
+                continue
+            columns = ", ".join(
+                f"{c['name']} {c['type']}".strip()
+                + (" PK" if c["pk"] else "")
+                + (f" -> {c['references']}" if c["references"] else "")
+                for c in table["columns"]
+            )
+            lines.append(f"{name}({columns}) -- {table['rows']} rows")
+            lines += [f"  {tuple(row)}" for row in table["samples"]]
+        return "\n".join(lines)
+
+    def _table_text(self, name: str) -> str:
+        columns = " ".join(c["name"] for c in self.tables()[name]["columns"])
+        return " ".join(sorted(_words(f"{name} {columns}")))
+
+    def _scores(self, question: str) -> dict[str, float]:
+        names = self.table_names()
+        if self.embeddings is None:
+            words = _words(question)
+            return {name: len(words & set(self._table_text(name).split())) for name in names}
+        if self._vectors is None:
+            vectors = np.asarray(self.embeddings.embed_documents([self._table_text(n) for n in names]), dtype=np.float32)
+            self._vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        scores = self._vectors @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        return dict(zip(names, scores.tolist()))
+
+    def relevant(self, question: str, k: int = 4) -> list[str]:
+        """The ``k`` tables closest to ``question``, plus tables that join two of them."""
+        scores = self._scores(question)
+        chosen = [name for name in sorted(scores, key=scores.get, reverse=True)[:k] if scores[name] > 0]
+        tables = self.tables()
+        for name, table in tables.items():
+            if name in chosen:
+                continue
+            targets = {c["references"].split(".")[0] for c in table["columns"] if c["references"]}
+            if len(targets & set(chosen)) >= 2:
+                chosen.append(name)
+        return chosen
+
+
+class QueryCache:
+    """Results of read-only ``SELECT``s, keyed by normalized SQL and the database version.
+
+    Queries run on ``pool`` (a :class:`ReadOnlySQLitePool` with its default
+    row/byte budget when not given), so cached results are budgeted too.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_entries: int = 1024, pool: ReadOnlySQLitePool | None = None):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.pool = pool if pool is not None else ReadOnlySQLitePool(self.path)
+        self._results: OrderedDict[str, QueryResult] = OrderedDict()
+        self._version: list[int] | None = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def run(self, sql: str) -> QueryResult:
+        """The (possibly truncated) result of ``sql``; raises ``ValueError`` for anything but a read-only query."""
+        if not is_read_only(sql):
+            raise ValueError("Only single read-only SELECT statements are allowed.")
+        key = normalize_sql(sql)
+        version = database_version(self.path)
+        with self._lock:
+            if version != self._version:
+                if self._results:
+                    self.invalidations += 1
+                self._results.clear()
+                self._version = version
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return cached
+        result = self.pool.execute(sql)
+        with self._lock:
+            self.misses += 1
+            if version == self._version:
+                self._results[key] = result
+                if len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        return result
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._results),
+        }
+
+
+def sql_tools(catalog: SchemaCatalog, cache: QueryCache) -> list[BaseTool]:
+    """``sql_db_query`` (cached, read-only) and ``sql_db_schema`` (from the catalog)."""
+
+    @tool("sql_db_query")
+    def query(query: str) -> str:
+        """Execute a read-only SQL SELECT query and return the result rows.
+        If the query is not correct, an error message is returned; rewrite the query and try again."""
+        try:
+            result = cache.run(query)
+        except (sqlite3.Error, ValueError, TimeoutError) as exc:
+            return f"Error: {exc}"
+        return result.format()
+
+    @tool("sql_db_schema")
+    def schema(table_names: str) -> str:
+        """Schema and sample rows for a comma-separated list of tables, e.g. 'Album, Artist'.
+        Only needed for tables whose schema is not already in the prompt."""
+        return catalog.describe([name.strip() for name in table_names.split(",") if name.strip()])
+
+    return [query, schema]
+
+
+class SchemaContext(AgentMiddleware):
+    """Appends the schemas of the tables relevant to the user's question to the system prompt."""
+
+    def __init__(self, catalog: SchemaCatalog, k: int = 4, max_questions: int = 256):
+        super().__init__()
+        self.catalog = catalog
+        self.k = k
+        self.max_questions = max_questions
+        self._context: OrderedDict[str, str] = OrderedDict()
+
+    def context(self, question: str) -> str:
+        """Prompt section for ``question`` (memoized: every step of a turn reuses it)."""
+        text = self._context.get(question)
+        if text is None:
+            text = (
+                f"Tables in the database: {', '.join(self.catalog.table_names())}\n\n"
+                "Schemas of the tables most relevant to the question:\n"
+                f"{self.catalog.describe(self.catalog.relevant(question, self.k))}"
+            )
+            self._context[question] = text
+            if len(self._context) > self.max_questions:
+                self._context.popitem(last=False)
+        return text
+
+    def _request(self, request: ModelRequest) -> ModelRequest:
+        question = next((m.text for m in reversed(request.messages) if isinstance(m, HumanMessage)), "")
+        prompt = request.system_message.text if request.system_message is not None else ""
+        return request.override(system_message=SystemMessage(content=f"{prompt}\n\n{self.context(question)}".strip()))
+
+    def wrap_model_call(self, request: ModelRequest, handler):
+        return handler(self._request(request))
+
+    async def awrap_model_call(self, request: ModelRequest, handler):
+        return await handler(self._request(request))
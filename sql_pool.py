@@ -0,0 +1,263 @@
+"""
+Pooled Read-Only SQLite Execution
+
+Query backend for the SQL agent's tools. A pool of read-only connections
+(``mode=ro``, ``PRAGMA query_only``, the database switched to WAL once so
+readers never block on a writer) serves concurrent agent sessions in
+parallel. SQLite releases the GIL while it steps a statement, so queries on
+different connections really do run at the same time.
+
+Rows are streamed from the cursor in batches. Reading stops as soon as
+``max_rows`` rows or ``max_bytes`` of rendered output have been collected, so
+an unbounded ``SELECT *`` costs neither memory nor prompt tokens. The result
+says that it was truncated. Each query can also be given a time limit.
+
+Every query's duration, row count and truncation are recorded;
+:meth:`ReadOnlySQLitePool.stats` exports p50/p99 and totals, and
+:meth:`ReadOnlySQLitePool.timings` the most recent queries.
+
+    pool = ReadOnlySQLitePool("Chinook.db", size=8, max_rows=200, max_bytes=16_000)
+    result = pool.execute("SELECT * FROM Track")
+    print(result.format())          # 200 rows + "... truncated" note
+    print(pool.stats())
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+def connect_read_only(path: str | os.PathLike, timeout: float = 5.0) -> sqlite3.Connection:
+    connection = sqlite3.connect(
+        f"file:{Path(path).resolve()}?mode=ro", uri=True, timeout=timeout, check_same_thread=False
+    )
+    connection.execute("PRAGMA query_only = ON")
+    return connection
+
+
+def enable_wal(path: str | os.PathLike) -> bool:
+    """Switch the database to WAL journaling (persistent); ``False`` if it cannot be written."""
+    if not Path(path).exists():
+        return False
+    try:
+        connection = sqlite3.connect(path)
+    except sqlite3.Error:
+        return False
+    try:
+        mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode != "wal":
+            mode = connection.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        return mode == "wal"
+    except sqlite3.Error:
+        return False
+    finally:
+        connection.close()
+
+
+@dataclass
+class QueryResult:
+    columns: list[str]
+    rows: list[tuple]
+    truncated: bool = False
+    seconds: float = 0.0
+    bytes: int = 0
+    limits: tuple[int, int] = (0, 0)
+
+    def format(self) -> str:
+        """``str(rows)``, as ``SQLDatabase.run`` renders them, plus a note when truncated."""
+        text = str(self.rows)
+        if self.truncated:
+            max_rows, max_bytes = self.limits
+            text += (
+                f"\n... truncated after {len(self.rows)} rows (limit {max_rows} rows / {max_bytes} bytes);"
+                " add a LIMIT, filter or aggregate to see the rest."
+            )
+        return text
+
+
+@dataclass
+class QueryTiming:
+    sql: str
+    seconds: float
+    rows: int
+    truncated: bool
+    error: str | None = None
+
+
+@dataclass
+class _Stats:
+    queries: int = 0
+    errors: int = 0
+    truncated: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=10_000))
+
+
+class ReadOnlySQLitePool:
+    """Up to ``size`` read-only connections, each used by one thread at a time.
+
+    Args:
+        max_rows / max_bytes: default budget per query; reading stops when
+            either is reached.
+        query_timeout: seconds before a running query is interrupted (``None``: no limit).
+        wal: switch the database to WAL up front, if it is writable.
+        batch_size: rows fetched from the cursor per step.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        size: int = 8,
+        max_rows: int = 1000,
+        max_bytes: int = 64_000,
+        query_timeout: float | None = 30.0,
+        wal: bool = True,
+        batch_size: int = 128,
+    ):
+        self.path = Path(path)
+        self.size = size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.query_timeout = query_timeout
+        self.wal = wal
+        self.batch_size = batch_size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._open = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+        self.wal_enabled = enable_wal(self.path) if wal else False
+
+    @contextmanager
+    def connection(self, timeout: float | None = None):
+        """Borrow a connection; waits up to ``timeout`` seconds when all ``size`` are busy."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._open < self.size
+                if create:
+                    self._open += 1
+            if create:
+                try:
+                    connection = connect_read_only(self.path)
+                except BaseException:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                try:
+                    connection = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"all {self.size} connections are busy") from None
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+
+    def execute(
+        self,
+        sql: str,
+        parameters: Any = (),
+        max_rows: int | None = None,
+        max_bytes: int | None = None,
+    ) -> QueryResult:
+        """Run ``sql`` and stream rows until the row or byte budget is reached."""
+        max_rows = self.max_rows if max_rows is None else max_rows
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        start = time.perf_counter()
+        rows: list[tuple] = []
+        size, truncated = 2, False
+        try:
+            with self.connection(timeout=self.query_timeout) as connection:
+                if self.query_timeout is not None:
+                    deadline = start + self.query_timeout
+                    connection.set_progress_handler(lambda: time.perf_counter() > deadline, 10_000)
+                cursor = None
+                try:
+                    cursor = connection.execute(sql, parameters)
+                    columns = [d[0] for d in cursor.description or ()]
+                    while not truncated:
+                        batch = cursor.fetchmany(self.batch_size)
+                        if not batch:
+                            break
+                        for row in batch:
+                            row_size = len(repr(row)) + 2
+                            if len(rows) >= max_rows or size + row_size > max_bytes:
+                                truncated = True
+                                break
+                            rows.append(row)
+                            size += row_size
+                finally:
+                    if cursor is not None:
+                        cursor.close()
+                    connection.set_progress_handler(None, 0)
+        except Exception as exc:
+            self._record(sql, time.perf_counter() - start, 0, False, f"{type(exc).__name__}: {exc}")
+            raise
+        seconds = time.perf_counter() - start
+        self._record(sql, seconds, len(rows), truncated, None)
+        return QueryResult(columns, rows, truncated, seconds, size, (max_rows, max_bytes))
+
+    async def aexecute(self, sql: str, parameters: Any = (), **kwargs: Any) -> QueryResult:
+        return await asyncio.to_thread(self.execute, sql, parameters, **kwargs)
+
+    def _record(self, sql: str, seconds: float, rows: int, truncated: bool, error: str | None) -> None:
+        with self._lock:
+            stats = self._stats
+            stats.queries += 1
+            stats.errors += error is not None
+            stats.truncated += truncated
+            stats.rows += rows
+            stats.seconds += seconds
+            stats.recent.append(QueryTiming(sql, seconds, rows, truncated, error))
+
+    def timings(self, last: int = 100) -> list[QueryTiming]:
+        """The most recent queries, oldest first."""
+        with self._lock:
+            return list(self._stats.recent)[-last:]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = self._stats
+            durations = sorted(t.seconds for t in stats.recent)
+            open_, in_use = self._open, self._in_use
+
+        def percentile(p: float) -> float:
+            return durations[min(len(durations) - 1, int(p * len(durations)))] if durations else 0.0
+
+        return {
+            "queries": stats.queries,
+            "errors": stats.errors,
+            "truncated": stats.truncated,
+            "rows": stats.rows,
+            "total_seconds": stats.seconds,
+            "p50_ms": percentile(0.50) * 1000,
+            "p99_ms": percentile(0.99) * 1000,
+            "connections": open_,
+            "in_use": in_use,
+        }
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._open -= 1
@@ -0,0 +1,476 @@
+"""
+SQLite Checkpointer
+
+Drop-in replacement for ``MemorySaver`` / ``InMemorySaver`` that keeps
+checkpoints in a local SQLite file, so conversations survive a restart and
+process memory stays flat however long a thread runs:
+
+- message deltas: when a list channel (``messages``) only grew since its last
+  stored version, just the appended items are written, chained to that base
+  version. A full copy is written every ``snapshot_every`` deltas, or when
+  messages were replaced or removed, so a resume reads at most that many rows.
+- retention: only the last ``keep_last`` checkpoints (and their pending
+  writes) of each thread/namespace are kept; blobs no kept checkpoint can
+  reach are deleted.
+- write-behind: ``put``/``put_writes`` only queue rows. A background thread
+  commits them in one transaction every ``flush_interval`` seconds or
+  ``batch_size`` rows, and every read flushes first. A crash can lose at most
+  the last ``flush_interval`` of steps. Queueing takes a separate lock from
+  the database, so ``put``/``aput`` never wait for a commit or a prune.
+
+    checkpointer = SQLiteCheckpointer(".cache/checkpoints/rag_agent.sqlite", keep_last=20)
+    agent = create_react_agent(model=llm, tools=tools, checkpointer=checkpointer)
+
+Retention is not ``DeltaChannel``-aware: graphs whose state uses
+``langgraph.channels.DeltaChannel`` should pass ``keep_last=None``.
+"""
+
+import asyncio
+import atexit
+import os
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    "thread_id TEXT, ns TEXT, checkpoint_id TEXT, parent_id TEXT, "
+    "type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB, "
+    "PRIMARY KEY (thread_id, ns, checkpoint_id))",
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    "thread_id TEXT, ns TEXT, channel TEXT, version TEXT, kind TEXT, base TEXT, depth INTEGER, "
+    "type TEXT, data BLOB, PRIMARY KEY (thread_id, ns, channel, version))",
+    "CREATE TABLE IF NOT EXISTS writes ("
+    "thread_id TEXT, ns TEXT, checkpoint_id TEXT, task_id TEXT, idx INTEGER, channel TEXT, "
+    "type TEXT, data BLOB, task_path TEXT, "
+    "PRIMARY KEY (thread_id, ns, checkpoint_id, task_id, idx))",
+)
+
+_CHAIN = (
+    "WITH RECURSIVE chain(version, kind, base, depth, type, data) AS ("
+    " SELECT version, kind, base, depth, type, data FROM blobs"
+    " WHERE thread_id = ? AND ns = ? AND channel = ? AND version = ?"
+    " UNION ALL"
+    " SELECT b.version, b.kind, b.base, b.depth, b.type, b.data FROM blobs b JOIN chain c"
+    " ON c.kind = 'delta' AND b.thread_id = ? AND b.ns = ? AND b.channel = ? AND b.version = c.base"
+    ") SELECT kind, type, data FROM chain ORDER BY depth"
+)
+
+
+def _extends(old: list, new: list) -> bool:
+    return len(new) >= len(old) and all(a is b or a == b for a, b in zip(old, new))
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """File-backed checkpoint saver with message deltas, retention and write-behind.
+
+    Args:
+        path: SQLite database file (parent directories are created).
+        keep_last: checkpoints kept per thread and namespace; ``None`` keeps all.
+        snapshot_every: longest delta chain before a full copy is written.
+        flush_interval: seconds between background commits.
+        batch_size: queued rows that trigger an early commit.
+        max_heads: threads whose latest list values are kept in memory to
+            compute deltas against.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike = ".cache/checkpoints.sqlite",
+        keep_last: int | None = 20,
+        snapshot_every: int = 50,
+        flush_interval: float = 0.2,
+        batch_size: int = 512,
+        max_heads: int = 1024,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.snapshot_every = snapshot_every
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_heads = max_heads
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        # ``_lock`` guards the database, ``_queue_lock`` the queues and heads.
+        # Both are held only as ``_lock`` then ``_queue_lock``.
+        self._lock = threading.RLock()
+        self._queue_lock = threading.Lock()
+        # (thread_id, ns, channel) -> (version, list value, depth)
+        self._heads: OrderedDict[tuple[str, str, str], tuple[str, list, int]] = OrderedDict()
+        self._checkpoints: list[tuple] = []
+        self._blobs: list[tuple] = []
+        self._writes: list[tuple] = []
+        self._touched: set[tuple[str, str]] = set()
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        self.bytes_written = 0
+        self.full_blobs = self.delta_blobs = 0
+
+    # -- write path ----------------------------------------------------------
+
+    def _encode(self, thread_id: str, ns: str, channel: str, version: str, value: Any) -> tuple:
+        key = (thread_id, ns, channel)
+        head = self._heads.pop(key, None)
+        if isinstance(value, list):
+            delta = head is not None and head[2] + 1 < self.snapshot_every and _extends(head[1], value)
+            depth = head[2] + 1 if delta else 0
+            self._heads[key] = (version, list(value), depth)
+            if len(self._heads) > self.max_heads:
+                self._heads.popitem(last=False)
+            if delta:
+                type_, data = self.serde.dumps_typed(value[len(head[1]) :])
+                self.delta_blobs += 1
+                return (thread_id, ns, channel, version, "delta", head[0], depth, type_, data)
+        type_, data = self.serde.dumps_typed(value)
+        self.full_blobs += 1
+        return (thread_id, ns, channel, version, "full", None, 0, type_, data)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        with self._queue_lock:
+            for channel, version in new_versions.items():
+                if channel in values:
+                    row = self._encode(thread_id, ns, channel, version, values[channel])
+                else:
+                    row = (thread_id, ns, channel, version, "empty", None, 0, "empty", b"")
+                self._blobs.append(row)
+                self.bytes_written += len(row[-1])
+            type_, data = self.serde.dumps_typed(c)
+            metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+            self._checkpoints.append(
+                (
+                    thread_id,
+                    ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    data,
+                    metadata_type,
+                    metadata_data,
+                )
+            )
+            self.bytes_written += len(data) + len(metadata_data)
+            self._touched.add((thread_id, ns))
+            self._request_flush()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._queue_lock:
+            for idx, (channel, value) in enumerate(writes):
+                type_, data = self.serde.dumps_typed(value)
+                self._writes.append(
+                    (thread_id, ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, type_, data, task_path)
+                )
+                self.bytes_written += len(data)
+            self._request_flush()
+
+    def _request_flush(self) -> None:
+        if len(self._checkpoints) + len(self._blobs) + len(self._writes) >= self.batch_size:
+            self._wake.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit queued rows and apply retention to the threads they touched."""
+        with self._lock:
+            with self._queue_lock:
+                if not (self._checkpoints or self._blobs or self._writes):
+                    return
+                checkpoints, blobs, writes = self._checkpoints, self._blobs, self._writes
+                touched = self._touched
+                self._checkpoints, self._blobs, self._writes, self._touched = [], [], [], set()
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", blobs)
+                self._db.executemany("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", checkpoints)
+                # regular writes keep their first value, special channels (idx < 0) are replaced
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [w for w in writes if w[4] >= 0],
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [w for w in writes if w[4] < 0],
+                )
+                if self.keep_last is not None:
+                    for thread_id, ns in touched:
+                        self._prune(thread_id, ns)
+
+    def _prune(self, thread_id: str, ns: str) -> None:
+        dropped = [
+            row[0]
+            for row in self._db.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                (thread_id, ns, self.keep_last),
+            )
+        ]
+        if not dropped:
+            return
+        for checkpoint_id in dropped:
+            self._db.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?",
+                (thread_id, ns, checkpoint_id),
+            )
+            self._db.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?",
+                (thread_id, ns, checkpoint_id),
+            )
+        needed: set[tuple[str, str]] = set()
+        for type_, data in self._db.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND ns = ?", (thread_id, ns)
+        ):
+            needed.update(self.serde.loads_typed((type_, data))["channel_versions"].items())
+        bases = {
+            (channel, version): base
+            for channel, version, base in self._db.execute(
+                "SELECT channel, version, base FROM blobs WHERE thread_id = ? AND ns = ?", (thread_id, ns)
+            )
+        }
+        # keep the heads of in-memory delta chains, they are the next base
+        with self._queue_lock:
+            needed.update((key[2], head[0]) for key, head in self._heads.items() if key[:2] == (thread_id, ns))
+        stack = list(needed)
+        while stack:
+            channel, version = stack.pop()
+            base = bases.get((channel, version))
+            if base is not None and (channel, base) not in needed:
+                needed.add((channel, base))
+                stack.append((channel, base))
+        self._db.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND ns = ? AND channel = ? AND version = ?",
+            [(thread_id, ns, channel, version) for channel, version in bases if (channel, version) not in needed],
+        )
+
+    # -- read path -----------------------------------------------------------
+
+    def _load_blobs(self, thread_id: str, ns: str, versions: ChannelVersions, remember: bool) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            rows = self._db.execute(_CHAIN, (thread_id, ns, channel, version, thread_id, ns, channel)).fetchall()
+            if not rows or rows[-1][0] == "empty":
+                continue
+            value = self.serde.loads_typed((rows[0][1], rows[0][2]))
+            for _, type_, data in rows[1:]:
+                value = value + self.serde.loads_typed((type_, data))
+            values[channel] = value
+            if remember and isinstance(value, list):
+                with self._queue_lock:
+                    self._heads[(thread_id, ns, channel)] = (version, list(value), len(rows) - 1)
+        return values
+
+    def _tuple(self, row: tuple, remember: bool = False) -> CheckpointTuple:
+        thread_id, ns, checkpoint_id, parent_id, type_, data, metadata_type, metadata_data = row
+        checkpoint = self.serde.loads_typed((type_, data))
+        writes = self._db.execute(
+            "SELECT task_id, idx, channel, type, data, task_path FROM writes "
+            "WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, ns, checkpoint["channel_versions"], remember),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, d))) for task_id, _, channel, t, d, _ in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            self.flush()
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._db.execute(
+                    "SELECT * FROM checkpoints WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT * FROM checkpoints WHERE thread_id = ? AND ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+            # resuming from the latest checkpoint: continue its delta chains
+            return self._tuple(row, remember=checkpoint_id is None) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query, params = "SELECT * FROM checkpoints WHERE 1 = 1", []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND ns = ?"
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY thread_id, ns, checkpoint_id DESC"
+        with self._lock:
+            self.flush()
+            rows = self._db.execute(query, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._tuple(row)
+            yield item
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.flush()
+            with self._db:
+                for table in ("checkpoints", "blobs", "writes"):
+                    self._db.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            with self._queue_lock:
+                for key in [key for key in self._heads if key[0] == thread_id]:
+                    del self._heads[key]
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -- async: writes only queue rows, reads run in a worker thread ---------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def close(self) -> None:
+        """Flush queued rows, stop the background thread and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self.flush()
+            counts = {
+                table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("checkpoints", "blobs", "writes")
+            }
+        return {
+            **counts,
+            "full_blobs": self.full_blobs,
+            "delta_blobs": self.delta_blobs,
+            "bytes_written": self.bytes_written,
+            "file_bytes": self.path.stat().st_size + self._wal_size(),
+        }
+
+    def _wal_size(self) -> int:
+        wal = self.path.with_name(self.path.name + "-wal")
+        return wal.stat().st_size if wal.exists() else 0
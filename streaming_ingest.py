@@ -0,0 +1,298 @@
+"""
+Streaming Ingestion Pipeline
+
+Bounded-memory alternative to ``loader.load()`` -> ``split_documents`` ->
+``add_documents``. PDF pages are read one at a time, flow through the
+splitter into fixed-size embedding batches and end up in the vector store:
+
+    pages -> split -> batch --queue--> embed --queue--> store.add_vectors
+
+The queues are bounded, so a slow embedder blocks the reader instead of
+letting parsed pages and chunks pile up: only ``queue_size`` batches are in
+flight at any time no matter how many PDFs are fed in. (The store's own
+vector matrix still grows by ``4 * dim`` bytes per chunk.) Every stage
+reports items, busy time and throughput.
+
+Given an :class:`IncrementalIndexer`, the pipeline writes through it:
+unchanged pages are skipped before splitting, chunks get the indexer's ids,
+stale chunks are deleted and the manifest is saved with the store, so a later
+``IncrementalIndexer.update`` (or another run) only embeds what changed.
+
+    python streaming_ingest.py "data/PP Nomor 18 Tahun 2021.pdf" --index .cache/indexes/pp-18-2021
+"""
+
+import argparse
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+
+from incremental_index import IncrementalIndexer, IndexStats
+from vector_store import MmapVectorStore, embed_documents_array
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.items / self.busy_seconds if self.busy_seconds else 0.0
+
+
+@dataclass
+class PipelineStats:
+    stages: dict[str, StageStats] = field(
+        default_factory=lambda: {name: StageStats() for name in ("read", "split", "embed", "write")}
+    )
+    batches: int = 0
+    max_queue_depth: int = 0
+    wall_seconds: float = 0.0
+    index: IndexStats | None = None
+
+    def __str__(self) -> str:
+        lines = [f"{'stage':>6} {'items':>8} {'busy s':>8} {'items/s':>9}"]
+        for name, stage in self.stages.items():
+            lines.append(
+                f"{name:>6} {stage.items:>8} {stage.busy_seconds:>8.2f} {stage.per_second:>9.1f}"
+            )
+        lines.append(
+            f"batches={self.batches} max_queue_depth={self.max_queue_depth} "
+            f"wall={self.wall_seconds:.2f}s"
+        )
+        if self.index is not None:
+            lines.append(str(self.index))
+        return "\n".join(lines)
+
+
+def iter_pdf_pages(paths: Iterable[str]) -> Iterator[Document]:
+    """Yield one ``Document`` per PDF page without loading whole files up front.
+
+    Metadata matches :func:`ingest.load_pdf`.
+    """
+    from pypdf import PdfReader
+
+    for path in paths:
+        reader = PdfReader(path)
+        total = len(reader.pages)
+        labels = reader.page_labels
+        for i, page in enumerate(reader.pages):
+            yield Document(
+                page_content=page.extract_text(),
+                metadata={
+                    "source": str(path),
+                    "total_pages": total,
+                    "page": i,
+                    "page_label": labels[i] if i < len(labels) else str(i + 1),
+                },
+            )
+
+
+class StreamingIngestor:
+    """Run documents through splitter, embedder and store with bounded queues.
+
+    Args:
+        batch_size: chunks per ``embed_documents`` call.
+        queue_size: batches allowed to wait between two stages.
+        embed_workers: threads calling the embedder (useful for remote APIs).
+        indexer: an :class:`IncrementalIndexer` on ``store`` to write through;
+            its splitter is used instead of ``splitter``.
+    """
+
+    def __init__(
+        self,
+        store: MmapVectorStore,
+        splitter: TextSplitter,
+        embedding: Embeddings | None = None,
+        batch_size: int = 64,
+        queue_size: int = 4,
+        embed_workers: int = 1,
+        indexer: IncrementalIndexer | None = None,
+    ):
+        if indexer is not None and indexer.store is not store:
+            raise ValueError("indexer must index the same store")
+        self.store = store
+        self.splitter = splitter
+        self.embedding = embedding or store.embeddings
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.embed_workers = embed_workers
+        self.indexer = indexer
+
+    def _batches(
+        self, documents: Iterable[Document], stats: PipelineStats, seen_keys: set[str], stale: list[str]
+    ) -> Iterator[list[Document]]:
+        read, split = stats.stages["read"], stats.stages["split"]
+        batch: list[Document] = []
+        iterator = iter(documents)
+        while True:
+            start = time.perf_counter()
+            doc = next(iterator, None)
+            read.busy_seconds += time.perf_counter() - start
+            if doc is None:
+                break
+            read.items += 1
+
+            start = time.perf_counter()
+            if self.indexer is None:
+                chunks = self.splitter.split_documents([doc])
+            else:
+                seen_keys.add(self.indexer.key(doc))
+                chunks, stale_ids = self.indexer.diff(doc, stats.index)
+                stale += stale_ids
+            split.busy_seconds += time.perf_counter() - start
+            split.items += len(chunks)
+
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) == self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def run(self, documents: Iterable[Document], cleanup: bool = True) -> PipelineStats:
+        """Consume ``documents`` (any iterable, e.g. :func:`iter_pdf_pages`).
+
+        With an indexer, documents indexed earlier but missing from
+        ``documents`` are removed unless ``cleanup=False``.
+        """
+        stats = PipelineStats(index=IndexStats() if self.indexer is not None else None)
+        seen_keys: set[str] = set()
+        stale: list[str] = []
+        chunks_q: queue.Queue = queue.Queue(self.queue_size)
+        vectors_q: queue.Queue = queue.Queue(self.queue_size)
+        errors: list[BaseException] = []
+        stop = threading.Event()
+        lock = threading.Lock()
+        started = time.perf_counter()
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    with lock:
+                        stats.max_queue_depth = max(stats.max_queue_depth, q.qsize())
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def produce():
+            try:
+                for batch in self._batches(documents, stats, seen_keys, stale):
+                    if not put(chunks_q, batch):
+                        return
+            except BaseException as e:  # surfaced in the calling thread
+                errors.append(e)
+                stop.set()
+            finally:
+                for _ in range(self.embed_workers):
+                    put(chunks_q, _DONE)
+
+        def embed():
+            stage = stats.stages["embed"]
+            try:
+                while (batch := get(chunks_q)) is not _DONE:
+                    start = time.perf_counter()
+                    vectors = embed_documents_array(self.embedding, [d.page_content for d in batch])
+                    with lock:
+                        stage.busy_seconds += time.perf_counter() - start
+                        stage.items += len(batch)
+                    if not put(vectors_q, (vectors, batch)):
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(vectors_q, _DONE)
+
+        threads = [threading.Thread(target=produce, daemon=True)]
+        threads += [threading.Thread(target=embed, daemon=True) for _ in range(self.embed_workers)]
+        for thread in threads:
+            thread.start()
+
+        write = stats.stages["write"]
+        finished = 0
+        try:
+            while finished < self.embed_workers and not stop.is_set():
+                item = get(vectors_q)
+                if item is _DONE:
+                    finished += 1
+                    continue
+                vectors, batch = item
+                start = time.perf_counter()
+                self.store.add_vectors(vectors, batch)
+                write.busy_seconds += time.perf_counter() - start
+                write.items += len(batch)
+                stats.batches += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        if self.indexer is not None:
+            if cleanup:
+                stale += self.indexer.remove_missing(seen_keys, stats.index)
+            self.store.delete(stale)
+            stats.index.documents = stats.stages["read"].items
+            stats.index.chunks_added = write.items
+            stats.index.chunks_deleted = len(stale)
+            self.indexer.save(changed=bool(write.items or stale))
+        stats.wall_seconds = time.perf_counter() - started
+        return stats
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from ann_index import IVFIndex
+    from bm25_index import BM25Index
+    from resource_pool import pool
+
+    parser = argparse.ArgumentParser(description="Stream PDFs into a saved vector index.")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--index", default=".cache/indexes/pp-18-2021")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--embed-workers", type=int, default=2)
+    parser.add_argument("--keep-missing", action="store_true", help="keep indexed PDFs not given here")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # Same embeddings, extras and splitter as semantic_search.py, so the index
+    # and its manifest stay usable by it and by IncrementalIndexer.update.
+    embeddings = pool.embeddings("models/gemini-embedding-001", provider="google_genai")
+    store = MmapVectorStore.open(args.index, embeddings, ann=IVFIndex(nprobe=8), bm25=BM25Index())
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    ingestor = StreamingIngestor(
+        store,
+        splitter,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        embed_workers=args.embed_workers,
+        indexer=IncrementalIndexer(store, splitter),
+    )
+    print(ingestor.run(iter_pdf_pages(args.pdfs), cleanup=not args.keep_missing))
+    print(f"Saved {len(store)} chunks to {args.index}")
+
+if __name__ == "__main__":
+    main()
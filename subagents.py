@@ -0,0 +1,37 @@
+"""
+Sub-Agents as Tools
+
+Wraps a compiled sub-agent as a supervisor tool with both a sync and an async
+implementation. ``create_agent`` dispatches every tool call of one model turn
+as its own task, so when the supervisor asks for several sub-agents in the
+same turn they run concurrently: as asyncio tasks under
+``ainvoke``/``astream`` (the async path calls ``agent.ainvoke``), or on
+LangGraph's thread pool under ``invoke``/``stream`` (bounded by the
+``max_concurrency`` config key). Tool results are applied in tool-call order.
+
+Sub-agents are invoked without their own checkpointer, so they inherit the
+supervisor's: ``HumanInTheLoopMiddleware`` interrupts raised inside a
+sub-agent surface on the supervisor run and resume with
+``Command(resume={interrupt_id: ...})`` as before, one entry per interrupt.
+
+    schedule_event = subagent_tool(calendar_agent, "schedule_event", "Schedule calendar events ...")
+"""
+
+from typing import Any
+
+from langchain_core.runnables import Runnable
+from langchain_core.tools import StructuredTool
+
+
+def subagent_tool(agent: Runnable, name: str, description: str) -> StructuredTool:
+    """Tool that forwards a natural-language ``request`` to ``agent`` and returns its final text."""
+
+    def run(request: str) -> str:
+        result: dict[str, Any] = agent.invoke({"messages": [{"role": "user", "content": request}]})
+        return result["messages"][-1].text
+
+    async def arun(request: str) -> str:
+        result: dict[str, Any] = await agent.ainvoke({"messages": [{"role": "user", "content": request}]})
+        return result["messages"][-1].text
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=description)
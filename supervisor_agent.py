@@ -8,9 +8,13 @@ that are wrapped as tools.
 
 from langchain_core.tools import tool
 from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
 from langchain.agents.middleware import HumanInTheLoopMiddleware 
-from langgraph.checkpoint.memory import InMemorySaver 
+from sqlite_checkpointer import SQLiteCheckpointer
+from subagents import subagent_tool
+from history_window import HistoryWindow
+from registry import lazy
+from resource_pool import pool
+from tool_memo import ToolMemo
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -55,51 +59,67 @@ def get_available_time_slots(
 # Step 2: Create specialized sub-agents
 # ============================================================================
 
-llm = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
-
-calendar_agent = create_agent(
-    llm,
-    tools=[create_calendar_event, get_available_time_slots],
-    system_prompt=(
-        "You are a calendar scheduling assistant. "
-        "Parse natural language scheduling requests (e.g., 'next Tuesday at 2pm') "
-        "into proper ISO datetime formats. "
-        "Use get_available_time_slots to check availability when needed. "
-        "Use create_calendar_event to schedule events. "
-        "Always confirm what was scheduled in your final response."
-    ),
-    middleware=[ 
-        HumanInTheLoopMiddleware( 
-            interrupt_on={"create_calendar_event": True}, 
-            description_prefix="Calendar event pending approval", 
-        ), 
-    ]
-)
+# Availability lookups are read-only, so the same query within a minute is
+# answered from memory; events and emails are never memoized.
+calendar_memo = ToolMemo({"get_available_time_slots": 60})
+
+# Models and agents are built on first use, not at import time; the tools
+# below only reach the sub-agents when they are called.
+@lazy
+def llm():
+    return pool.chat_model("gemini-2.5-flash", model_provider="google_genai")
+
+@lazy
+def calendar_agent():
+    return create_agent(
+        llm.get(),
+        tools=[create_calendar_event, get_available_time_slots],
+        system_prompt=(
+            "You are a calendar scheduling assistant. "
+            "Parse natural language scheduling requests (e.g., 'next Tuesday at 2pm') "
+            "into proper ISO datetime formats. "
+            "Use get_available_time_slots to check availability when needed. "
+            "Use create_calendar_event to schedule events. "
+            "Always confirm what was scheduled in your final response."
+        ),
+        middleware=[ 
+            HumanInTheLoopMiddleware( 
+                interrupt_on={"create_calendar_event": True}, 
+                description_prefix="Calendar event pending approval", 
+            ), 
+            calendar_memo,
+        ]
+    )
 
-email_agent = create_agent(
-    llm,
-    tools=[send_email],
-    system_prompt=(
-        "You are an email assistant. "
-        "Compose professional emails based on natural language requests. "
-        "Extract recipient information and craft appropriate subject lines and body text. "
-        "Use send_email to send the message. "
-        "Always confirm what was sent in your final response."
-    ),
-    middleware=[ 
-        HumanInTheLoopMiddleware( 
-            interrupt_on={"send_email": True}, 
-            description_prefix="Outbound email pending approval", 
-        ), 
-    ]
-)
+@lazy
+def email_agent():
+    return create_agent(
+        llm.get(),
+        tools=[send_email],
+        system_prompt=(
+            "You are an email assistant. "
+            "Compose professional emails based on natural language requests. "
+            "Extract recipient information and craft appropriate subject lines and body text. "
+            "Use send_email to send the message. "
+            "Always confirm what was sent in your final response."
+        ),
+        middleware=[ 
+            HumanInTheLoopMiddleware( 
+                interrupt_on={"send_email": True}, 
+                description_prefix="Outbound email pending approval", 
+            ), 
+        ]
+    )
 
 # ============================================================================
 # Step 3: Wrap sub-agents as tools for the supervisor
 # ============================================================================
 
-@tool
-def schedule_event(request: str) -> str:
+# Both tools have sync and async (ainvoke) paths; independent calls made in the
+# same supervisor turn run concurrently (see subagents.py).
+schedule_event = subagent_tool(
+    calendar_agent,
+    "schedule_event",
     """Schedule calendar events using natural language.
 
     Use this when the user wants to create, modify, or check calendar appointments.
@@ -107,15 +127,12 @@ def schedule_event(request: str) -> str:
 
     Input: Natural language scheduling request (e.g., 'meeting with design team
     next Tuesday at 2pm')
-    """
-    result = calendar_agent.invoke({
-        "messages": [{"role": "user", "content": request}]
-    })
-    return result["messages"][-1].text
-
+    """,
+)
 
-@tool
-def manage_email(request: str) -> str:
+manage_email = subagent_tool(
+    email_agent,
+    "manage_email",
     """Send emails using natural language.
 
     Use this when the user wants to send notifications, reminders, or any email
@@ -124,28 +141,30 @@ def manage_email(request: str) -> str:
 
     Input: Natural language email request (e.g., 'send them a reminder about
     the meeting')
-    """
-    result = email_agent.invoke({
-        "messages": [{"role": "user", "content": request}]
-    })
-    return result["messages"][-1].text
+    """,
+)
 
 
 # ============================================================================
 # Step 4: Create the supervisor agent
 # ============================================================================
 
-supervisor_agent = create_agent(
-    llm,
-    tools=[schedule_event, manage_email],
-    system_prompt=(
-        "You are a helpful personal assistant. "
-        "You can schedule calendar events and send emails. "
-        "Break down user requests into appropriate tool calls and coordinate the results. "
-        "When a request involves multiple actions, use multiple tools in sequence."
-    ),
-    checkpointer=InMemorySaver(), 
-)
+@lazy
+def supervisor_agent():
+    return create_agent(
+        llm.get(),
+        tools=[schedule_event, manage_email],
+        system_prompt=(
+            "You are a helpful personal assistant. "
+            "You can schedule calendar events and send emails. "
+            "Break down user requests into appropriate tool calls and coordinate the results. "
+            "When a request involves multiple independent actions, call all of those tools "
+            "in the same turn so they run in parallel; only wait for one tool's result "
+            "when the next request depends on it."
+        ),
+        middleware=[HistoryWindow(llm.get(), max_tokens=3000)],
+        checkpointer=SQLiteCheckpointer(".cache/checkpoints/supervisor.sqlite", keep_last=20),
+    )
 
 # ============================================================================
 # Step 5: Use the supervisor
@@ -158,27 +177,29 @@ if __name__ == "__main__":
         "and send them an email reminder about reviewing the new mockups."
     )
 
-    config = {"configurable": {"thread_id": "6"}}
-
-    interrupts = []
-                    
-    from langgraph.types import Command 
-
-    resume = {}
-    for interrupt_ in interrupts:
-        for request in interrupt_.value["action_requests"]:
-            print(f"INTERRUPTED: {interrupt_.id}")
-            print(f"{request['description']}\n")
-
-    for step in supervisor_agent.stream(
-        Command(resume=resume), 
-        config,
-    ):
-        for update in step.values():
-            if isinstance(update, dict):
-                for message in update.get("messages", []):
-                    message.pretty_print()
-            else:
-                interrupt_ = update[0]
-                interrupts.append(interrupt_)
+    config = {"configurable": {"thread_id": "6"}, "max_concurrency": 4}
+
+    def run(command) -> list:
+        interrupts = []
+        for step in supervisor_agent.stream(command, config):
+            for update in step.values():
+                if isinstance(update, dict):
+                    for message in update.get("messages", []):
+                        message.pretty_print()
+                else:
+                    interrupts.extend(update)
+        return interrupts
+
+    # Sub-agents that ran in parallel may each raise an approval interrupt;
+    # approve all of them in one resume.
+    interrupts = run({"messages": [{"role": "user", "content": query}]})
+    while interrupts:
+        resume = {}
+        for interrupt_ in interrupts:
+            for request in interrupt_.value["action_requests"]:
                 print(f"\nINTERRUPTED: {interrupt_.id}")
+                print(f"{request['description']}\n")
+            resume[interrupt_.id] = {
+                "decisions": [{"type": "approve"} for _ in interrupt_.value["action_requests"]]
+            }
+        interrupts = run(Command(resume=resume))
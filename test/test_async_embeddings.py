@@ -0,0 +1,95 @@
+"""
+Tests for the concurrent Gemini embedding client
+"""
+import asyncio
+import json
+
+import httpx
+
+from async_embeddings import GeminiBatchEmbeddings, TokenBucket
+
+
+def vector_of(text):
+    return [float(len(text)), float(text.count("a"))]
+
+
+class FakeGemini:
+    """``batchEmbedContents`` stand-in that can fail the first few calls."""
+
+    def __init__(self, fail_first=0, status=429, delay=0.0):
+        self.fail_first = fail_first
+        self.status = status
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, request):
+        await asyncio.sleep(self.delay)
+        body = json.loads(request.content)
+        texts = [r["content"]["parts"][0]["text"] for r in body["requests"]]
+        self.calls.append(texts)
+        if len(self.calls) <= self.fail_first:
+            return httpx.Response(self.status, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"embeddings": [{"values": vector_of(t)} for t in texts]})
+
+
+def client(server, **kwargs):
+    kwargs.setdefault("requests_per_minute", None)
+    kwargs.setdefault("tokens_per_minute", None)
+    return GeminiBatchEmbeddings(api_key="test", transport=httpx.MockTransport(server), backoff=0.001, **kwargs)
+
+
+def test_batches_deduplicates_and_keeps_order():
+    """Test that duplicates are sent once, batches respect max_batch and order is kept"""
+    server = FakeGemini()
+    embeddings = client(server, max_batch=4)
+    texts = [f"text {i % 7} " + "a" * i for i in range(10)] + ["dup", "dup", "dup"]
+    try:
+        assert embeddings.embed_documents(texts) == [vector_of(t) for t in texts]
+        assert embeddings.embed_query("aa") == vector_of("aa")
+    finally:
+        embeddings.close()
+    sent = [t for call in server.calls[:-1] for t in call]
+    assert sorted(sent) == sorted(set(texts))
+    assert all(len(call) <= 4 for call in server.calls)
+
+
+def test_retries_rate_limit_and_server_errors():
+    """Test that 429 and 5xx responses are retried until they succeed"""
+    for status in (429, 503):
+        server = FakeGemini(fail_first=2, status=status)
+        embeddings = client(server)
+        try:
+            assert embeddings.embed_documents(["a", "b"]) == [vector_of("a"), vector_of("b")]
+            assert embeddings.stats.retries == 2
+        finally:
+            embeddings.close()
+
+
+def test_concurrent_callers_share_inflight_requests():
+    """Test that identical texts requested concurrently hit the API once"""
+    server = FakeGemini(delay=0.05)
+    embeddings = client(server)
+
+    async def run():
+        return await asyncio.gather(*(embeddings.aembed_documents(["same", "other"]) for _ in range(5)))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        embeddings.close()
+    assert all(r == [vector_of("same"), vector_of("other")] for r in results)
+    assert len(server.calls) == 1
+    assert embeddings.stats.inflight_dedup == 8
+
+
+def test_token_bucket_limits_rate():
+    """Test that the bucket spaces out acquisitions beyond its burst capacity"""
+    async def run():
+        bucket = TokenBucket(rate=100, capacity=1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(6):
+            await bucket.acquire()
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.04
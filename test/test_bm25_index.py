@@ -0,0 +1,104 @@
+"""
+Tests for the BM25 keyword index and hybrid retrieval
+"""
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from bm25_index import BM25Index, HybridRetriever, is_keyword_query, reciprocal_rank_fusion, tokenize
+from vector_store import MmapVectorStore
+
+TEXTS = [
+    "BAB III Pasal 4 Pekerja berhak atas upah",
+    "Pasal 14 mengatur waktu kerja lembur",
+    "Pasal 40 ayat 2 tentang pemutusan hubungan kerja",
+    "Ketentuan umum mengenai perjanjian kerja waktu tertentu",
+]
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_tokenize_adds_numbered_bigrams():
+    """Test that article/chapter numbers (also Roman) become bigram terms"""
+    assert {"pasal 4", "bab 3"} <= set(tokenize("BAB III Pasal 4"))
+    assert not any(" " in term for term in tokenize("Model v ablation and figure i"))
+    assert is_keyword_query("Apa isi bab 3 pasal 4?")
+    assert not is_keyword_query("What is task decomposition?")
+    assert is_keyword_query("What does Section 2 say?") and is_keyword_query('find "reward hacking"')
+    for question in ["revenue in 2023", "top 5 agents", "chain of thought step 2"]:
+        assert not is_keyword_query(question)
+
+
+def test_keyword_search_finds_exact_article():
+    """Test that 'pasal 4' ranks the article above pasal 14/40"""
+    store = MmapVectorStore(DeterministicFakeEmbedding(size=16), bm25=BM25Index())
+    store.add_texts(TEXTS)
+    docs = [doc.page_content for doc, _ in store.keyword_search_with_score("Apa isi bab 3 pasal 4?", k=2)]
+    assert docs[0] == TEXTS[0]
+
+
+def test_incremental_updates_and_persistence(tmp_path):
+    """Test that deletes, saves (compaction) and reloads keep the index in sync"""
+    store = MmapVectorStore(DeterministicFakeEmbedding(size=16), bm25=BM25Index())
+    ids = store.add_texts(TEXTS)
+    store.delete([ids[0]])
+    assert all(doc.id != ids[0] for doc, _ in store.keyword_search_with_score("pasal 4", k=4))
+    store.save(tmp_path / "index")
+
+    loaded = MmapVectorStore.load(tmp_path / "index", DeterministicFakeEmbedding(size=16))
+    assert [d.page_content for d, _ in loaded.keyword_search_with_score("lembur", k=1)] == [TEXTS[1]]
+    loaded.add_texts(["Pasal 4 yang baru tentang upah minimum"])
+    assert "baru" in loaded.keyword_search_with_score("pasal 4 upah", k=1)[0][0].page_content
+
+
+def test_bm25_built_for_index_saved_without_it(tmp_path):
+    """Test that loading an older index with bm25=BM25Index() builds the keyword index"""
+    MmapVectorStore.from_texts(TEXTS, DeterministicFakeEmbedding(size=16)).save(tmp_path / "old")
+    loaded = MmapVectorStore.load(tmp_path / "old", DeterministicFakeEmbedding(size=16), bm25=BM25Index())
+    assert loaded.keyword_search_with_score("lembur", k=1)[0][0].page_content == TEXTS[1]
+
+
+def test_hybrid_retriever_skips_embedding_for_keyword_queries():
+    """Test that article lookups never call the embedder and other queries are fused"""
+    embedding = CountingEmbedding(size=16)
+    store = MmapVectorStore(embedding, bm25=BM25Index())
+    store.add_texts(TEXTS)
+    retriever = HybridRetriever(vectorstore=store, k=2)
+    assert retriever.invoke("Apa isi pasal 14?")[0].page_content == TEXTS[1]
+    assert embedding.calls == 0
+    assert len(retriever.invoke("perjanjian kerja")) == 2
+    assert embedding.calls == 1
+
+
+def test_reciprocal_rank_fusion():
+    """Test that ids ranked well in both lists win"""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"]])
+    assert fused[0][0] == "b"
+
+
+def test_many_small_adds_match_one_batch():
+    """Test that postings buffered over many adds search like a single add"""
+    one, many = BM25Index(), BM25Index()
+    one.add(TEXTS * 50, 0)
+    for i, text in enumerate(TEXTS * 50):
+        many.add([text], i)
+    assert len(many._pending) == 200
+    rows, scores = many.search("pasal 4 upah", k=5)
+    expected_rows, expected_scores = one.search("pasal 4 upah", k=5)
+    assert rows.tolist() == expected_rows.tolist() and scores.tolist() == expected_scores.tolist()
+    assert not many._pending and len(many) == 200
+
+
+def test_search_scores_only_matched_rows():
+    """Test that scores are summed per matched row and unmatched queries return nothing"""
+    index = BM25Index()
+    index.add(TEXTS, 0)
+    rows, scores = index.search("pasal kerja", k=4)
+    assert sorted(rows.tolist()) == [0, 1, 2, 3]
+    assert rows[0] in (1, 2) and list(scores) == sorted(scores, reverse=True)
+    rows, scores = index.search("tidak ada", k=4)
+    assert len(rows) == len(scores) == 0
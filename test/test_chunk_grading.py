@@ -0,0 +1,61 @@
+"""
+Tests for per-chunk relevance grading
+"""
+import time
+
+from langchain_core.documents import Document
+
+from chunk_grading import GradingStats, grade_chunks
+
+
+def test_keeps_only_relevant_chunks_in_order():
+    """Test that irrelevant chunks are dropped and retrieval order is kept"""
+    docs = [Document(page_content=t) for t in ["reward hacking", "diffusion", "reward tampering", "video"]]
+    result = grade_chunks(docs, lambda d: "reward" in d.page_content)
+    assert [d.page_content for d in result.relevant] == ["reward hacking", "reward tampering"]
+    assert result.graded == 4
+    assert result.skipped == 0
+
+
+def test_grades_concurrently_and_short_circuits():
+    """Test that grading runs in parallel and stops once enough chunks are relevant"""
+    docs = [Document(page_content=str(i)) for i in range(12)]
+
+    def slow(doc):
+        time.sleep(0.2 if int(doc.page_content) < 4 else 1.0)
+        return True
+
+    start = time.perf_counter()
+    result = grade_chunks(docs, slow, min_relevant=2, max_workers=12)
+    assert time.perf_counter() - start < 0.6
+    assert len(result.relevant) >= 2
+    assert result.skipped > 0
+
+
+def test_short_circuit_keeps_rank_order():
+    """Test that a slow higher-ranked relevant chunk is waited for instead of a faster lower-ranked one"""
+    docs = [Document(page_content=str(i)) for i in range(6)]
+
+    def grade(doc):
+        time.sleep(0.3 if doc.page_content == "0" else 0.01)
+        return doc.page_content != "1"
+
+    result = grade_chunks(docs, grade, min_relevant=2, max_workers=6)
+    assert [d.page_content for d in result.relevant] == ["0", "2"]
+    assert result.graded + result.skipped == 6
+
+
+def test_no_documents():
+    """Test that an empty retrieval grades nothing"""
+    assert grade_chunks([], lambda d: True).relevant == []
+
+
+def test_stats_accumulate_over_calls():
+    """Test that GradingStats totals graded, skipped and relevant chunks across calls"""
+    stats = GradingStats()
+    docs = [Document(page_content=str(i)) for i in range(4)]
+    stats.record(grade_chunks(docs, lambda d: d.page_content in "02"))
+    stats.record(grade_chunks([], lambda d: True))
+    report = stats.stats()
+    assert report["calls"] == 2 and report["chunks"] == report["graded"] == 4
+    assert report["relevant"] == 2 and report["relevant_rate"] == 0.5
@@ -0,0 +1,84 @@
+"""
+Tests for the persistent embedding cache
+"""
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from embedding_cache import CachedEmbeddings
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+
+def test_restart_does_zero_embedding_calls(tmp_path):
+    """Test that a second process start serves every chunk from disk"""
+    base = CountingEmbedding(size=16)
+    first = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake")
+    vectors = first.embed_documents(["alpha", "beta", "alpha"])
+    assert base.calls == 2
+    first.cache.close()
+
+    second = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake")
+    assert second.embed_documents(["alpha", "beta", "alpha"]) == vectors
+    assert base.calls == 2
+    assert second.stats()["hits"] == 3
+    assert second.stats()["misses"] == 0
+
+
+def test_lru_eviction(tmp_path):
+    """Test that the least recently used vector is evicted at the size limit"""
+    base = CountingEmbedding(size=4)
+    embeddings = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake", max_entries=2)
+    embeddings.embed_documents(["a", "b"])
+    embeddings.embed_documents(["a"])
+    embeddings.embed_documents(["c"])
+    assert len(embeddings.cache) == 2
+
+    base.calls = 0
+    embeddings.embed_documents(["a", "c"])
+    assert base.calls == 0
+    embeddings.embed_documents(["b"])
+    assert base.calls == 1
+
+
+def test_free_slots_survive_restart(tmp_path):
+    """Test that evicted and cleared slots are reused and every key keeps its own vector"""
+    base = CountingEmbedding(size=4)
+    embeddings = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake", max_entries=3)
+    texts = [f"text {i}" for i in range(5)]
+    expected = np.asarray(base.embed_documents(texts), dtype=np.float32).tolist()
+    embeddings.embed_documents(texts)
+    embeddings.cache.close()
+
+    embeddings = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake", max_entries=3)
+    assert len(embeddings.cache) == 3 and len(embeddings.cache._free) == 0
+    assert embeddings.embed_documents(texts) == expected
+    slots = [slot for (slot,) in embeddings.cache._db.execute("SELECT slot FROM entries")]
+    assert sorted(slots) == [0, 1, 2]
+    embeddings.cache.clear()
+    assert len(embeddings.cache) == 0
+    assert embeddings.embed_documents(texts[:2]) == expected[:2]
+
+
+def test_hits_write_last_used_in_batches(tmp_path):
+    """Test that cache hits do not write to SQLite until a put, close or full batch"""
+    base = CountingEmbedding(size=4)
+    embeddings = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake", max_entries=2)
+    embeddings.embed_documents(["a", "b"])
+    db = embeddings.cache._db
+    changes = db.total_changes
+    for _ in range(10):
+        embeddings.embed_documents(["a"])
+    assert db.total_changes == changes
+    embeddings.cache.close()
+
+    embeddings = CachedEmbeddings(base, cache_dir=tmp_path, model_name="fake", max_entries=2)
+    embeddings.embed_documents(["c"])
+    base.calls = 0
+    embeddings.embed_documents(["a"])
+    assert base.calls == 0
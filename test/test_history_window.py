@@ -0,0 +1,84 @@
+"""
+Tests for the conversation history window
+"""
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from history_window import HistoryWindow
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+class Summarizer:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return f"summary {len(self.prompts)}"
+
+
+def conversation(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"question {i} " + "q " * 8, id=f"h{i}"))
+        messages.append(AIMessage(content=f"answer {i} " + "a " * 8, id=f"a{i}"))
+    return messages
+
+
+def test_short_history_is_passed_through():
+    """Test that a history within budget is sent unchanged and nothing is summarized"""
+    summarizer = Summarizer()
+    window = HistoryWindow(summarizer, max_tokens=100, token_counter=words)
+    messages = conversation(2)
+    assert window.window(messages) == messages
+    assert summarizer.prompts == []
+
+
+def test_window_stays_within_budget_and_summarizes_incrementally():
+    """Test that prompts stay bounded and each summary update only covers newly evicted messages"""
+    summarizer = Summarizer()
+    window = HistoryWindow(summarizer, max_tokens=100, keep_tokens=50, token_counter=words)
+    messages = conversation(30)
+    for end in range(1, len(messages) + 1):
+        sent = window.window(messages[:end])
+        assert sum(window.count_tokens(m) for m in sent) <= 100
+        assert sent[-1] is messages[end - 1]
+    assert 0 < len(summarizer.prompts) < 30
+    # the second update folds the first summary in and does not repeat turn 0
+    assert "summary 1" in summarizer.prompts[1]
+    assert "question 0 " not in summarizer.prompts[1]
+    assert window.stats()["tokens_sent"] < window.stats()["tokens_in"] / 3
+
+
+def test_cut_does_not_orphan_tool_results():
+    """Test that the window never starts with a ToolMessage"""
+    window = HistoryWindow(Summarizer(), max_tokens=30, keep_tokens=12, token_counter=words)
+    call = AIMessage(content="", tool_calls=[{"name": "lookup", "args": {"q": "x"}, "id": "c1"}], id="ai")
+    messages = conversation(2) + [call, ToolMessage(content="r " * 10, tool_call_id="c1", id="tool")]
+    sent = window.window(messages)
+    assert not isinstance(sent[1], ToolMessage)
+    assert sent[-1].id == "tool"
+
+
+def test_middleware_windows_model_input_but_keeps_state():
+    """Test that create_agent sees the window while the checkpointed history stays complete"""
+    seen = []
+
+    class RecordingModel(GenericFakeChatModel):
+        def _generate(self, messages, *args, **kwargs):
+            seen.append(len(messages))
+            return super()._generate(messages, *args, **kwargs)
+
+    model = RecordingModel(messages=iter([AIMessage(content="a " * 9) for _ in range(10)]))
+    window = HistoryWindow(Summarizer(), max_tokens=60, keep_tokens=30, token_counter=words)
+    agent = create_agent(model, tools=[], middleware=[window], checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "t"}}
+    for _ in range(8):
+        result = agent.invoke({"messages": [{"role": "user", "content": "q " * 9}]}, config)
+    assert len(result["messages"]) == 16
+    assert max(seen) <= 7
@@ -0,0 +1,107 @@
+"""
+Tests for incremental re-indexing
+"""
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from incremental_index import IncrementalIndexer
+from vector_store import MmapVectorStore
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+
+def corpus(n=20):
+    return [
+        Document(
+            page_content=" ".join(f"doc{i} sentence {j}." for j in range(30)),
+            metadata={"source": f"https://example.com/{i}"},
+        )
+        for i in range(n)
+    ]
+
+
+def open_indexer(path, embedding, chunk_size=120, add_start_index=False):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=20, add_start_index=add_start_index
+    )
+    return IncrementalIndexer(MmapVectorStore.open(path, embedding), splitter)
+
+
+def test_only_changed_documents_are_reembedded(tmp_path):
+    """Test that a small edit only embeds the chunks that changed"""
+    embedding = CountingEmbedding(size=8)
+    docs = corpus()
+    first = open_indexer(tmp_path, embedding).update(docs)
+    total = len(MmapVectorStore.load(tmp_path, embedding))
+    assert first.chunks_added == total == embedding.calls
+
+    embedding.calls = 0
+    assert open_indexer(tmp_path, embedding).update(docs).chunks_added == 0
+    assert embedding.calls == 0
+
+    docs[3] = Document(page_content=docs[3].page_content + " extra tail.", metadata=docs[3].metadata)
+    stats = open_indexer(tmp_path, embedding).update(docs[:-1])
+    assert stats.changed_documents == 1
+    assert stats.removed_documents == 1
+    assert 0 < embedding.calls < 5
+
+    store = MmapVectorStore.load(tmp_path, embedding)
+    sources = {doc.metadata["source"] for doc in store.similarity_search("doc19", k=len(store))}
+    assert "https://example.com/19" not in sources
+    assert any("extra tail" in d.page_content for d in store.similarity_search("extra tail", k=len(store)))
+
+
+def test_splitter_change_rebuilds(tmp_path):
+    """Test that changing chunk_size invalidates every fingerprint"""
+    embedding = CountingEmbedding(size=8)
+    open_indexer(tmp_path, embedding).update(corpus(3))
+    stats = open_indexer(tmp_path, embedding, chunk_size=200).update(corpus(3))
+    assert stats.changed_documents == 3
+    store = MmapVectorStore.load(tmp_path, embedding)
+    assert len(store) == stats.chunks_added
+
+
+def test_index_without_manifest_is_adopted(tmp_path):
+    """Test that an index saved without a manifest is kept and not re-embedded"""
+    embedding = CountingEmbedding(size=8)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=120, chunk_overlap=20)
+    splits = splitter.split_documents(corpus(3))
+    MmapVectorStore.load_or_build(tmp_path, embedding, lambda: splits)
+    embedding.calls = 0
+
+    indexer = open_indexer(tmp_path, embedding)
+    assert len(indexer.store) == len(splits)
+    stats = indexer.update(corpus(3))
+    assert stats.changed_documents == 3
+    assert stats.chunks_reused == len(splits)
+    assert embedding.calls == 0
+    assert len(MmapVectorStore.load(tmp_path, embedding)) == len(splits)
+    assert open_indexer(tmp_path, embedding).update(corpus(3)).unchanged_documents == 3
+
+
+def test_edit_near_the_top_keeps_later_chunks(tmp_path):
+    """Test that shifting start_index does not re-embed the chunks after an edit"""
+    embedding = CountingEmbedding(size=8)
+    docs = corpus(2)
+    first = open_indexer(tmp_path, embedding, add_start_index=True).update(docs)
+    embedding.calls = 0
+
+    docs[0] = Document(page_content="A" + docs[0].page_content, metadata=docs[0].metadata)
+    stats = open_indexer(tmp_path, embedding, add_start_index=True).update(docs)
+    assert stats.changed_documents == 1
+    assert embedding.calls == stats.chunks_added == 1
+    assert stats.chunks_reused > 0
+    store = MmapVectorStore.load(tmp_path, embedding)
+    assert len(store) == first.chunks_added
+    chunks = sorted(
+        (d for d in store.get_by_ids(store.ids()) if d.metadata["source"].endswith("/0")),
+        key=lambda d: d.metadata["start_index"],
+    )
+    assert all(docs[0].page_content.find(d.page_content) == d.metadata["start_index"] for d in chunks)
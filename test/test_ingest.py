@@ -0,0 +1,82 @@
+"""
+Tests for cached, parallel ingestion against a local HTTP stand-in
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ingest import load_pdf, load_web_documents
+
+PAGES = {
+    "/a": b"<html lang='en'><head><title>A</title></head><body><p>alpha</p></body></html>",
+    "/b": b"<html><head><title>B</title></head><body><p>beta</p></body></html>",
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    hits: list = []
+
+    def do_GET(self):
+        body = PAGES[self.path]
+        etag = f'"{hash(body)}"'
+        self.hits.append((self.path, self.headers.get("If-None-Match") == etag))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_unchanged_pages_skip_download_and_parse(server, tmp_path, monkeypatch):
+    """Test that a second load revalidates with ETag and reuses parsed documents"""
+    pytest.importorskip("bs4")
+    urls = [server + "/a", server + "/b"]
+    first = {}
+    docs = load_web_documents(urls, cache_dir=tmp_path, stats=first)
+    assert [d.metadata["title"] for d in docs] == ["A", "B"]
+    assert "alpha" in docs[0].page_content
+    assert set(first.values()) == {"downloaded+parsed"}
+
+    second = {}
+    again = load_web_documents(urls, cache_dir=tmp_path, stats=second)
+    assert again == docs
+    assert set(second.values()) == {"not_modified"}
+
+    monkeypatch.setitem(PAGES, "/b", b"<html><head><title>B2</title></head><body>changed</body></html>")
+    third = {}
+    docs = load_web_documents(urls, cache_dir=tmp_path, stats=third)
+    assert docs[1].metadata["title"] == "B2"
+    assert third[urls[1]] == "downloaded+parsed"
+
+
+def test_pdf_pages_are_parsed_in_parallel_and_cached(tmp_path):
+    """Test page metadata and that the parsed pages are reused"""
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter()
+    for _ in range(20):
+        writer.add_blank_page(width=200, height=200)
+    path = tmp_path / "doc.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+
+    pages = load_pdf(path, cache_dir=tmp_path / "cache", max_workers=4, pages_per_task=3)
+    assert [p.metadata["page"] for p in pages] == list(range(20))
+    assert pages[0].metadata["total_pages"] == 20
+    assert list((tmp_path / "cache" / "pdf").glob("*.json"))
+    assert load_pdf(path, cache_dir=tmp_path / "cache") == pages
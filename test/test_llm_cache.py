@@ -0,0 +1,155 @@
+"""
+Tests for the exact/semantic LLM response cache
+"""
+import gc
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from llm_cache import ResponseCache, template_fields
+
+
+class BagOfWords(Embeddings):
+    vocab = ["reward", "hacking", "types", "what", "are", "hallucination", "diffusion", "video"]
+
+    def _embed(self, text):
+        words = re.findall(r"\w+", text.lower())
+        return [float(words.count(w)) for w in self.vocab] + [0.01]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def test_exact_tier_ignores_whitespace_and_persists(tmp_path):
+    """Test that a repeated prompt is served from the cache, also after reopening"""
+    cache = ResponseCache(tmp_path)
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+    assert model.invoke("What are  types of\nreward hacking?").content == "first"
+    assert model.invoke("What are types of reward hacking?").content == "first"
+    assert model.invoke("Something else").content == "second"
+    assert cache.stats()["exact_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+    reopened = ResponseCache(tmp_path)
+    model = FakeListChatModel(responses=["first", "second"], cache=reopened)
+    assert model.invoke("Something else").content == "second"
+    assert reopened.stats()["hit_rate"] == 1.0
+
+
+def test_model_configuration_is_part_of_the_key(tmp_path):
+    """Test that a different model configuration does not share answers"""
+    cache = ResponseCache(tmp_path)
+    FakeListChatModel(responses=["a"], cache=cache).invoke("hi")
+    other = FakeListChatModel(responses=["b", "c"], cache=cache, sleep=0.0)
+    assert other.invoke("hi").content == "b"
+    assert other.bind(response_format="GradeDocuments").invoke("hi").content == "c"
+    assert cache.stats()["exact_hits"] == 0
+
+
+def test_semantic_tier_serves_near_duplicates(tmp_path):
+    """Test that a reworded prompt above the threshold is a semantic hit"""
+    cache = ResponseCache(tmp_path, embeddings=BagOfWords(), threshold=0.95)
+    model = FakeListChatModel(responses=["answer", "other answer"], cache=cache)
+    assert model.invoke("What are the types of reward hacking?").content == "answer"
+    assert model.invoke("what are types of reward hacking").content == "answer"
+    assert model.invoke("diffusion video hallucination").content == "other answer"
+    stats = cache.stats()
+    assert stats["semantic_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_semantic_tier_embeds_only_template_fields(tmp_path):
+    """Test that template boilerplate does not make different questions match, and unlisted prompts stay exact"""
+    template = "What are the types of reward hacking? Answer the question: {question}"
+    semantic_text = template_fields({"answer": template})
+    assert semantic_text(template.format(question="diffusion video")) == ("answer", "question: diffusion video")
+    assert semantic_text("What are the types of reward hacking?") is None
+
+    cache = ResponseCache(tmp_path, embeddings=BagOfWords(), threshold=0.95, semantic_text=semantic_text)
+    model = FakeListChatModel(responses=["a", "b", "c", "d"], cache=cache)
+    assert model.invoke(template.format(question="diffusion video")).content == "a"
+    assert model.invoke(template.format(question="hallucination")).content == "b"
+    assert model.invoke(template.format(question="video diffusion!")).content == "a"
+    assert model.invoke("What are the types of reward hacking?").content == "c"
+    assert model.invoke("what are types of reward hacking").content == "d"
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    """Test that entries older than the TTL are not served"""
+    cache = ResponseCache(tmp_path, ttl=0.05)
+    model = FakeListChatModel(responses=["old", "new"], cache=cache)
+    assert model.invoke("q").content == "old"
+    time.sleep(0.1)
+    assert model.invoke("q").content == "new"
+    assert cache.stats()["exact_hits"] == 0
+
+
+def test_semantic_index_is_saved_in_batches(tmp_path):
+    """Test that new semantic entries are written every few updates and on close"""
+    cache = ResponseCache(tmp_path, embeddings=BagOfWords(), save_every=3, save_interval=3600)
+    responses = [f"answer {i}" for i in range(5)]
+    model = FakeListChatModel(responses=responses, cache=cache)
+    for question in ["reward", "hacking", "types", "diffusion", "video"]:
+        model.invoke(question)
+    assert cache.stats()["index_saves"] == 1
+    cache.close()
+    model.invoke("after close")
+    assert cache.stats()["lookups"] == 5
+
+    reopened = ResponseCache(tmp_path, embeddings=BagOfWords(), threshold=0.95)
+    model = FakeListChatModel(responses=responses, cache=reopened)
+    assert model.invoke("video!").content == "answer 4"
+    assert reopened.stats()["semantic_hits"] == 1
+
+
+def test_embedding_runs_outside_the_lock(tmp_path):
+    """Test that concurrent lookups embed their prompts in parallel"""
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    class SlowBagOfWords(BagOfWords):
+        def embed_documents(self, texts):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return super().embed_documents(texts)
+
+    cache = ResponseCache(tmp_path, embeddings=SlowBagOfWords())
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda q: cache.lookup(q, "llm"), ["reward", "hacking", "types", "video"]))
+    assert peak[0] > 1
+
+
+def test_pending_misses_are_bounded(tmp_path, monkeypatch):
+    """Test that misses never followed by an update do not accumulate"""
+    monkeypatch.setattr("llm_cache.MAX_PENDING", 4)
+    cache = ResponseCache(tmp_path)
+    for i in range(10):
+        assert cache.lookup(f"prompt {i}", "llm") is None
+    assert len(cache._pending) == 4
+
+
+def test_unreferenced_cache_is_flushed_and_released(tmp_path):
+    """Test that a dropped cache saves its semantic entries without being kept alive"""
+    cache = ResponseCache(tmp_path, embeddings=BagOfWords(), threshold=0.95)
+    FakeListChatModel(responses=["answer"], cache=cache).invoke("reward hacking")
+    ref = weakref.ref(cache)
+    del cache
+    gc.collect()
+    assert ref() is None
+
+    reopened = ResponseCache(tmp_path, embeddings=BagOfWords(), threshold=0.95)
+    assert FakeListChatModel(responses=["answer"], cache=reopened).invoke("reward hacking!").content == "answer"
+    assert reopened.stats()["semantic_hits"] == 1
@@ -0,0 +1,54 @@
+"""
+Tests for the metadata pre-filter index
+"""
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from metadata_index import MetadataIndex
+from vector_store import MmapVectorStore
+
+
+def make_store():
+    store = MmapVectorStore(DeterministicFakeEmbedding(size=16))
+    texts = [f"chunk {i}" for i in range(60)]
+    metadatas = [{"source": f"doc{i % 2}.pdf", "page": i // 2, "start_index": i * 10} for i in range(60)]
+    ids = store.add_texts(texts, metadatas)
+    return store, ids
+
+
+def test_rows_for_equality_ranges_and_boolean_combinations():
+    """Test that conditions resolve to the right rows"""
+    index = MetadataIndex()
+    index.add([{"source": "a", "page": p} for p in range(5)] + [{"source": "b", "page": 2}], 0)
+    assert index.rows({"source": "a", "page": {"$gte": 1, "$lte": 3}}).tolist() == [1, 2, 3]
+    assert index.rows({"page": {"$in": [0, 4]}}).tolist() == [0, 4]
+    assert index.rows({"$or": [{"source": "b"}, {"page": 0}]}).tolist() == [0, 5]
+    assert index.rows({"source": "missing"}).tolist() == []
+
+
+def test_filtered_search_matches_predicate_filter():
+    """Test that a dict filter returns what the equivalent callable returns"""
+    store, _ = make_store()
+    query = store.embedding.embed_query("chunk 17")
+    by_dict = store.similarity_search_by_vector(
+        query, k=5, filter={"source": "doc1.pdf", "page": {"$gte": 10, "$lte": 20}}
+    )
+    by_callable = store.similarity_search_by_vector(
+        query, k=5, filter=lambda d: d.metadata["source"] == "doc1.pdf" and 10 <= d.metadata["page"] <= 20
+    )
+    assert [d.id for d in by_dict] == [d.id for d in by_callable]
+    assert all(d.metadata["source"] == "doc1.pdf" and 10 <= d.metadata["page"] <= 20 for d in by_dict)
+
+
+def test_filter_skips_deleted_rows_and_survives_save(tmp_path):
+    """Test that deleted rows are excluded and the index is saved compacted"""
+    store, ids = make_store()
+    store.delete(ids[:10])
+    results = store.similarity_search("chunk", k=100, filter={"page": {"$lt": 8}})
+    assert sorted(d.metadata["page"] for d in results) == [5, 5, 6, 6, 7, 7]
+
+    store.save(tmp_path / "index")
+    loaded = MmapVectorStore.load(tmp_path / "index", DeterministicFakeEmbedding(size=16))
+    results = loaded.similarity_search("chunk", k=100, filter={"page": {"$lt": 8}})
+    assert sorted(d.metadata["page"] for d in results) == [5, 5, 6, 6, 7, 7]
+    assert np.array_equal(loaded.metadata_index.rows({"source": "doc0.pdf"})[:2], [0, 2])
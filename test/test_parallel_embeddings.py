@@ -0,0 +1,41 @@
+"""
+Tests for the multi-process embedding backend
+"""
+import numpy as np
+
+import parallel_embeddings
+from parallel_embeddings import ParallelHuggingFaceEmbeddings, pack_batches
+
+
+def test_pack_batches_respects_token_budget():
+    """Test that batches are sorted by length and stay under the padded budget"""
+    lengths = [5, 200, 10, 120, 7, 7, 300, 50]
+    batches = pack_batches(lengths, token_budget=400, max_batch=3, max_length=256)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        longest = max(min(lengths[i], 256) for i in batch)
+        assert len(batch) == 1 or len(batch) * longest <= 400
+        assert len(batch) <= 3
+    assert batches[0] == [6]
+
+
+def fake_init(model_name, model_kwargs, threads):
+    pass
+
+
+def fake_encode(texts, encode_kwargs):
+    return np.array([[len(t), t.count("a")] for t in texts], dtype=np.float32)
+
+
+def test_results_come_back_in_input_order(monkeypatch):
+    """Test that sharded batches are reassembled in the original order"""
+    monkeypatch.setattr(parallel_embeddings, "_init_worker", fake_init)
+    monkeypatch.setattr(parallel_embeddings, "_encode", fake_encode)
+    texts = ["a" * n + "b" * (n % 7) for n in range(1, 60)]
+    embeddings = ParallelHuggingFaceEmbeddings(workers=2, token_budget=64)
+    try:
+        vectors = embeddings.embed_documents(texts)
+        assert vectors == fake_encode(texts, {}).tolist()
+        assert embeddings.embed_query("aab") == [3.0, 2.0]
+    finally:
+        embeddings.close()
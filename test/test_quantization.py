@@ -0,0 +1,41 @@
+"""
+Tests for quantized vector storage
+"""
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from quantization import ProductQuantizer, QuantizedVectorStore, ScalarQuantizer, evaluate_quantization
+
+
+def build_store(quantizer, n=3000, dim=32):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((30, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, 30, n)] + rng.standard_normal((n, dim), dtype=np.float32)
+    store = QuantizedVectorStore(
+        DeterministicFakeEmbedding(size=dim), quantizer=quantizer, rerank=8, min_train=n
+    )
+    store.add_vectors(vectors, [Document(page_content=str(i)) for i in range(n)], [str(i) for i in range(n)])
+    return store, vectors
+
+
+def test_compression_and_recall():
+    """Test memory savings and that re-ranking recovers most of the recall"""
+    for quantizer, ratio in ((ScalarQuantizer(), 4), (ProductQuantizer(dsub=4), 16)):
+        store, vectors = build_store(quantizer)
+        report = evaluate_quantization(store, vectors[:50], k=5)
+        assert report["compression"] == ratio
+        assert report["recall_rerank"] >= 0.9
+        assert report["recall_rerank"] >= report["recall_adc"]
+
+
+def test_codes_persist(tmp_path):
+    """Test that codes and codebooks are saved and reused after load"""
+    store, vectors = build_store(ProductQuantizer(dsub=4))
+    store.delete(["0"])
+    store.save(tmp_path / "index")
+
+    loaded = QuantizedVectorStore.load(tmp_path / "index", store.embedding)
+    assert loaded.quantizer.trained
+    assert loaded._codes.shape == (2999, 8)
+    assert loaded.similarity_search_by_vector(vectors[10], k=1)[0].id == "10"
@@ -0,0 +1,76 @@
+"""
+Tests for the lazy component registry
+"""
+import importlib
+import threading
+import time
+
+import pytest
+
+from registry import Lazy, Registry, lazy, resolve
+
+
+def test_lazy_builds_once_on_first_use():
+    """Test that a Lazy factory runs on first use only, even under concurrent callers."""
+    calls = []
+
+    @lazy
+    def component():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"value": 42}
+
+    assert not component.built and calls == []
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(component.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert component.built and component.seconds >= 0.05
+
+
+def test_lazy_forwards_attributes_and_resets():
+    """Test that attribute access reaches the built object and reset() rebuilds it."""
+    counter = iter(range(10))
+    component = Lazy(lambda: [next(counter)], name="numbers")
+    assert component.count(0) == 1
+    component.reset()
+    assert not component.built
+    assert component.get() == [1]
+    assert repr(component) == "Lazy(numbers, built)"
+
+
+def test_resolve_and_registry():
+    """Test that targets resolve from strings, Lazy objects and factories, once per name."""
+    built = []
+    component = Lazy(lambda: built.append(1) or "graph")
+    registry = Registry({"lazy": component, "factory": lambda: "made", "string": "registry:registry"})
+    assert registry.get("lazy") == "graph"
+    assert registry.get("lazy") == "graph" and built == [1]
+    assert registry.get("factory") == "made"
+    assert registry.get("string") is importlib.import_module("registry").registry
+    assert resolve(component) == "graph"
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+@pytest.mark.parametrize(
+    "module, components",
+    [
+        ("quickstart", ["model", "agent"]),
+        ("rag_agent", ["embeddings", "vector_store", "retrieval_memo", "retriever", "llm", "agent"]),
+        ("custom_rag_agent", ["vectorstore", "retriever_tool", "response_model", "cached_model", "graph"]),
+        ("supervisor_agent", ["llm", "calendar_agent", "email_agent", "supervisor_agent"]),
+        ("sql_agent", ["llm", "catalog", "query_cache", "agent"]),
+    ],
+)
+def test_importing_agent_scripts_builds_nothing(module, components):
+    """Test that importing an agent script builds none of its models, stores or graphs."""
+    module = importlib.import_module(module)
+    for name in components:
+        component = getattr(module, name)
+        assert isinstance(component, Lazy)
+        assert not component.built
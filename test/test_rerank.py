@@ -0,0 +1,51 @@
+"""
+Tests for cross-encoder re-ranking
+"""
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rerank import CrossEncoderReranker, RerankingRetriever
+from vector_store import MmapVectorStore
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words the text contains."""
+
+    def __init__(self):
+        self.pairs = 0
+
+    def predict(self, pairs, batch_size=32):
+        self.pairs += len(pairs)
+        return np.array([sum(w in text.split() for w in query.split()) for query, text in pairs])
+
+
+def test_rerank_orders_by_score_and_caches_pairs(tmp_path):
+    """Test that documents are re-ordered and scored pairs are not re-run"""
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, cache_dir=tmp_path)
+    docs = [Document(page_content=t) for t in ["video model", "reward hacking types", "reward"]]
+    top = reranker.rerank("reward hacking types", docs, k=2)
+    assert [d.page_content for d in top] == ["reward hacking types", "reward"]
+    assert top[0].metadata["rerank_score"] == 3.0
+    assert model.pairs == 3
+
+    again = CrossEncoderReranker(model=model, cache_dir=tmp_path)
+    again.rerank("reward hacking types", docs, k=2)
+    assert model.pairs == 3
+    assert again.stats()["hit_rate"] == 1.0
+
+
+def test_retriever_over_fetches_then_keeps_k():
+    """Test that the retriever re-ranks fetch_k candidates down to k"""
+    store = MmapVectorStore(DeterministicFakeEmbedding(size=16))
+    store.add_texts([f"chunk {i}" for i in range(30)] + ["reward hacking"])
+    retriever = RerankingRetriever(
+        vectorstore=store,
+        reranker=CrossEncoderReranker(model=FakeCrossEncoder(), cache_dir=None),
+        fetch_k=31,
+        k=3,
+    )
+    docs = retriever.invoke("reward hacking")
+    assert len(docs) == 3
+    assert docs[0].page_content == "reward hacking"
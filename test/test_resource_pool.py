@@ -0,0 +1,100 @@
+"""
+Tests for the shared resource pool
+"""
+import socket
+import sys
+import threading
+import time
+from itertools import cycle
+from typing import Any
+
+import pytest
+from langchain_core.caches import InMemoryCache
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import resource_pool
+from resource_pool import ResourcePool, open_connections
+
+
+class ClientChatModel(GenericFakeChatModel):
+    """Fake chat model holding a client object, like the provider integrations."""
+
+    client: Any = None
+
+
+@pytest.fixture
+def fake_init(monkeypatch):
+    created = []
+
+    def init_chat_model(model, model_provider=None, **kwargs):
+        created.append((model, model_provider, kwargs))
+        return ClientChatModel(messages=cycle([AIMessage(content="ok")]), client=object(), **kwargs)
+
+    monkeypatch.setattr(resource_pool, "init_chat_model", init_chat_model)
+    return created
+
+
+def test_shared_builds_each_config_once():
+    """Test that concurrent requests for one config share a single instance."""
+    pool = ResourcePool()
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(pool.shared("model", {"name": "a"}, build)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and all(result is results[0] for result in results)
+    assert pool.shared("model", {"name": "b"}, object) is not results[0]
+    stats = pool.stats()
+    assert stats["instances"] == {"model": 2}
+    assert stats["hits"] == 7 and stats["misses"] == 2
+
+
+def test_chat_model_request_settings_share_the_client(fake_init):
+    """Test that per-request settings get a copy that shares the base client."""
+    pool = ResourcePool()
+    base = pool.chat_model("gemini-2.5-flash", model_provider="google_genai")
+    assert pool.chat_model("gemini-2.5-flash", model_provider="google_genai") is base
+    cache = InMemoryCache()
+    cached = pool.chat_model("gemini-2.5-flash", model_provider="google_genai", cache=cache)
+    assert cached is not base and cached.cache is cache and base.cache is None
+    assert cached.client is base.client
+    assert pool.chat_model("gemini-2.5-flash", model_provider="google_genai", cache=cache) is cached
+    assert len(fake_init) == 1
+    other = pool.chat_model("gemini-2.5-pro", model_provider="google_genai")
+    assert other.client is not base.client and len(fake_init) == 2
+
+
+def test_chat_model_unknown_request_setting_goes_to_constructor(fake_init):
+    """Test that a request setting the model class does not have builds its own instance."""
+    pool = ResourcePool()
+    model = pool.chat_model("m", model_provider="p", temperature=0)
+    assert fake_init[-1] == ("m", "p", {"temperature": 0})
+    assert pool.chat_model("m", model_provider="p", temperature=0) is model
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_stats_report_memory_and_connections():
+    """Test that stats include resident memory and count open TCP connections."""
+    before = open_connections()
+    server = socket.create_server(("127.0.0.1", 0))
+    client = socket.create_connection(server.getsockname())
+    accepted, _ = server.accept()
+    try:
+        stats = ResourcePool().stats()
+        assert stats["rss_mb"] > 0
+        assert stats["connections"] >= before + 2
+    finally:
+        for sock in (client, accepted, server):
+            sock.close()
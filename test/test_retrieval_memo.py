@@ -0,0 +1,101 @@
+"""
+Tests for the per-turn retrieval memo
+"""
+import contextvars
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from langgraph.prebuilt import InjectedState
+
+from retrieval_memo import RetrievalMemo
+from vector_store import MmapVectorStore
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    queries: int = 0
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def make_memo() -> RetrievalMemo:
+    store = MmapVectorStore(CountingEmbeddings(size=16))
+    store.add_documents([Document(page_content=f"chunk {i}") for i in range(30)])
+    return RetrievalMemo(store, fetch_k=10)
+
+
+def test_one_embedding_and_scan_per_query_per_turn():
+    """Test that repeated and smaller searches in a turn reuse the first embedding and scan"""
+    memo = make_memo()
+    with memo.turn([HumanMessage(content="What is task decomposition?", id="turn-1")]) as question:
+        first = memo.similarity_search(question, k=4)
+        assert memo.similarity_search("  what is TASK decomposition? ", k=10)[:4] == first
+        assert memo.similarity_search(question, k=2) == first[:2]
+    assert memo.embeddings.queries == 1
+    stats = memo.stats()
+    assert stats["scans"] == 1
+    assert stats["scans_avoided"] == 2
+    assert stats["embeddings_avoided"] == 2
+
+
+def test_new_turn_and_unscoped_searches_hit_the_store():
+    """Test that the memo does not leak across turns or apply outside a turn"""
+    memo = make_memo()
+    for turn in ("turn-1", "turn-2"):
+        with memo.turn([HumanMessage(content="same question", id=turn)]):
+            memo.similarity_search("same question")
+    memo.similarity_search("same question")
+    assert memo.embeddings.queries == 3
+    assert memo.stats()["result_hits"] == 0
+
+
+def test_prompt_and_tool_share_retrieval_in_agent_run():
+    """Test that the injected context and a tool call for the same query embed once per turn"""
+    from langgraph.prebuilt import create_react_agent
+
+    memo = make_memo()
+
+    @tool
+    def retrieve_context(query: str, state: Annotated[dict, InjectedState]) -> str:
+        """Retrieve information to help answer a query."""
+        with memo.turn(state["messages"]):
+            return "\n".join(doc.page_content for doc in memo.similarity_search(query, k=10))
+
+    def prompt(state):
+        with memo.turn(state["messages"]) as question:
+            docs = memo.similarity_search(question)
+        return [{"role": "system", "content": "\n".join(d.page_content for d in docs)}, *state["messages"]]
+
+    class ToolModel(GenericFakeChatModel):
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    call = {"name": "retrieve_context", "args": {"query": "what is memory?"}, "id": "1"}
+    model = ToolModel(messages=iter([AIMessage(content="", tool_calls=[call]), AIMessage(content="done")]))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        agent = create_react_agent(model, tools=[retrieve_context], prompt=prompt)
+    agent.invoke({"messages": [{"role": "user", "content": "What is memory?"}]})
+    # two model calls and one tool call, all for the same question
+    assert memo.stats()["searches"] == 3
+    assert memo.embeddings.queries == 1
+
+
+def test_from_texts_and_concurrent_searches():
+    """Test that from_texts wraps a new store and concurrent searches in one turn stay consistent"""
+    memo = RetrievalMemo.from_texts([f"chunk {i}" for i in range(30)], CountingEmbeddings(size=16), fetch_k=10)
+    assert isinstance(memo.vectorstore, MmapVectorStore) and memo.fetch_k == 10
+    with memo.turn([HumanMessage(content="q", id="turn-1")]):
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda k: context.copy().run(memo.similarity_search, "q", k), [4] * 16))
+    assert all(result == results[0] for result in results)
+    stats = memo.stats()
+    assert stats["searches"] == 16 and stats["result_hits"] + stats["scans"] == 16
@@ -0,0 +1,103 @@
+"""
+Tests for the async agent server
+"""
+import asyncio
+import time
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+
+from serving import AgentServer, Overloaded
+
+
+class SlowEchoModel(BaseChatModel):
+    """Streams the last user message back word by word."""
+
+    delay: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-echo"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=messages[-1].text))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for word in messages[-1].text.split():
+            await asyncio.sleep(self.delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+def make_server(**kwargs) -> AgentServer:
+    agent = create_agent(SlowEchoModel(), tools=[], checkpointer=InMemorySaver())
+    return AgentServer({"echo": agent}, **kwargs)
+
+
+async def collect(server, thread_id, message):
+    return "".join([token async for token in server.stream("echo", thread_id, message)])
+
+
+def test_streams_tokens_and_keeps_threads_isolated():
+    """Test that tokens stream per request and each thread keeps its own history"""
+    server = make_server()
+
+    async def run():
+        answers = await asyncio.gather(collect(server, "a", "hello there"), collect(server, "b", "bye now"))
+        state_a = await (await server.graph("echo")).aget_state({"configurable": {"thread_id": "a"}})
+        return answers, state_a
+
+    answers, state_a = asyncio.run(run())
+    assert answers == ["hello there ", "bye now "]
+    assert [m.text for m in state_a.values["messages"]] == ["hello there", "hello there "]
+
+
+def test_threads_run_concurrently_but_one_thread_runs_in_order():
+    """Test that different threads overlap while the same thread is serialized"""
+    server = make_server()
+
+    async def timed(thread_ids):
+        start = time.perf_counter()
+        await asyncio.gather(*(collect(server, t, "one two three four") for t in thread_ids))
+        return time.perf_counter() - start
+
+    parallel = asyncio.run(timed(["a", "b", "c", "d"]))
+    serial = asyncio.run(timed(["x", "x", "x", "x"]))
+    assert parallel < 0.5
+    assert serial > 0.75
+
+
+def test_rejects_when_queue_is_full():
+    """Test that requests beyond max_queue are rejected instead of queued"""
+    server = make_server(max_concurrency=1, max_queue=1)
+
+    async def run():
+        return await asyncio.gather(
+            *(collect(server, f"t{i}", "a b c") for i in range(4)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert sum(isinstance(r, Overloaded) for r in results) == 2
+    assert server.stats()["rejected"] == 2
+    assert server.stats()["completed"] == 2
+
+
+def test_cancel_frees_the_slot():
+    """Test that cancelling a thread stops its run and lets queued work proceed"""
+    server = make_server(max_concurrency=1)
+
+    async def run():
+        long = asyncio.create_task(collect(server, "long", " ".join(["w"] * 100)))
+        await asyncio.sleep(0.2)
+        assert server.cancel("long") == 1
+        with pytest.raises(asyncio.CancelledError):
+            await long
+        return await asyncio.wait_for(collect(server, "next", "ok"), 1)
+
+    assert asyncio.run(run()) == "ok "
+    stats = server.stats()
+    assert stats["cancelled"] == 1
+    assert stats["running"] == 0 and stats["queued"] == 0
@@ -0,0 +1,114 @@
+"""
+Tests for the SQL schema catalog and query cache
+"""
+import os
+import sqlite3
+from itertools import cycle
+
+import pytest
+from langchain.agents.middleware import ModelRequest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from sql_cache import QueryCache, SchemaCatalog, SchemaContext, is_read_only, normalize_sql, sql_tools
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "music.db"
+    db = sqlite3.connect(path)
+    db.executescript(
+        """
+        CREATE TABLE Genre (GenreId INTEGER PRIMARY KEY, Name TEXT);
+        CREATE TABLE Playlist (PlaylistId INTEGER PRIMARY KEY, Name TEXT);
+        CREATE TABLE Track (TrackId INTEGER PRIMARY KEY, Name TEXT,
+            GenreId INTEGER REFERENCES Genre(GenreId), Milliseconds INTEGER);
+        CREATE TABLE PlaylistTrack (PlaylistId INTEGER REFERENCES Playlist(PlaylistId),
+            TrackId INTEGER REFERENCES Track(TrackId));
+        CREATE TABLE Employee (EmployeeId INTEGER PRIMARY KEY, LastName TEXT);
+        INSERT INTO Genre VALUES (1, 'Rock'), (2, 'Jazz');
+        INSERT INTO Track VALUES (1, 'A', 1, 1000), (2, 'B', 2, 3000), (3, 'C', 2, 5000);
+        """
+    )
+    db.commit()
+    db.close()
+    return path
+
+
+def test_normalize_and_read_only_check():
+    """Test that SQL is normalized outside literals and only single SELECTs count as read-only."""
+    assert normalize_sql("SELECT  Name\n FROM Track WHERE Name = 'A  b';") == "select name from track where name = 'A  b'"
+    assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert is_read_only("SELECT replace(Name, 'a', 'b') FROM Track")
+    assert is_read_only("SELECT 'drop table' FROM Track")
+    assert not is_read_only("DELETE FROM Track")
+    assert not is_read_only("SELECT 1; DROP TABLE Track")
+
+
+def test_catalog_introspects_once_and_refreshes_on_change(database, tmp_path):
+    """Test that the catalog is reused from disk until the database file changes."""
+    catalog = SchemaCatalog(database, cache_dir=tmp_path / "sql")
+    assert catalog.table_names() == ["Employee", "Genre", "Playlist", "PlaylistTrack", "Track"]
+    assert catalog.introspections == 1
+    assert "GenreId INTEGER -> Genre.GenreId" in catalog.describe(["Track"])
+    assert "-- 3 rows" in catalog.describe(["Track"])
+
+    reopened = SchemaCatalog(database, cache_dir=tmp_path / "sql")
+    assert reopened.tables()["Track"]["rows"] == 3
+    assert reopened.introspections == 0
+
+    db = sqlite3.connect(database)
+    db.execute("INSERT INTO Track VALUES (4, 'D', 1, 2000)")
+    db.commit()
+    db.close()
+    os.utime(database, ns=(os.stat(database).st_atime_ns, os.stat(database).st_mtime_ns + 1_000_000))
+    assert reopened.tables()["Track"]["rows"] == 4
+    assert reopened.introspections == 1
+
+
+def test_relevant_tables_include_bridges(database, tmp_path):
+    """Test that table selection ranks by the question and adds join tables."""
+    catalog = SchemaCatalog(database, cache_dir=None)
+    assert sorted(catalog.relevant("Which genre has the longest tracks?", k=2)) == ["Genre", "Track"]
+    assert "PlaylistTrack" in catalog.relevant("Which playlist has the most tracks?", k=2)
+
+
+def test_query_cache_hits_and_invalidation(database):
+    """Test that equivalent SELECTs share a cached result until the database changes."""
+    cache = QueryCache(database)
+    sql = "SELECT GenreId, AVG(Milliseconds) FROM Track GROUP BY GenreId ORDER BY 2 DESC"
+    result = cache.run(sql)
+    assert result.columns == ["GenreId", "AVG(Milliseconds)"] and result.rows == [(2, 4000.0), (1, 1000.0)]
+    cache.run(sql.lower().replace(" ", "  ") + ";")
+    assert cache.stats()["hits"] == 1
+
+    db = sqlite3.connect(database)
+    db.execute("INSERT INTO Track VALUES (4, 'D', 1, 9000)")
+    db.commit()
+    db.close()
+    os.utime(database, ns=(os.stat(database).st_atime_ns, os.stat(database).st_mtime_ns + 1_000_000))
+    assert cache.run(sql).rows[0] == (1, 5000.0)
+    assert cache.stats()["invalidations"] == 1
+
+    with pytest.raises(ValueError):
+        cache.run("UPDATE Track SET Milliseconds = 0")
+    cache.close()
+
+
+def test_tools_and_schema_context(database):
+    """Test that the tools report errors as text and the middleware injects relevant schemas."""
+    catalog = SchemaCatalog(database, cache_dir=None)
+    query, schema = sql_tools(catalog, QueryCache(database))
+    assert query.invoke({"query": "SELECT Name FROM Genre ORDER BY GenreId"}) == "[('Rock',), ('Jazz',)]"
+    assert query.invoke({"query": "DROP TABLE Genre"}).startswith("Error:")
+    assert query.invoke({"query": "SELECT Nope FROM Genre"}).startswith("Error:")
+    assert schema.invoke({"table_names": "Genre, Missing"}).splitlines()[-1] == "Missing: no such table"
+
+    model = GenericFakeChatModel(messages=cycle([AIMessage(content="ok")]))
+    request = ModelRequest(
+        model=model, messages=[HumanMessage(content="Which genre has the longest tracks?")], system_prompt="Base."
+    )
+    seen = []
+    SchemaContext(catalog, k=2).wrap_model_call(request, lambda r: seen.append(r.system_message.text))
+    assert seen[0].startswith("Base.\n\nTables in the database: Employee, Genre")
+    assert "Track(TrackId INTEGER PK" in seen[0] and "Employee(" not in seen[0]
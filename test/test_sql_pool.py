@@ -0,0 +1,96 @@
+"""
+Tests for the pooled read-only SQLite backend
+"""
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from sql_pool import ReadOnlySQLitePool
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "numbers.db"
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE numbers (n INTEGER, label TEXT)")
+    db.executemany("INSERT INTO numbers VALUES (?, ?)", [(i, f"label {i}") for i in range(10_000)])
+    db.commit()
+    db.close()
+    return path
+
+
+def test_rows_stop_at_row_and_byte_budget(database):
+    """Test that rows are streamed only up to the row or byte budget."""
+    pool = ReadOnlySQLitePool(database, max_rows=25)
+    result = pool.execute("SELECT * FROM numbers")
+    assert len(result.rows) == 25 and result.truncated
+    assert result.columns == ["n", "label"]
+    assert "truncated after 25 rows" in result.format()
+
+    result = pool.execute("SELECT * FROM numbers", max_rows=10_000, max_bytes=500)
+    assert result.truncated and len(result.format().splitlines()[0]) <= 500
+
+    result = pool.execute("SELECT * FROM numbers WHERE n < ?", (25,))
+    assert len(result.rows) == 25 and not result.truncated
+    assert "truncated" not in result.format()
+    pool.close()
+
+
+def test_connections_are_read_only_and_database_uses_wal(database):
+    """Test that the database is switched to WAL and pooled connections cannot write."""
+    pool = ReadOnlySQLitePool(database)
+    assert pool.wal_enabled
+    with pytest.raises(sqlite3.OperationalError):
+        pool.execute("INSERT INTO numbers VALUES (1, 'x')")
+    writer = sqlite3.connect(database)
+    writer.execute("INSERT INTO numbers VALUES (-1, 'new')")
+    writer.commit()
+    assert pool.execute("SELECT count(*) FROM numbers").rows == [(10_001,)]
+    writer.close()
+    pool.close()
+
+
+def test_concurrent_queries_share_a_bounded_pool(database):
+    """Test that concurrent sessions borrow distinct connections, never more than the pool size."""
+    pool = ReadOnlySQLitePool(database, size=3)
+    peak = []
+    barrier = threading.Barrier(3)
+
+    def session():
+        with pool.connection() as connection:
+            barrier.wait(timeout=5)
+            peak.append(pool.stats()["in_use"])
+            connection.execute("SELECT sum(n) FROM numbers").fetchone()
+        for _ in range(5):
+            pool.execute("SELECT sum(n) FROM numbers")
+
+    threads = [threading.Thread(target=session) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = pool.stats()
+    assert max(peak) == 3 and stats["connections"] == 3 and stats["in_use"] == 0
+    assert stats["queries"] == 30
+
+    async def run():
+        return await asyncio.gather(*(pool.aexecute("SELECT max(n) FROM numbers") for _ in range(4)))
+
+    assert [r.rows for r in asyncio.run(run())] == [[(9_999,)]] * 4
+    pool.close()
+
+
+def test_slow_query_is_interrupted_and_timings_are_recorded(database):
+    """Test that a query over its time limit is interrupted and every query is timed."""
+    pool = ReadOnlySQLitePool(database, query_timeout=0.05)
+    with pytest.raises(sqlite3.OperationalError):
+        pool.execute("SELECT count(*) FROM numbers a, numbers b, numbers c")
+    pool.execute("SELECT n FROM numbers LIMIT 3")
+    failed, ok = pool.timings()
+    assert failed.error and failed.rows == 0
+    assert ok.error is None and ok.rows == 3 and ok.seconds > 0
+    stats = pool.stats()
+    assert stats["queries"] == 2 and stats["errors"] == 1 and stats["p99_ms"] >= stats["p50_ms"]
+    pool.close()
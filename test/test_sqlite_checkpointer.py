@@ -0,0 +1,142 @@
+"""
+Tests for the SQLite checkpointer
+"""
+import asyncio
+import threading
+
+import pytest
+from langchain.agents import create_agent
+from langchain.agents.middleware import HumanInTheLoopMiddleware
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
+
+from sqlite_checkpointer import SQLiteCheckpointer
+
+
+@pytest.fixture
+def open_saver():
+    """Opens checkpointers and closes them (and their flush threads) after the test."""
+    savers = []
+
+    def open_(*args, **kwargs):
+        savers.append(SQLiteCheckpointer(*args, **kwargs))
+        return savers[-1]
+
+    yield open_
+    for saver in savers:
+        saver.close()
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def make_agent(checkpointer, turns=20):
+    answers = iter([AIMessage(content=f"answer {i}") for i in range(turns)])
+    return create_agent(GenericFakeChatModel(messages=answers), tools=[], checkpointer=checkpointer)
+
+
+def chat(agent, turns, thread_id="t"):
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(turns):
+        result = agent.invoke({"messages": [{"role": "user", "content": f"question {i}"}]}, config)
+    return [m.text for m in result["messages"]]
+
+
+def test_matches_in_memory_saver_and_stores_deltas(tmp_path, open_saver):
+    """Test that conversations are identical to InMemorySaver while most messages are stored as deltas"""
+    saver = open_saver(tmp_path / "c.sqlite", keep_last=None, snapshot_every=4)
+    assert chat(make_agent(saver), 8) == chat(make_agent(InMemorySaver()), 8)
+    stats = saver.stats()
+    assert stats["delta_blobs"] > 0
+    assert stats["checkpoints"] == 8 * 3
+
+
+def test_resumes_after_restart_with_retention(tmp_path, open_saver):
+    """Test that a reopened checkpointer resumes the thread and keeps only the last N checkpoints"""
+    path = tmp_path / "c.sqlite"
+    saver = open_saver(path, keep_last=3, snapshot_every=4)
+    chat(make_agent(saver), 6)
+    saver.close()
+
+    reopened = open_saver(path, keep_last=3, snapshot_every=4)
+    agent = make_agent(reopened)
+    config = {"configurable": {"thread_id": "t"}}
+    assert len(agent.get_state(config).values["messages"]) == 12
+    assert len(list(agent.get_state_history(config))) == 3
+    messages = chat(agent, 1)
+    assert len(messages) == 14 and messages[:2] == ["question 0", "answer 0"]
+    assert reopened.stats()["checkpoints"] == 3
+    assert len(chat(make_agent(reopened), 1, thread_id="other")) == 2
+
+
+def test_interrupt_survives_restart(tmp_path, open_saver):
+    """Test that a pending human-in-the-loop approval can be resumed from a new process"""
+
+    @tool
+    def send_email(to: str) -> str:
+        """Send an email."""
+        return f"sent to {to}"
+
+    def make(saver, *answers):
+        model = ToolCallingFakeModel(messages=iter(answers))
+        middleware = [HumanInTheLoopMiddleware(interrupt_on={"send_email": True})]
+        return create_agent(model, tools=[send_email], middleware=middleware, checkpointer=saver)
+
+    path = tmp_path / "c.sqlite"
+    config = {"configurable": {"thread_id": "hitl"}}
+    saver = open_saver(path)
+    call = AIMessage(content="", tool_calls=[{"name": "send_email", "args": {"to": "team"}, "id": "1"}])
+    result = make(saver, call).invoke({"messages": [{"role": "user", "content": "email the team"}]}, config)
+    interrupt_id = result["__interrupt__"][0].id
+    saver.close()
+
+    agent = make(open_saver(path), AIMessage(content="done"))
+    result = agent.invoke(Command(resume={interrupt_id: {"decisions": [{"type": "approve"}]}}), config)
+    assert [m.text for m in result["messages"]][-2:] == ["sent to team", "done"]
+
+
+def test_async_path(tmp_path, open_saver):
+    """Test that ainvoke reads and writes through the same store"""
+    saver = open_saver(tmp_path / "c.sqlite")
+    agent = make_agent(saver)
+    config = {"configurable": {"thread_id": "a"}}
+
+    async def run():
+        for i in range(3):
+            await agent.ainvoke({"messages": [{"role": "user", "content": f"q{i}"}]}, config)
+        return await agent.aget_state(config)
+
+    assert len(asyncio.run(run()).values["messages"]) == 6
+
+
+def test_aput_does_not_wait_for_a_commit(tmp_path, open_saver):
+    """Test that aput/aput_writes only queue rows while the database lock is held elsewhere"""
+    saver = open_saver(tmp_path / "c.sqlite", flush_interval=60)
+    checkpoint = empty_checkpoint()
+    config = {"configurable": {"thread_id": "a", "checkpoint_ns": ""}}
+
+    async def put():
+        stored = await saver.aput(config, checkpoint, {}, {})
+        await saver.aput_writes(stored, [("messages", ["hi"])], "task")
+
+    holding, release = threading.Event(), threading.Event()
+
+    def commit():  # stands in for a long commit/prune on the flusher thread
+        with saver._lock:
+            holding.set()
+            release.wait(10)
+
+    flusher = threading.Thread(target=commit)
+    flusher.start()
+    holding.wait(5)
+    asyncio.run(put())
+    assert flusher.is_alive() and saver._checkpoints and saver._writes
+    release.set()
+    flusher.join()
+    assert saver.get_tuple(config).pending_writes == [("task", "messages", ["hi"])]
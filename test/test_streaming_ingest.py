@@ -0,0 +1,91 @@
+"""
+Tests for the streaming ingestion pipeline
+"""
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from bm25_index import BM25Index
+from incremental_index import IncrementalIndexer
+from streaming_ingest import StreamingIngestor
+from vector_store import MmapVectorStore
+
+
+class SlowEmbedding(DeterministicFakeEmbedding):
+    def embed_documents(self, texts):
+        time.sleep(0.005)
+        return super().embed_documents(texts)
+
+
+def pages(n, produced):
+    for i in range(n):
+        produced.append(i)
+        yield Document(page_content=" ".join(f"page {i} word {j}" for j in range(40)), metadata={"page": i})
+
+
+def test_pipeline_is_bounded_and_complete():
+    """Test that every chunk arrives and the reader never runs far ahead"""
+    produced, read_at_embed = [], []
+
+    class Tracking(SlowEmbedding):
+        def embed_documents(self, texts):
+            read_at_embed.append(len(produced))
+            return super().embed_documents(texts)
+
+    store = MmapVectorStore(Tracking(size=8))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
+    ingestor = StreamingIngestor(store, splitter, batch_size=8, queue_size=2)
+
+    stats = ingestor.run(pages(200, produced))
+    expected = len(splitter.split_documents(list(pages(200, []))))
+    assert len(store) == expected
+    assert stats.stages["split"].items == stats.stages["write"].items == expected
+    assert stats.stages["read"].items == 200
+    # The reader waits for the slow embedder: when batch i is embedded the
+    # reader is at most 5 batches (this one, 2 queued, 1 waiting to be queued,
+    # 1 being filled) plus a page ahead, not the whole corpus.
+    pages_per_batch = 8 * 200 / expected
+    lead = max(read - i * pages_per_batch for i, read in enumerate(read_at_embed))
+    assert lead <= 5 * pages_per_batch + 1
+
+
+def test_embedding_errors_propagate():
+    """Test that a failing embedder stops the pipeline and re-raises"""
+    class Broken(DeterministicFakeEmbedding):
+        def embed_documents(self, texts):
+            raise RuntimeError("quota exceeded")
+
+    store = MmapVectorStore(Broken(size=8))
+    ingestor = StreamingIngestor(store, RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=0))
+    before = set(threading.enumerate())
+    with pytest.raises(RuntimeError, match="quota"):
+        ingestor.run(pages(50, []))
+    assert [t for t in threading.enumerate() if t not in before and t.is_alive()] == []
+
+
+def test_indexer_run_is_incremental(tmp_path):
+    """Test that writing through an IncrementalIndexer saves a manifest later runs and updates reuse"""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
+    docs = [Document(page_content=d.page_content, metadata={**d.metadata, "source": "a.pdf"}) for d in pages(20, [])]
+
+    def ingest(documents):
+        store = MmapVectorStore.open(tmp_path / "index", DeterministicFakeEmbedding(size=8), bm25=BM25Index())
+        ingestor = StreamingIngestor(store, splitter, batch_size=8, indexer=IncrementalIndexer(store, splitter))
+        return store, ingestor.run(documents)
+
+    store, stats = ingest(docs)
+    assert stats.index.chunks_added == len(store) == len(splitter.split_documents(docs))
+
+    docs[3] = Document(page_content="a rewritten page", metadata=docs[3].metadata)
+    store, stats = ingest(docs[:10])
+    assert stats.index.changed_documents == 1 and stats.index.unchanged_documents == 9
+    assert stats.index.removed_documents == 10 and stats.stages["split"].items == 1
+    assert store.keyword_search_with_score("rewritten", k=1)[0][0].page_content == "a rewritten page"
+
+    reopened = MmapVectorStore.open(tmp_path / "index", DeterministicFakeEmbedding(size=8), bm25=BM25Index())
+    update = IncrementalIndexer(reopened, splitter).update(docs[:10])
+    assert update.chunks_added == update.chunks_deleted == 0
@@ -0,0 +1,114 @@
+"""
+Tests for sub-agent tools and parallel supervisor fan-out
+"""
+import asyncio
+import time
+
+from langchain.agents import create_agent
+from langchain.agents.middleware import HumanInTheLoopMiddleware
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
+
+from subagents import subagent_tool
+
+LATENCY = 0.3
+
+
+class SlowScriptedModel(BaseChatModel):
+    calls: list[tuple[str, dict]]
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> ChatResult:
+        if isinstance(messages[-1], ToolMessage):
+            results = [m.content for m in messages if isinstance(m, ToolMessage)]
+            message = AIMessage(content=" | ".join(results))
+        else:
+            tool_calls = [{"name": n, "args": a, "id": f"call_{i}"} for i, (n, a) in enumerate(self.calls)]
+            message = AIMessage(content="", tool_calls=tool_calls)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(LATENCY)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return self._reply(messages)
+
+
+@tool
+def create_calendar_event(title: str) -> str:
+    """Create a calendar event."""
+    return f"created {title}"
+
+
+@tool
+def send_email(to: str) -> str:
+    """Send an email."""
+    return f"sent to {to}"
+
+
+def make_supervisor():
+    def subagent(tool_, args):
+        return create_agent(
+            SlowScriptedModel(calls=[(tool_.name, args)]),
+            tools=[tool_],
+            middleware=[HumanInTheLoopMiddleware(interrupt_on={tool_.name: True})],
+        )
+
+    tools = [
+        subagent_tool(subagent(create_calendar_event, {"title": "sync"}), "schedule_event", "Schedule events."),
+        subagent_tool(subagent(send_email, {"to": "team"}), "manage_email", "Send emails."),
+    ]
+    model = SlowScriptedModel(calls=[("schedule_event", {"request": "a"}), ("manage_email", {"request": "b"})])
+    return create_agent(model, tools=tools, checkpointer=InMemorySaver())
+
+
+def approve(interrupts) -> Command:
+    return Command(resume={i.id: {"decisions": [{"type": "approve"}]} for i in interrupts})
+
+
+def test_parallel_calls_interrupt_together_and_resume_in_order():
+    """Test that both sub-agents run concurrently, both approvals surface, and results keep call order"""
+    supervisor = make_supervisor()
+    config = {"configurable": {"thread_id": "sync"}}
+
+    start = time.perf_counter()
+    result = supervisor.invoke({"messages": [{"role": "user", "content": "do both"}]}, config)
+    # supervisor turn + one sub-agent turn; sequential calls would take three
+    assert time.perf_counter() - start < 2.5 * LATENCY
+    assert len(result["__interrupt__"]) == 2
+
+    result = supervisor.invoke(approve(result["__interrupt__"]), config)
+    assert "__interrupt__" not in result
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert [m.name for m in tool_messages] == ["schedule_event", "manage_email"]
+    assert "created sync" in tool_messages[0].content
+    assert "sent to team" in tool_messages[1].content
+
+
+def test_async_path_uses_ainvoke():
+    """Test that the supervisor's ainvoke fans out sub-agents concurrently"""
+    supervisor = make_supervisor()
+    config = {"configurable": {"thread_id": "async"}}
+
+    async def run():
+        start = time.perf_counter()
+        result = await supervisor.ainvoke({"messages": [{"role": "user", "content": "do both"}]}, config)
+        elapsed = time.perf_counter() - start
+        result = await supervisor.ainvoke(approve(result["__interrupt__"]), config)
+        return elapsed, result
+
+    elapsed, result = asyncio.run(run())
+    assert elapsed < 2.5 * LATENCY
+    assert result["messages"][-1].content.count("|") == 1
@@ -0,0 +1,107 @@
+"""
+Tests for tool result memoization and speculative tool calls
+"""
+import itertools
+
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from quickstart import Context, likely_tool_calls, tools
+from tool_memo import SpeculativeToolCalls, ToolMemo
+
+
+class WeatherModel(BaseChatModel):
+    """Asks for the user's location, then its weather, then answers; counts its calls."""
+
+    calls: int = 0
+    ignores_speculation: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "weather"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        turn = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        results = {
+            m.name: m.text
+            for m in messages[turn:]
+            if isinstance(m, ToolMessage) and not (self.ignores_speculation and m.tool_call_id.startswith("speculative"))
+        }
+        if "get_user_location" not in results:
+            call = {"name": "get_user_location", "args": {}, "id": f"call_{self.calls}"}
+        elif "get_weather_for_location" not in results:
+            city = results["get_user_location"]
+            call = {"name": "get_weather_for_location", "args": {"city": city}, "id": f"call_{self.calls}"}
+        else:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=results["get_weather_for_location"]))])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[call]))])
+
+
+def ask(agent, question: str, user_id: str = "1") -> str:
+    result = agent.invoke({"messages": [{"role": "user", "content": question}]}, context=Context(user_id=user_id))
+    return result["messages"][-1].text
+
+
+def test_memo_serves_repeated_calls_until_ttl():
+    """Test that idempotent tools are answered from memory within their TTL, per context."""
+    now = itertools.count()
+    memo = ToolMemo({"get_user_location": 10}, clock=lambda: next(now))
+    model = WeatherModel()
+    agent = create_agent(model, tools=tools, middleware=[memo], context_schema=Context)
+    assert ask(agent, "how is the weather?") == "It's always sunny in Florida!"
+    assert ask(agent, "how is the weather?") == "It's always sunny in Florida!"
+    assert memo.stats()["hits"] == 1 and memo.stats()["entries"] == 1
+    assert ask(agent, "how is the weather?", user_id="2") == "It's always sunny in SF!"
+    assert memo.stats()["hits"] == 1
+
+    call = {"name": "get_user_location", "args": {}, "id": "x"}
+    memo.store(call, ToolMessage(content="Mars", tool_call_id="x"), "ctx")
+    for _ in range(10):
+        next(now)
+    assert memo.lookup(call, "ctx") is None
+    assert memo.lookup({"name": "send_email", "args": {}, "id": "y"}) is None
+
+
+def test_speculation_saves_model_steps():
+    """Test that predicted calls run before the first model call and the saved steps are reported."""
+    baseline = WeatherModel()
+    agent = create_agent(baseline, tools=tools, context_schema=Context)
+    assert ask(agent, "will it rain today?") == "It's always sunny in Florida!"
+    assert baseline.calls == 3
+
+    model = WeatherModel()
+    speculate = SpeculativeToolCalls(tools, likely_tool_calls, memo=ToolMemo({"get_user_location": 60}))
+    agent = create_agent(model, tools=tools, middleware=[speculate], context_schema=Context)
+    assert ask(agent, "will it rain today?", user_id="2") == "It's always sunny in SF!"
+    assert model.calls == 1
+    stats = speculate.stats()
+    assert stats["speculated_calls"] == 2 and stats["model_steps_saved"] == 2
+
+    assert ask(agent, "what is the weather in yogyakarta?") == "It's always sunny in Florida!"
+    assert model.calls == 4
+    stats = speculate.stats()
+    assert stats["requests"] == 2 and stats["model_steps_saved_per_request"] == 1.0
+
+
+def test_repeated_speculative_call_counts_as_wasted():
+    """Test that a model re-requesting an injected call is not counted as a saved step."""
+    speculate = SpeculativeToolCalls(tools, lambda question, context, results: [("get_weather_for_location", {"city": "SF"})])
+    model = WeatherModel()
+    agent = create_agent(model, tools=tools, middleware=[speculate], context_schema=Context)
+    ask(agent, "weather?", user_id="2")
+    stats = speculate.stats()
+    assert model.calls == 2
+    assert stats["injected_rounds"] == 1 and stats["model_steps_saved"] == 1 and stats["repeated"] == 0
+
+    speculate = SpeculativeToolCalls(tools, lambda question, context, results: [("get_user_location", {})])
+    model = WeatherModel(ignores_speculation=True)
+    agent = create_agent(model, tools=tools, middleware=[speculate], context_schema=Context)
+    ask(agent, "weather?")
+    assert model.calls == 3
+    assert speculate.stats()["repeated"] == 1 and speculate.stats()["model_steps_saved"] == 0
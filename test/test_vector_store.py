@@ -0,0 +1,65 @@
+"""
+Tests for the memory-mapped vector store
+"""
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from vector_store import MmapVectorStore
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=32)
+DOCS = [Document(page_content=f"chunk {i}", metadata={"page": i}) for i in range(40)]
+
+
+def test_matches_in_memory_store():
+    """Test that results and scores match InMemoryVectorStore"""
+    store = MmapVectorStore(EMBEDDINGS)
+    ids = store.add_documents(DOCS)
+    reference = InMemoryVectorStore(EMBEDDINGS)
+    reference.add_documents(DOCS, ids=ids)
+
+    got = store.similarity_search_with_score("chunk 7", k=4)
+    expected = reference.similarity_search_with_score("chunk 7", k=4)
+    assert [doc.id for doc, _ in got] == [doc.id for doc, _ in expected]
+    assert np.allclose([s for _, s in got], [s for _, s in expected], atol=1e-5)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test that a saved index reopens memory-mapped and stays writable"""
+    store = MmapVectorStore(EMBEDDINGS)
+    ids = store.add_documents(DOCS)
+    store.delete(ids[:5])
+    store.save(tmp_path / "index")
+
+    loaded = MmapVectorStore.load(tmp_path / "index", EMBEDDINGS)
+    assert isinstance(loaded._vectors, np.memmap)
+    assert len(loaded) == 35
+    assert loaded.similarity_search("chunk 9", k=1)[0].metadata == {"page": 9}
+    assert loaded.get_by_ids([ids[0]]) == []
+
+    loaded.add_texts(["fresh chunk"], [{"page": 99}])
+    assert loaded.similarity_search("fresh chunk", k=1)[0].metadata == {"page": 99}
+    assert MmapVectorStore.load(tmp_path / "index", EMBEDDINGS).similarity_search(
+        "fresh chunk", k=1
+    )[0].metadata != {"page": 99}
+
+
+def test_batch_search_matches_single_queries():
+    """Test that batched top-k equals one query at a time"""
+    store = MmapVectorStore(EMBEDDINGS)
+    store.add_documents(DOCS)
+    queries = ["chunk 1", "chunk 22", "chunk 39"]
+    batched = store.batch_similarity_search(queries, k=3)
+    assert batched == [store.similarity_search(query, k=3) for query in queries]
+
+
+def test_callable_filter_over_whole_store():
+    """Test that a rare callable filter widens to the whole store in batched lookups"""
+    store = MmapVectorStore(DeterministicFakeEmbedding(size=8))
+    ids = store.add_texts([f"text {i}" for i in range(3000)], metadatas=[{"i": i} for i in range(3000)])
+    store.delete(ids[:10])
+    assert len(store) == 2990
+    found = store.similarity_search("text 1", k=3, filter=lambda doc: doc.metadata["i"] % 1000 == 999)
+    assert sorted(doc.metadata["i"] for doc in found) == [999, 1999, 2999]
+    assert len(store.get_by_ids(ids)) == 2990
@@ -0,0 +1,230 @@
+"""
+Tool Result Memo and Speculative Tool Calls
+
+Two ``create_agent`` middleware that take cheap, deterministic tools off the
+model's critical path:
+
+- :class:`ToolMemo` caches the results of idempotent tools for a per-tool
+  TTL. Entries are keyed by tool name, arguments and the run's context (e.g.
+  ``Context(user_id=...)``). Tools without a TTL (sending an email, creating
+  an event) always run.
+- :class:`SpeculativeToolCalls` predicts the calls a turn is going to need
+  from the user's message and the runtime context, for example
+  ``get_user_location`` for a weather question that names no place. Predicted
+  calls run in parallel, and the calls plus their results are added to the
+  conversation before the first model call. The model reads the results
+  instead of spending a round-trip to ask for them. Predictions can chain: the
+  location feeds ``get_weather_for_location``. Each injected round is one model
+  step saved, unless the model asks for the same call again anyway.
+
+    memo = ToolMemo({"get_weather_for_location": 600, "get_user_location": 3600})
+    speculate = SpeculativeToolCalls(tools, likely_tool_calls, memo=memo)
+    agent = create_agent(model, tools, middleware=[memo, speculate], context_schema=Context)
+    print(memo.stats(), speculate.stats())
+"""
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import BaseTool, tool as as_tool
+
+# (user message, runtime context, {tool name: result text} of earlier rounds) -> [(tool name, args)]
+Predictor = Callable[[str, Any, dict[str, str]], list[tuple[str, dict]]]
+
+
+def _call_key(name: str, args: dict, context: Any = None) -> str:
+    return json.dumps([name, args, repr(context)], sort_keys=True, default=str)
+
+
+class ToolMemo(AgentMiddleware):
+    """Serves repeated calls of the tools in ``ttls`` (name -> seconds) from memory."""
+
+    def __init__(self, ttls: dict[str, float], max_entries: int = 4096, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def lookup(self, call: dict, context: Any = None) -> ToolMessage | None:
+        """The cached result of ``call`` as a ``ToolMessage`` answering it, or ``None``."""
+        if call["name"] not in self.ttls:
+            return None
+        key = _call_key(call["name"], call["args"], context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        _, content, artifact = entry
+        return ToolMessage(content=content, artifact=artifact, name=call["name"], tool_call_id=call["id"])
+
+    def store(self, call: dict, result: Any, context: Any = None) -> None:
+        ttl = self.ttls.get(call["name"])
+        if ttl is None or not isinstance(result, ToolMessage) or result.status == "error":
+            return
+        with self._lock:
+            self._entries[_call_key(call["name"], call["args"], context)] = (
+                self.clock() + ttl, result.content, result.artifact,
+            )
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def run(self, tool: BaseTool, call: dict, context: Any = None) -> ToolMessage:
+        """Answer ``call`` from the memo, or invoke ``tool`` and remember the result."""
+        cached = self.lookup(call, context)
+        if cached is not None:
+            return cached
+        result = tool.invoke({**call, "type": "tool_call"})
+        self.store(call, result, context)
+        return result
+
+    @staticmethod
+    def _context(request) -> Any:
+        return getattr(request.runtime, "context", None)
+
+    def wrap_tool_call(self, request, handler):
+        cached = self.lookup(request.tool_call, self._context(request))
+        if cached is not None:
+            return cached
+        result = handler(request)
+        self.store(request.tool_call, result, self._context(request))
+        return result
+
+    async def awrap_tool_call(self, request, handler):
+        cached = self.lookup(request.tool_call, self._context(request))
+        if cached is not None:
+            return cached
+        result = await handler(request)
+        self.store(request.tool_call, result, self._context(request))
+        return result
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+class SpeculativeToolCalls(AgentMiddleware):
+    """Runs the tool calls ``predict`` expects and shows their results to the first model call of a turn.
+
+    Args:
+        tools: the agent's tools (functions or ``BaseTool``); only these can be predicted.
+        predict: ``(user message, context, earlier results) -> [(tool name, args)]``;
+            called again with each round's results until it predicts nothing new.
+        memo: a :class:`ToolMemo` to answer predicted calls from.
+        max_rounds: bound on chained prediction rounds per turn.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool | Callable],
+        predict: Predictor,
+        memo: ToolMemo | None = None,
+        max_rounds: int = 3,
+        max_workers: int = 4,
+        max_turns: int = 1024,
+    ):
+        super().__init__()
+        self._tools = {t.name: t for t in (t if isinstance(t, BaseTool) else as_tool(t) for t in tools)}
+        self.predict = predict
+        self.memo = memo
+        self.max_rounds = max_rounds
+        self.max_workers = max_workers
+        self.max_turns = max_turns
+        # user message id -> keys of the calls injected for that turn
+        self._turns: OrderedDict[str, set[str]] = OrderedDict()
+        self.requests = self.speculated = self.rounds = self.repeated = 0
+
+    def _run_one(self, call: dict, context: Any) -> ToolMessage | None:
+        tool = self._tools[call["name"]]
+        try:
+            if self.memo is not None:
+                return self.memo.run(tool, call, context)
+            return tool.invoke({**call, "type": "tool_call"})
+        except Exception:
+            # A failed guess costs nothing: the model can still make the call itself.
+            return None
+
+    def _run(self, calls: list[dict], context: Any) -> list[ToolMessage | None]:
+        if len(calls) == 1:
+            return [self._run_one(calls[0], context)]
+        with ThreadPoolExecutor(min(self.max_workers, len(calls))) as executor:
+            # copy_context: tools may read the graph runtime (e.g. get_runtime(Context)).
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._run_one, call, context) for call in calls
+            ]
+            return [future.result() for future in futures]
+
+    def before_model(self, state, runtime) -> dict | None:
+        messages = state["messages"]
+        if not messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        self.requests += 1
+        question, context = messages[-1].text, getattr(runtime, "context", None)
+        injected, results, done = [], {}, set()
+        for _ in range(self.max_rounds):
+            calls = [
+                {"name": name, "args": args, "id": f"speculative_{uuid.uuid4().hex[:12]}"}
+                for name, args in self.predict(question, context, results)
+                if name in self._tools and _call_key(name, args) not in done
+            ]
+            if not calls:
+                break
+            outputs = [(c, o) for c, o in zip(calls, self._run(calls, context)) if isinstance(o, ToolMessage)]
+            if not outputs:
+                break
+            injected.append(AIMessage(content="", tool_calls=[call for call, _ in outputs]))
+            for call, output in outputs:
+                injected.append(output)
+                results[call["name"]] = output.text
+                done.add(_call_key(call["name"], call["args"]))
+            self.rounds += 1
+            self.speculated += len(outputs)
+        if not injected:
+            return None
+        if messages[-1].id:
+            self._turns[messages[-1].id] = done
+            if len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+        return {"messages": injected}
+
+    def after_model(self, state, runtime) -> dict | None:
+        messages = state["messages"]
+        question = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        done = self._turns.get(question.id) if question is not None and question.id else None
+        if done and isinstance(messages[-1], AIMessage):
+            if any(_call_key(c["name"], c["args"]) in done for c in messages[-1].tool_calls):
+                # The model asked again anyway: count the turn's speculation as wasted once.
+                self.repeated += 1
+                self._turns[question.id] = set()
+        return None
+
+    def stats(self) -> dict:
+        saved = self.rounds - self.repeated
+        return {
+            "requests": self.requests,
+            "speculated_calls": self.speculated,
+            "injected_rounds": self.rounds,
+            "repeated": self.repeated,
+            "model_steps_saved": saved,
+            "model_steps_saved_per_request": saved / self.requests if self.requests else 0.0,
+        }
@@ -0,0 +1,585 @@
+"""
+Memory-Mapped Vector Store
+
+Drop-in replacement for ``InMemoryVectorStore`` that keeps every embedding in
+one contiguous, L2-normalized float32 matrix and the documents/metadata in a
+SQLite side table. A search is one matrix-vector product plus an
+``argpartition`` top-k, and ``batch_similarity_search`` scores many queries
+with a single matrix-matrix product. ``save()`` writes the matrix as a ``.npy`` file and ``load()`` opens it
+with ``mmap_mode="r"``, so a persisted index is ready without re-embedding and
+only the pages touched by a search become resident.
+
+    vector_store = MmapVectorStore.load_or_build(
+        ".cache/indexes/agent-blog", embeddings, lambda: all_splits
+    )
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from metadata_index import MetadataIndex
+
+VECTORS_FILE = "vectors.npy"
+DOCS_FILE = "docs.sqlite"
+META_FILE = "meta.json"
+ANN_FILE = "ivf.npz"
+BM25_FILE = "bm25.npz"
+METADATA_INDEX_FILE = "metadata.npz"
+
+# Upper bound on the (queries x rows) score block materialized at once.
+SCORE_BLOCK = 1 << 25
+# Rows fetched from the docs table per query (stays under SQLite's variable limit).
+FETCH_BATCH = 500
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so cosine similarity becomes a dot product."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first, without a full sort."""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < scores.shape[-1]:
+        part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(k), scores.shape[:-1] + (k,))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def embed_documents_array(embedding: Embeddings, texts: list[str]) -> np.ndarray:
+    """Embed ``texts`` straight into a float32 matrix when the embedder allows it."""
+    if hasattr(embedding, "embed_documents_array"):
+        return embedding.embed_documents_array(texts)
+    return np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+
+
+class MmapVectorStore(VectorStore):
+    """Vector store backed by a float32 matrix and a SQLite document table.
+
+    Pass ``ann=IVFIndex(...)`` (see ``ann_index.py``) to answer unfiltered
+    searches from an approximate index once it has been trained, and
+    ``bm25=BM25Index()`` (see ``bm25_index.py``) to keep a keyword index of
+    the same rows for :meth:`keyword_search_with_score`. Dict ``filter``
+    arguments are resolved through a metadata index before any scoring;
+    callables are still accepted and checked per candidate.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        path: str | os.PathLike | None = None,
+        ann=None,
+        bm25=None,
+    ):
+        self.embedding = embedding
+        self.path = Path(path) if path else None
+        self.ann = ann
+        self.bm25 = bm25
+        self.metadata_index = MetadataIndex()
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._rows: dict[str, int] = {}
+        self._readonly = False
+        self._db = self._connect(":memory:")
+
+    @staticmethod
+    def _connect(database: str, readonly: bool = False) -> sqlite3.Connection:
+        if readonly:
+            db = sqlite3.connect(f"file:{database}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            db = sqlite3.connect(database, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+                "text TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+        return db
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def dim(self) -> int:
+        return self._vectors.shape[1] if self._vectors.ndim == 2 else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the live part of the vector matrix."""
+        return self._size * self.dim * 4
+
+    # -- writes --------------------------------------------------------------
+
+    def _ensure_writable(self) -> None:
+        """Copy a loaded (read-only, memory-mapped) index into process memory."""
+        if not self._readonly:
+            return
+        self._vectors = np.array(self._vectors[: self._size], dtype=np.float32)
+        memory = self._connect(":memory:")
+        self._db.backup(memory)
+        self._db.close()
+        self._db = memory
+        self._readonly = False
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        needed = self._size + extra
+        if self._vectors.ndim != 2 or self._vectors.shape[1] != dim:
+            if self._size:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {dim}")
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), 256)
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._vectors, self._alive = vectors, alive
+
+    def add_vectors(
+        self,
+        vectors: np.ndarray,
+        documents: list[Document],
+        ids: list[str] | None = None,
+    ) -> list[str]:
+        """Add pre-computed embeddings for ``documents``."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if ids and len(ids) != len(documents):
+            raise ValueError(
+                f"ids must be the same length as documents. "
+                f"Got {len(ids)} ids and {len(documents)} documents."
+            )
+        if not documents:
+            return []
+        ids_ = [
+            (ids[i] if ids else doc.id) or str(uuid.uuid4())
+            for i, doc in enumerate(documents)
+        ]
+        with self._lock:
+            self._ensure_writable()
+            self.delete([id_ for id_ in ids_ if id_ in self._rows])
+            self._reserve(len(documents), vectors.shape[1])
+            start = self._size
+            end = start + len(documents)
+            self._vectors[start:end] = normalize(vectors)
+            self._alive[start:end] = True
+            self._db.executemany(
+                "INSERT INTO docs(row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + i, id_, doc.page_content, json.dumps(doc.metadata, default=str))
+                    for i, (id_, doc) in enumerate(zip(ids_, documents))
+                ],
+            )
+            self._db.commit()
+            for i, id_ in enumerate(ids_):
+                self._rows[id_] = start + i
+            self._size = end
+            self.metadata_index.add([doc.metadata for doc in documents], start)
+            if self.bm25 is not None:
+                self.bm25.add([doc.page_content for doc in documents], start)
+            if self.ann is not None:
+                self.ann.add(self._vectors[start:end], start)
+                if not self.ann.trained and len(self) >= self.ann.min_train:
+                    self.ann.fit(self._vectors[:end], self._alive[:end])
+        return ids_
+
+    def add_documents(
+        self, documents: list[Document], ids: list[str] | None = None, **kwargs: Any
+    ) -> list[str]:
+        vectors = embed_documents_array(self.embedding, [doc.page_content for doc in documents])
+        return self.add_vectors(vectors, documents, ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)]
+        return self.add_documents(documents, ids=ids)
+
+    def delete(self, ids: Sequence[str] | None = None, **kwargs: Any) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._ensure_writable()
+            rows = [self._rows.pop(id_) for id_ in ids if id_ in self._rows]
+            self._alive[rows] = False
+            if self.ann is not None:
+                self.ann.remove(rows)
+            if self.bm25 is not None:
+                self.bm25.remove(rows)
+            self._db.executemany("DELETE FROM docs WHERE row = ?", [(row,) for row in rows])
+            self._db.commit()
+
+    # -- reads ---------------------------------------------------------------
+
+    def _documents(self, rows: Sequence[int]) -> list[Document]:
+        rows = [int(row) for row in rows]
+        if not rows:
+            return []
+        found = {}
+        with self._lock:
+            for start in range(0, len(rows), FETCH_BATCH):
+                batch = rows[start:start + FETCH_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for row, id_, text, metadata in self._db.execute(
+                    f"SELECT row, id, text, metadata FROM docs WHERE row IN ({placeholders})",
+                    batch,
+                ):
+                    found[row] = Document(id=id_, page_content=text, metadata=json.loads(metadata))
+        return [found[row] for row in rows if row in found]
+
+    def ids(self) -> list[str]:
+        """Ids of every live document."""
+        return list(self._rows)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        return self._documents([self._rows[id_] for id_ in ids if id_ in self._rows])
+
+    def vectors_by_ids(self, ids: Sequence[str]) -> np.ndarray:
+        """Stored (normalized) embeddings of ``ids``, in order; every id must exist."""
+        with self._lock:
+            return np.array(self._vectors[[self._rows[id_] for id_ in ids]], dtype=np.float32)
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine scores of a ``(m, dim)`` block of queries against every row."""
+        n = self._size
+        scores = normalize(queries) @ self._vectors[:n].T
+        if len(self) != n:
+            scores[:, ~self._alive[:n]] = -np.inf
+        return scores
+
+    def _search_rows(
+        self, queries: np.ndarray, k: int, exact: bool = False
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Top-k ``(rows, scores)`` per query, scoring blocks of queries at a time."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        if not exact and self.ann is not None and self.ann.trained:
+            return self.ann.search(self._vectors, normalize(queries), k)
+        block = max(1, SCORE_BLOCK // max(self._size, 1))
+        results = []
+        for start in range(0, len(queries), block):
+            scores = self._scores(queries[start:start + block])
+            rows = top_k(scores, k)
+            results += [(r, s[r]) for r, s in zip(rows, scores)]
+        return results
+
+    def _filtered_rows(self, filter: dict) -> np.ndarray:
+        """Live rows whose metadata matches a dict ``filter`` (see ``metadata_index.py``)."""
+        rows = self.metadata_index.rows(filter)
+        rows = rows[rows < self._size]
+        return rows[self._alive[rows]]
+
+    def _similarity_search_with_score_by_vector(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        filter: Callable[[Document], bool] | dict | None = None,
+    ) -> list[tuple[Document, float, int]]:
+        with self._lock:
+            alive = len(self)
+            if not alive:
+                return []
+            if isinstance(filter, dict):
+                # Score only the pre-filtered subset.
+                rows = self._filtered_rows(filter)
+                query = normalize(np.asarray(embedding, dtype=np.float32))
+                scores = np.asarray(self._vectors[rows]) @ query
+                best = top_k(scores, k)
+                rows, scores = rows[best], scores[best]
+                return [
+                    (doc, float(score), int(row))
+                    for row, score, doc in zip(rows, scores, self._documents(rows))
+                ]
+            if filter is None:
+                [(rows, scores)] = self._search_rows(embedding, k)
+                return [
+                    (doc, float(score), int(row))
+                    for row, score, doc in zip(rows, scores, self._documents(rows))
+                ]
+            scores = self._scores(np.atleast_2d(np.asarray(embedding, dtype=np.float32)))[0]
+        # The filter only sees documents, so widen the candidate pool until
+        # enough of them pass or the whole store has been considered; each
+        # round only loads the rows the previous ones did not.
+        fetch = max(4 * k, 64)
+        results: list[tuple[Document, float, int]] = []
+        seen: set[int] = set()
+        while True:
+            rows = [int(row) for row in top_k(scores, min(fetch, alive)) if int(row) not in seen]
+            seen.update(rows)
+            results += [
+                (doc, float(scores[row]), row)
+                for row, doc in zip(rows, self._documents(rows))
+                if filter(doc)
+            ]
+            if len(results) >= k or fetch >= alive:
+                results.sort(key=lambda result: -result[1])
+                return results[:k]
+            fetch *= 4
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Callable[[Document], bool] | dict | None = None,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        return [
+            (doc, score)
+            for doc, score, _ in self._similarity_search_with_score_by_vector(embedding, k, filter)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        embedding = self.embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def keyword_search_with_score(self, query: str, k: int = 4) -> list[tuple[Document, float]]:
+        """BM25 top-k; needs ``bm25=BM25Index()`` and never calls the embedder."""
+        if self.bm25 is None:
+            raise ValueError("keyword search needs a store created with bm25=BM25Index()")
+        with self._lock:
+            rows, scores = self.bm25.search(query, k)
+            return [(doc, float(score)) for doc, score in zip(self._documents(rows), scores)]
+
+    def batch_similarity_search_with_score_by_vector(
+        self, embeddings: Sequence[Sequence[float]], k: int = 4
+    ) -> list[list[tuple[Document, float]]]:
+        """Top-k documents for every query vector in one pass over the matrix."""
+        with self._lock:
+            if not len(self) or not len(embeddings):
+                return [[] for _ in embeddings]
+            hits = self._search_rows(embeddings, k)
+            return [
+                [(doc, float(score)) for doc, score in zip(self._documents(rows), scores)]
+                for rows, scores in hits
+            ]
+
+    def batch_similarity_search(self, queries: list[str], k: int = 4) -> list[list[Document]]:
+        """Run several text queries with a single matrix-matrix product."""
+        embeddings = [self.embedding.embed_query(query) for query in queries]
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.batch_similarity_search_with_score_by_vector(embeddings, k)
+        ]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._cosine_relevance_score_fn
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        *,
+        filter: Callable[[Document], bool] | dict | None = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        hits = self._similarity_search_with_score_by_vector(embedding, fetch_k, filter)
+        chosen = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            [self._vectors[row] for _, _, row in hits],
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return [hits[i][0] for i in chosen]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> list[Document]:
+        embedding = self.embedding.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(
+            embedding, k, fetch_k, lambda_mult=lambda_mult, **kwargs
+        )
+
+    # -- persistence ---------------------------------------------------------
+
+    @staticmethod
+    def exists(path: str | os.PathLike) -> bool:
+        """Whether a saved index is present at ``path``."""
+        return (Path(path) / META_FILE).exists()
+
+    def save(self, path: str | os.PathLike | None = None) -> Path:
+        """Write a compacted copy of the index to ``path`` and reopen it memory-mapped."""
+        path = Path(path or self.path or "")
+        if not str(path):
+            raise ValueError("No path given to save the vector store to")
+        with self._lock:
+            rows = np.flatnonzero(self._alive[: self._size])
+            tmp = path.with_name(path.name + ".tmp")
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+
+            np.save(tmp / VECTORS_FILE, np.ascontiguousarray(self._vectors[rows], dtype=np.float32))
+            out = self._connect(str(tmp / DOCS_FILE))
+            order = {int(row): new for new, row in enumerate(rows)}
+            out.executemany(
+                "INSERT INTO docs(row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                (
+                    (order[row], id_, text, metadata)
+                    for row, id_, text, metadata in self._db.execute(
+                        "SELECT row, id, text, metadata FROM docs ORDER BY row"
+                    )
+                ),
+            )
+            out.commit()
+            out.close()
+            meta = {
+                "count": int(len(rows)),
+                "dim": self.dim,
+                "model": getattr(self.embedding, "model_name", None)
+                or getattr(self.embedding, "model", None),
+            }
+            (tmp / META_FILE).write_text(json.dumps(meta))
+            files = [VECTORS_FILE, DOCS_FILE, META_FILE, *self._save_extras(tmp, rows)]
+
+            self._db.close()
+            path.mkdir(parents=True, exist_ok=True)
+            (path / ANN_FILE).unlink(missing_ok=True)
+            (path / BM25_FILE).unlink(missing_ok=True)
+            for name in files:
+                os.replace(tmp / name, path / name)
+            tmp.rmdir()
+            self._open(path)
+            self._load_extras(path)
+        return path
+
+    def _save_extras(self, directory: Path, rows: np.ndarray) -> list[str]:
+        """Write side indexes for the compacted ``rows``; returns their file names."""
+        self.metadata_index.compact(rows)
+        self.metadata_index.save(directory / METADATA_INDEX_FILE)
+        files = [METADATA_INDEX_FILE]
+        if self.ann is not None:
+            self.ann.compact(rows)
+            self.ann.save(directory / ANN_FILE)
+            files.append(ANN_FILE)
+        if self.bm25 is not None:
+            self.bm25.compact(rows)
+            self.bm25.save(directory / BM25_FILE)
+            files.append(BM25_FILE)
+        return files
+
+    def _load_extras(self, path: Path) -> None:
+        if (path / METADATA_INDEX_FILE).exists():
+            self.metadata_index = MetadataIndex.load(path / METADATA_INDEX_FILE)
+        else:
+            self.metadata_index = MetadataIndex()
+            self.metadata_index.add(
+                [json.loads(m) for _, m in self._db.execute("SELECT row, metadata FROM docs ORDER BY row")],
+                0,
+            )
+        if (path / ANN_FILE).exists():
+            from ann_index import IVFIndex
+
+            self.ann = IVFIndex.load(path / ANN_FILE)
+        if (path / BM25_FILE).exists():
+            from bm25_index import BM25Index
+
+            self.bm25 = BM25Index.load(path / BM25_FILE)
+        elif self.bm25 is not None:
+            # Index saved before keyword search was enabled: build it from the docs table.
+            rows = self._db.execute("SELECT row, text FROM docs ORDER BY row").fetchall()
+            self.bm25.add([text for _, text in rows], 0)
+
+    def _open(self, path: Path) -> None:
+        meta = json.loads((path / META_FILE).read_text())
+        self.path = path
+        self._vectors = np.load(path / VECTORS_FILE, mmap_mode="r")
+        self._size = meta["count"]
+        self._alive = np.ones(self._size, dtype=bool)
+        self._db = self._connect(str(path / DOCS_FILE), readonly=True)
+        self._rows = {id_: row for row, id_ in self._db.execute("SELECT row, id FROM docs")}
+        self._readonly = True
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, embedding: Embeddings, **kwargs: Any) -> "MmapVectorStore":
+        """Open a saved index; vectors are memory-mapped, not read into RAM."""
+        path = Path(path)
+        store = cls(embedding, **kwargs)
+        store._db.close()
+        store._open(path)
+        store._load_extras(path)
+        return store
+
+    @classmethod
+    def open(cls, path: str | os.PathLike, embedding: Embeddings, **kwargs: Any) -> "MmapVectorStore":
+        """Load the index saved at ``path``, or start an empty store that saves there."""
+        if cls.exists(path):
+            return cls.load(path, embedding, **kwargs)
+        return cls(embedding, path=path, **kwargs)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: str | os.PathLike,
+        embedding: Embeddings,
+        documents: Callable[[], list[Document]],
+        **kwargs: Any,
+    ) -> "MmapVectorStore":
+        """Load the index at ``path``, or embed ``documents()`` and save it there.
+
+        Extra keyword arguments (e.g. ``ann=IVFIndex()``) go to the constructor.
+        """
+        if cls.exists(path):
+            return cls.load(path, embedding, **kwargs)
+        store = cls(embedding, **kwargs)
+        store.add_documents(documents())
+        store.save(path)
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> "MmapVectorStore":
+        store = cls(embedding, path=kwargs.pop("path", None))
+        store.add_texts(texts, metadatas, **kwargs)
+        return store